@@ -0,0 +1,64 @@
+from types import ModuleType
+import importlib
+
+
+class LazyModule(ModuleType):
+    """
+    A stand-in for a module that is only imported on first attribute access.
+
+    Heavy optional dependencies (scipy.stats, matplotlib, seaborn, statsmodels, missingno, SQLAlchemy)
+    are bound to LazyModule objects at module level, so importing the scripts package stays cheap
+    and each dependency is paid for only by the code paths that use it.
+
+    Parameters:
+    - name (str): The full name of the module, e.g. 'scipy.stats'.
+
+    Example:
+    ```
+    stats = LazyModule('scipy.stats')
+    stats.normaltest(values)  # scipy.stats is imported here
+    ```
+
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_module'] = None
+
+    def _load(self) -> ModuleType:
+        """
+        Import the module if needed and return it.
+        """
+        module = self.__dict__['_module']
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attribute: str):
+        return getattr(self._load(), attribute)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = 'loaded' if self.__dict__['_module'] is not None else 'not loaded'
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """
+    Return a lazily imported module. The module is imported on first attribute access.
+
+    Parameters:
+    - name (str): The full name of the module, e.g. 'matplotlib.pyplot'.
+
+    Returns:
+    - LazyModule: A proxy of the module.
+
+    Example:
+    ```
+    plt = lazy_import('matplotlib.pyplot')
+    ```
+    """
+    return LazyModule(name)
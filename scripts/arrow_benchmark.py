@@ -0,0 +1,238 @@
+from scripts.dtype_backend import get_dtype_backend, read_csv, set_dtype_backend, to_numpy_backed
+from scripts.info_extractor import DataFrameInfo
+from scripts.statistical_tests import StatisticalTests
+from scripts.transformer import DataTransform
+from tabulate import tabulate
+from typing import Callable, Dict, List
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+import warnings
+import numpy as np
+import pandas as pd
+
+
+NUMERIC_COLUMNS = ['administrative', 'administrative_duration', 'informational', 'informational_duration',
+                   'product_related', 'product_related_duration', 'bounce_rates', 'exit_rates', 'page_values']
+CATEGORICAL_COLUMNS = ['month', 'operating_systems', 'browser', 'region', 'traffic_type', 'visitor_type']
+
+
+def _transform_workflow(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Run the DataTransform steps of the EDA on a DataFrame and return the result.
+    """
+    transform = DataTransform(df)
+    transform.impute_nulls(['administrative'], 'mean')
+    transform.impute_nulls_with_median(['administrative_duration', 'product_related'])
+    transform.impute_nulls_with_mode(['operating_systems'])
+    transform.impute_nulls_with_zeros(['informational_duration'])
+    transform.convert_month_to_int('month')
+    transform.round_float('bounce_rates', 2)
+    transform.log_transform(['administrative_duration'])
+    transform.yeo_johnson_transform(['page_values'])
+    transform.convert_columns(['browser'], 'categorical')
+    transform.fit_outlier_fences(['product_related_duration', 'informational'])
+    transform.cap_outliers()
+    transform.fit_outlier_fences(['administrative'], method='iqr')
+    return transform.remove_outliers()
+
+
+CHECKS: Dict[str, Callable[[pd.DataFrame], object]] = {
+    'DataFrameInfo.extract_statistical_values': lambda df: DataFrameInfo(df).extract_statistical_values(),
+    'DataFrameInfo.count_distinct_values': lambda df: DataFrameInfo(df).count_distinct_values(),
+    'DataFrameInfo.generate_null_counts': lambda df: DataFrameInfo(df).generate_null_counts(),
+    'DataFrameInfo.extract_numeric_features': lambda df: list(DataFrameInfo(df).extract_numeric_features().columns),
+    'DataFrameInfo.extract_categorical_features': lambda df: DataFrameInfo(df).extract_categorical_features(),
+    'DataFrameInfo.print_summary_statistics': lambda df: DataFrameInfo(df).print_summary_statistics('administrative'),
+    'DataFrameInfo.data_skewness_values': lambda df: DataFrameInfo(df).data_skewness_values(NUMERIC_COLUMNS),
+    'DataFrameInfo.show_distinct_values': lambda df: DataFrameInfo(df).show_distinct_values(['month', 'weekend']),
+    'DataFrameInfo.grouped_null_counts': lambda df: DataFrameInfo(df).grouped_null_counts('region'),
+    'DataFrameInfo.grouped_statistical_values':
+        lambda df: DataFrameInfo(df).grouped_statistical_values('region', NUMERIC_COLUMNS[:3]),
+    'DataFrameInfo.grouped_skewness_values':
+        lambda df: DataFrameInfo(df).grouped_skewness_values(['region', 'visitor_type']),
+    'DataFrameInfo.grouped_conversion_rate': lambda df: DataFrameInfo(df).grouped_conversion_rate('traffic_type'),
+    'StatisticalTests.chi_square_test':
+        lambda df: StatisticalTests(df).chi_square_test('administrative_duration', CATEGORICAL_COLUMNS),
+    'StatisticalTests.chi_square_batch': lambda df: StatisticalTests(df).chi_square_batch(CATEGORICAL_COLUMNS),
+    'StatisticalTests.missingness_association_matrix':
+        lambda df: StatisticalTests(df).missingness_association_matrix(CATEGORICAL_COLUMNS),
+    'StatisticalTests.bootstrap_confidence_interval':
+        lambda df: StatisticalTests(df).bootstrap_confidence_interval('revenue', 'visitor_type', n_resamples=500,
+                                                                      random_state=0),
+    'StatisticalTests.permutation_test':
+        lambda df: StatisticalTests(df).permutation_test('revenue', 'visitor_type', n_resamples=300, random_state=0),
+    'StatisticalTests.agostino_K2_test': lambda df: StatisticalTests(df).agostino_K2_test('exit_rates'),
+    'StatisticalTests.normality_tests': lambda df: StatisticalTests(df).normality_tests(NUMERIC_COLUMNS[:4], n_jobs=1),
+    'StatisticalTests.IQR': lambda df: StatisticalTests(df).IQR('page_values'),
+    'StatisticalTests.quantiles': lambda df: StatisticalTests(df).quantiles(NUMERIC_COLUMNS),
+    'StatisticalTests.IQR_table': lambda df: StatisticalTests(df).IQR_table(NUMERIC_COLUMNS),
+    'StatisticalTests.grouped_IQR': lambda df: StatisticalTests(df).grouped_IQR('region', NUMERIC_COLUMNS[:3]),
+    'DataTransform workflow': _transform_workflow,
+    'DataTransform.convert_month_to_period': lambda df: DataTransform(df).convert_month_to_period('month'),
+    'DataTransform.convert_month_to_datetime': lambda df: DataTransform(df).convert_month_to_datetime('month'),
+}
+
+
+def _run(check: Callable[[pd.DataFrame], object], df: pd.DataFrame, backend: str):
+    """
+    Run a check under a dtype backend, returning its result and what it printed.
+    """
+    set_dtype_backend(backend)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output), warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        result = check(df)
+    return result, output.getvalue()
+
+
+def _identical(numpy_result, arrow_result) -> bool:
+    """
+    Return whether the results of the two modes are equal, up to dtypes and floating-point rounding.
+    """
+    if isinstance(numpy_result, (pd.DataFrame, pd.Series)):
+        if not isinstance(arrow_result, type(numpy_result)):
+            return False
+        if isinstance(numpy_result, pd.Series):
+            numpy_result, arrow_result = numpy_result.to_frame(), arrow_result.to_frame()
+        try:
+            with warnings.catch_warnings():
+                # Missing values are NaN in one mode and None in the other; both are nulls
+                warnings.simplefilter('ignore', FutureWarning)
+                pd.testing.assert_frame_equal(to_numpy_backed(numpy_result), to_numpy_backed(arrow_result),
+                                              check_dtype=False, check_index_type=False, check_column_type=False,
+                                              check_categorical=False)
+        except AssertionError:
+            return False
+        return True
+    if isinstance(numpy_result, (tuple, list)):
+        return (isinstance(arrow_result, (tuple, list)) and len(numpy_result) == len(arrow_result)
+                and all(_identical(a, b) for a, b in zip(numpy_result, arrow_result)))
+    if isinstance(numpy_result, float):
+        return bool(np.isclose(numpy_result, arrow_result, equal_nan=True))
+    return bool(numpy_result == arrow_result)
+
+
+def check_equivalence(df: pd.DataFrame) -> List[Dict]:
+    """
+    Check that the DataFrameInfo, StatisticalTests and DataTransform methods give identical results and
+    printed output under the 'numpy' and 'pyarrow' dtype backends.
+
+    Parameters:
+    - df (pd.DataFrame): The customer activity data, NumPy-backed.
+
+    Returns:
+    - List[dict]: 'check', 'same_result' and 'same_output' for every method checked.
+
+    Raises:
+    - AssertionError: If any method gives a different result or output in Arrow mode.
+
+    Example:
+    ```
+    check_equivalence(pd.read_csv('data/customer_activity.csv'))
+    ```
+    """
+    previous = get_dtype_backend()
+    rows = []
+    try:
+        for name, check in CHECKS.items():
+            numpy_result, numpy_output = _run(check, df, 'numpy')
+            arrow_result, arrow_output = _run(check, df, 'pyarrow')
+            rows.append({'check': name, 'same_result': _identical(numpy_result, arrow_result),
+                         'same_output': numpy_output == arrow_output})
+    finally:
+        set_dtype_backend(previous)
+    different = [row['check'] for row in rows if not (row['same_result'] and row['same_output'])]
+    assert not different, f"Results differ between the NumPy and Arrow modes for: {', '.join(different)}"
+    return rows
+
+
+def _best_time(function: Callable[[], object], repeats: int) -> float:
+    """
+    Return the fastest of several runs of a function, in seconds.
+    """
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return round(min(timings), 3)
+
+
+def measure_backends(file_path: str = 'data/customer_activity.csv', scale: int = 40,
+                     repeats: int = 3) -> List[Dict]:
+    """
+    Measure the memory use and the speed of common operations under the 'numpy' and 'pyarrow' dtype backends.
+
+    The data is repeated scale times, written to a temporary CSV file and read back in each mode.
+
+    Parameters:
+    - file_path (str, optional): The CSV file of the customer activity data. Default is 'data/customer_activity.csv'.
+    - scale (int, optional): Number of copies of the data, e.g. 40 for about 490,000 rows. Default is 40.
+    - repeats (int, optional): Runs per timing; the fastest is kept. Default is 3.
+
+    Returns:
+    - List[dict]: One row per backend with 'rows', 'memory_mb' and the timings in seconds.
+
+    Example:
+    ```
+    python -m scripts.arrow_benchmark --scale 40 --repeats 3
+    ```
+    """
+    previous = get_dtype_backend()
+    data = pd.concat([pd.read_csv(file_path)] * scale, ignore_index=True)
+    handle, scaled_path = tempfile.mkstemp(suffix='.csv')
+    os.close(handle)
+    rows = []
+    try:
+        data.to_csv(scaled_path, index=False)
+        for backend in ('numpy', 'pyarrow'):
+            set_dtype_backend(backend)
+            df = read_csv(scaled_path)
+            with contextlib.redirect_stdout(io.StringIO()):
+                rows.append({
+                    'backend': backend,
+                    'rows': len(df),
+                    'memory_mb': round(df.memory_usage(deep=True).sum() / 2 ** 20, 1),
+                    'read_csv_s': _best_time(lambda: read_csv(scaled_path), repeats),
+                    'null_counts_s': _best_time(lambda: DataFrameInfo(df, copy=False).generate_null_counts(), repeats),
+                    'statistics_s':
+                        _best_time(lambda: DataFrameInfo(df, copy=False).extract_statistical_values(), repeats),
+                    'distinct_s': _best_time(lambda: DataFrameInfo(df, copy=False).count_distinct_values(), repeats),
+                    'month_to_int_s':
+                        _best_time(lambda: DataTransform(df).convert_month_to_int('month'), repeats),
+                })
+    finally:
+        set_dtype_backend(previous)
+        os.remove(scaled_path)
+    return rows
+
+
+def run_benchmark(file_path: str = 'data/customer_activity.csv', scale: int = 40, repeats: int = 3) -> None:
+    """
+    Check that the Arrow mode gives the same results as the NumPy mode, then print its memory and speed.
+
+    Parameters:
+    - file_path (str, optional): The CSV file of the customer activity data. Default is 'data/customer_activity.csv'.
+    - scale (int, optional): Number of copies of the data for the measurements. Default is 40.
+    - repeats (int, optional): Runs per timing. Default is 3.
+
+    Raises:
+    - AssertionError: If any method gives a different result or output in Arrow mode.
+    """
+    equivalence = check_equivalence(pd.read_csv(file_path))
+    print(tabulate(equivalence, headers='keys', tablefmt='pretty'))
+    print(f"\nAll {len(equivalence)} checks give identical results in the NumPy and Arrow modes.\n")
+    print(tabulate(measure_backends(file_path, scale, repeats), headers='keys', tablefmt='pretty'))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare the NumPy and Arrow dtype backends.')
+    parser.add_argument('--file', default='data/customer_activity.csv', help='CSV file of the customer activity data.')
+    parser.add_argument('--scale', type=int, default=40, help='Copies of the data for the measurements.')
+    parser.add_argument('--repeats', type=int, default=3, help='Runs per timing.')
+    arguments = parser.parse_args()
+    run_benchmark(arguments.file, arguments.scale, arguments.repeats)
@@ -0,0 +1,159 @@
+from scripts.caching import dataframe_fingerprint, spec_fingerprint
+from scripts.parallel import resolve_n_jobs
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+import json
+import os
+import pandas as pd
+
+
+MANIFEST_NAME = 'render_manifest.json'
+RENDER_FORMATS = ('png', 'svg')
+
+
+def _spec_columns(spec: Dict, columns: Sequence[str]) -> Optional[List[str]]:
+    """
+    Find the DataFrame columns a plot spec refers to.
+
+    Uses spec['columns'] when given, otherwise every string argument (or string in a list argument)
+    that names a column.
+
+    Returns:
+    - List[str] or None: The columns, or None if the plot may use the whole DataFrame.
+    """
+    if 'columns' in spec:
+        return list(spec['columns'])
+    found = []
+    values = list(spec.get('args', [])) + list(spec.get('kwargs', {}).values())
+    for value in values:
+        for item in (value if isinstance(value, (list, tuple)) else [value]):
+            if isinstance(item, str) and item in columns and item not in found:
+                found.append(item)
+    return found or None
+
+
+def _render_task(task: Tuple[pd.DataFrame, Dict, str, int]) -> List[str]:
+    """
+    Render one plot spec with the Agg backend and save every figure it creates.
+
+    Runs in a worker process: the interactive pyplot state of the caller is not touched,
+    and plt.show() is a no-op.
+
+    Parameters:
+    - task (Tuple[pd.DataFrame, Dict, str, int]): The data, the spec, the output path without
+      extension and the dpi.
+
+    Returns:
+    - List[str]: The written files.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from scripts.plotter import Plotter
+
+    df, spec, stem, dpi = task
+    plt.close('all')
+    plt.figure(figsize=spec.get('figsize'))
+    getattr(Plotter(df), spec['method'])(*spec.get('args', []), **spec.get('kwargs', {}))
+    figure_numbers = [number for number in plt.get_fignums() if plt.figure(number).axes]
+    written = []
+    for position, number in enumerate(figure_numbers):
+        figure = plt.figure(number)
+        suffix = f'_{position + 1}' if len(figure_numbers) > 1 else ''
+        for fmt in spec['formats']:
+            path = f'{stem}{suffix}.{fmt}'
+            figure.savefig(path, format=fmt, dpi=dpi, bbox_inches='tight')
+            written.append(path)
+    plt.close('all')
+    return written
+
+
+def render_batch(dataframe: pd.DataFrame, specs: List[Dict], output_dir: str,
+                 formats: Sequence[str] = ('png',), dpi: int = 100, n_jobs: Optional[int] = -1,
+                 force: bool = False) -> pd.DataFrame:
+    """
+    Render a batch of Plotter plots to image files, headless and in parallel, skipping unchanged figures.
+
+    Each spec names a Plotter method and its arguments. The plots are rendered with the Agg backend
+    in a pool of worker processes, each receiving only the columns its plot uses, and every figure
+    the method creates is written as PNG and/or SVG. A manifest in output_dir records, per spec,
+    a fingerprint of the spec and of the data it uses: a spec whose fingerprints are unchanged
+    and whose files still exist is not rendered again.
+
+    Parameters:
+    - dataframe (pd.DataFrame): The data to plot.
+    - specs (List[Dict]): Plot specs with keys:
+        - 'name' (str): Stem of the output files.
+        - 'method' (str): Name of a Plotter method, e.g. 'numeric_distributions_grid'.
+        - 'args' (list, optional) and 'kwargs' (dict, optional): Arguments of the method.
+        - 'columns' (List[str], optional): Columns the plot depends on. Inferred from the arguments
+          if omitted; the whole DataFrame is used if no argument names a column.
+        - 'formats' (List[str], optional): Overrides the formats parameter.
+        - 'figsize' (Tuple[float, float], optional): Size of the initial figure.
+    - output_dir (str): Directory of the images and the manifest (created if needed).
+    - formats (Sequence[str], optional): Any of 'png' and 'svg'. Default is ('png',).
+    - dpi (int, optional): Resolution of raster images. Default is 100.
+    - n_jobs (int, optional): Number of worker processes, see parallel.resolve_n_jobs. Default is -1 (all cores).
+    - force (bool, optional): Whether to render every spec even if it is unchanged. Default is False.
+
+    Returns:
+    - pd.DataFrame: One row per spec with 'name', 'status' ('rendered' or 'cached') and 'files'.
+
+    Raises:
+    - ValueError: If a format is not supported, a spec names an unknown Plotter method, or two specs share a name.
+
+    Example:
+    ```
+    specs = [
+        {'name': 'numeric_grid', 'method': 'numeric_distributions_grid'},
+        {'name': 'months', 'method': 'discrete_probability_distribution', 'args': ['month']},
+        {'name': 'qq', 'method': 'multi_qq_plot', 'args': [['page_values', 'bounce_rates']], 'formats': ['svg']},
+    ]
+    report = render_batch(customer_activity_df, specs, 'figures')
+    ```
+    """
+    from scripts.plotter import Plotter
+
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as file:
+            manifest = json.load(file)
+    names = [spec['name'] for spec in specs]
+    if len(set(names)) != len(names):
+        raise ValueError("Plot spec names must be unique.")
+
+    statuses, tasks, pending = {}, [], []
+    for spec in specs:
+        spec = dict(spec, formats=list(spec.get('formats', formats)))
+        unsupported = set(spec['formats']) - set(RENDER_FORMATS)
+        if unsupported:
+            raise ValueError(f"Invalid format {sorted(unsupported)}. Format can only be one of: {', '.join(RENDER_FORMATS)}")
+        if not callable(getattr(Plotter, spec['method'], None)) or spec['method'].startswith('_'):
+            raise ValueError(f"Invalid method '{spec['method']}'. It must be a public Plotter method.")
+        columns = _spec_columns(spec, dataframe.columns)
+        entry = {'spec': spec_fingerprint({key: value for key, value in spec.items() if key != 'name'}),
+                 'data': dataframe_fingerprint(dataframe, columns), 'dpi': dpi}
+        previous = manifest.get(spec['name'], {})
+        unchanged = all(previous.get(key) == value for key, value in entry.items())
+        if not force and unchanged and previous.get('files') and all(os.path.exists(path) for path in previous['files']):
+            statuses[spec['name']] = ('cached', previous['files'])
+            continue
+        data = dataframe if columns is None else dataframe[columns]
+        tasks.append((data, spec, os.path.join(output_dir, spec['name']), dpi))
+        pending.append((spec['name'], entry))
+
+    results = []
+    if tasks:
+        # Always render in worker processes, even with one worker, so the caller's pyplot backend
+        # and open figures are left untouched
+        with ProcessPoolExecutor(max_workers=min(resolve_n_jobs(n_jobs), len(tasks))) as executor:
+            results = list(executor.map(_render_task, tasks))
+    for (name, entry), files in zip(pending, results):
+        manifest[name] = dict(entry, files=files)
+        statuses[name] = ('rendered', files)
+    with open(manifest_path, 'w') as file:
+        json.dump(manifest, file, indent=2)
+    print(f"{len(pending)} plot(s) rendered, {len(specs) - len(pending)} unchanged, in {output_dir}")
+    return pd.DataFrame([{'name': name, 'status': statuses[name][0], 'files': statuses[name][1]} for name in names])
@@ -0,0 +1,50 @@
+from scripts.statistical_tests import StatisticalTests
+import argparse
+import contextlib
+import io
+import numpy as np
+import pandas as pd
+
+
+def check_constant_segment(file_path: str = 'data/customer_activity.csv', statistic: str = 'median',
+                           n_resamples: int = 500, random_state: int = 0) -> pd.DataFrame:
+    """
+    Check that bootstrap_confidence_interval treats a boolean column as 0/1 in every segment.
+
+    'revenue' is set to True for every 'Other' visitor, so that segment's estimate and interval must be
+    exactly 1.0, as for the whole column restricted to that segment.
+
+    Parameters:
+    - file_path (str, optional): The CSV file of the customer activity data. Default is 'data/customer_activity.csv'.
+    - statistic (str, optional): 'mean' or 'median'. Default is 'median'.
+    - n_resamples (int, optional): Number of bootstrap resamples. Default is 500.
+    - random_state (int, optional): Seed of the resamples. Default is 0.
+
+    Returns:
+    - pd.DataFrame: The confidence intervals per visitor type.
+
+    Raises:
+    - AssertionError: If the constant segment's estimate or interval is not 1.0.
+
+    Example:
+    ```
+    python -m scripts.bootstrap_checks
+    ```
+    """
+    df = pd.read_csv(file_path)
+    df.loc[df['visitor_type'] == 'Other', 'revenue'] = True
+    with contextlib.redirect_stdout(io.StringIO()):
+        intervals = StatisticalTests(df).bootstrap_confidence_interval('revenue', 'visitor_type', statistic=statistic,
+                                                                       n_resamples=n_resamples,
+                                                                       random_state=random_state)
+    constant = intervals.loc['Other', ['estimate', 'ci_lower', 'ci_upper']].to_numpy(dtype=float)
+    assert np.all(constant == 1.0), f"The all-True segment has estimate and interval {constant}, expected 1.0"
+    return intervals
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check the bootstrap confidence intervals of boolean segments.')
+    parser.add_argument('--file', default='data/customer_activity.csv', help='CSV file of the customer activity data.')
+    arguments = parser.parse_args()
+    for statistic in ('mean', 'median'):
+        print(f"{statistic}:\n{check_constant_segment(arguments.file, statistic)}\n")
@@ -0,0 +1,49 @@
+from typing import List, Optional
+import hashlib
+import json
+import numpy as np
+import pandas as pd
+
+
+def dataframe_fingerprint(df: pd.DataFrame, columns: Optional[List[str]] = None) -> str:
+    """
+    Compute a content fingerprint of a DataFrame (or of some of its columns).
+
+    The fingerprint combines the column names, their dtypes and a row-wise hash of the values and
+    index (pd.util.hash_pandas_object), so it changes whenever the data that a result depends on changes.
+
+    Parameters:
+    - df (pd.DataFrame): The DataFrame to fingerprint.
+    - columns (List[str], optional): Columns to include. Defaults to all columns.
+
+    Returns:
+    - str: A hexadecimal SHA-1 digest.
+
+    Example:
+    ```
+    key = dataframe_fingerprint(df, ['page_values', 'bounce_rates'])
+    ```
+    """
+    subset = df if columns is None else df[list(columns)]
+    digest = hashlib.sha1()
+    digest.update(json.dumps([[str(col), str(dtype)] for col, dtype in subset.dtypes.items()]).encode())
+    digest.update(np.ascontiguousarray(pd.util.hash_pandas_object(subset, index=True).to_numpy()).tobytes())
+    return digest.hexdigest()
+
+
+def spec_fingerprint(spec) -> str:
+    """
+    Compute a fingerprint of a JSON-serialisable specification (e.g. a plot spec or stage parameters).
+
+    Parameters:
+    - spec: The specification; dictionaries are hashed independently of their key order.
+
+    Returns:
+    - str: A hexadecimal SHA-1 digest.
+
+    Example:
+    ```
+    key = spec_fingerprint({'method': 'qq_plot', 'args': [['page_values']]})
+    ```
+    """
+    return hashlib.sha1(json.dumps(spec, sort_keys=True, default=str).encode()).hexdigest()
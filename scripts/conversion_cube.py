@@ -0,0 +1,280 @@
+from itertools import combinations
+from typing import Dict, List, Optional, Tuple
+import json
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_DIMENSIONS = ['region', 'traffic_type', 'month', 'visitor_type', 'browser', 'operating_systems']
+
+
+class ConversionCube:
+    """
+    A precomputed OLAP cube of session and conversion counts for conversion-rate analysis.
+
+    The cube is built in one pass over integer-encoded dimensions: every row is mapped to a cell of
+    a dense array with np.ravel_multi_index and counted with np.bincount. The aggregates of every
+    combination of dimensions (cuboids) are then derived from the base cube, so slice, dice and
+    roll-up queries only index small precomputed arrays and never touch the raw rows.
+
+    Parameters:
+    - dataframe (pd.DataFrame): The sessions to aggregate.
+    - dimensions (List[str], optional): Categorical columns of the cube. Defaults to region, traffic_type,
+      month, visitor_type, browser and operating_systems.
+    - target (str, optional): Boolean (or 0/1) column marking a conversion. Default is 'revenue'.
+      Sessions with a missing target are left out of the cube, as in DataFrameInfo.grouped_conversion_rate.
+
+    Example:
+    ```
+    cube = ConversionCube(customer_activity_df)
+    cube.roll_up(['traffic_type'])
+    cube.dice({'region': ['North America', 'Western Europe']}, group_by=['month'])
+    cube.save('data/conversion_cube.npz')
+    cube = ConversionCube.load('data/conversion_cube.npz')
+    ```
+
+    """
+
+    def __init__(self, dataframe: pd.DataFrame, dimensions: Optional[List[str]] = None, target: str = 'revenue'):
+        """
+        Build the cube from a DataFrame.
+
+        Parameters:
+        - dataframe (pd.DataFrame): The sessions to aggregate.
+        - dimensions (List[str], optional): Categorical columns of the cube.
+        - target (str, optional): Boolean (or 0/1) column marking a conversion. Default is 'revenue'.
+
+        """
+        dimensions = [dim.lower() for dim in (dimensions or DEFAULT_DIMENSIONS)]
+        known_target = dataframe[target.lower()].notna()
+        if not known_target.all():
+            # A session with a missing target is neither a conversion nor a non-conversion
+            dataframe = dataframe[known_target]
+        codes, labels = [], []
+        for dim in dimensions:
+            dim_codes, uniques = pd.factorize(dataframe[dim], sort=True, use_na_sentinel=False)
+            codes.append(dim_codes)
+            labels.append([self._to_label(value) for value in uniques])
+        shape = tuple(len(dim_labels) for dim_labels in labels)
+        cells = int(np.prod(shape))
+        flat = np.ravel_multi_index(codes, shape) if len(dataframe) else np.empty(0, dtype=np.int64)
+        conversions = dataframe[target.lower()].to_numpy(dtype=np.float64)
+        sessions = np.bincount(flat, minlength=cells).reshape(shape)
+        converted = np.rint(np.bincount(flat, weights=conversions, minlength=cells)).astype(np.int64).reshape(shape)
+        self._initialise(dimensions, labels, target.lower(), sessions, converted)
+
+    @classmethod
+    def _from_arrays(cls, dimensions: List[str], labels: List[List], target: str,
+                     sessions: np.ndarray, conversions: np.ndarray) -> 'ConversionCube':
+        """
+        Create a cube from precomputed base arrays, without raw rows.
+        """
+        cube = cls.__new__(cls)
+        cube._initialise(dimensions, labels, target, sessions, conversions)
+        return cube
+
+    def _initialise(self, dimensions: List[str], labels: List[List], target: str,
+                    sessions: np.ndarray, conversions: np.ndarray) -> None:
+        """
+        Store the base cube and precompute the cuboid of every combination of dimensions.
+
+        Each cuboid is derived from an already computed cuboid with one more dimension, choosing
+        the smallest such parent, so the work is dominated by the first level of roll-ups.
+        """
+        self.dimensions = dimensions
+        self.labels = labels
+        self.target = target
+        self._positions = [{label: position for position, label in enumerate(dim_labels)} for dim_labels in labels]
+        all_axes = tuple(range(len(dimensions)))
+        self._cuboids: Dict[Tuple[int, ...], Tuple[np.ndarray, np.ndarray]] = {all_axes: (sessions, conversions)}
+        for size in range(len(dimensions) - 1, -1, -1):
+            for axes in combinations(all_axes, size):
+                parents = [tuple(sorted(axes + (extra,))) for extra in all_axes if extra not in axes]
+                parent = min(parents, key=lambda candidate: self._cuboids[candidate][0].size)
+                dropped = [axis for axis in parent if axis not in axes][0]
+                parent_sessions, parent_conversions = self._cuboids[parent]
+                position = parent.index(dropped)
+                self._cuboids[axes] = (parent_sessions.sum(axis=position), parent_conversions.sum(axis=position))
+
+    @staticmethod
+    def _to_label(value):
+        """
+        Convert a dimension value to a JSON-serialisable label (NaN becomes None).
+        """
+        if value is None or (isinstance(value, float) and np.isnan(value)) or value is pd.NaT:
+            return None
+        if isinstance(value, np.generic):
+            return value.item()
+        if isinstance(value, (str, int, float, bool)):
+            return value
+        return str(value)
+
+    def _axis(self, dimension: str) -> int:
+        """
+        Return the position of a dimension in the cube.
+
+        Raises:
+        - KeyError: If the dimension is not part of the cube.
+        """
+        try:
+            return self.dimensions.index(dimension.lower())
+        except ValueError:
+            raise KeyError(f"'{dimension}' is not a dimension of the cube. Dimensions: {self.dimensions}")
+
+    def _select(self, filters: Dict, group_by: List[str]) -> Tuple[List[np.ndarray], np.ndarray, np.ndarray]:
+        """
+        Aggregate the smallest cuboid covering the group-by and filter dimensions.
+
+        Parameters:
+        - filters (Dict): Dimension -> value or list of values to keep.
+        - group_by (List[str]): Dimensions kept in the result.
+
+        Returns:
+        - Tuple[List[np.ndarray], np.ndarray, np.ndarray]: The labels along each group-by dimension and
+          the session and conversion counts over them (filtered dimensions are summed out).
+        """
+        group_axes = [self._axis(dim) for dim in group_by]
+        filter_axes = {self._axis(dim): values for dim, values in filters.items()}
+        axes = tuple(sorted(set(group_axes) | set(filter_axes)))
+        sessions, conversions = self._cuboids[axes]
+        index = []
+        for axis in axes:
+            if axis in filter_axes:
+                values = filter_axes[axis]
+                values = values if isinstance(values, (list, tuple, set)) else [values]
+                index.append([self._positions[axis][self._to_label(value)] for value in values])
+            else:
+                index.append(np.arange(len(self.labels[axis])))
+        if filter_axes:
+            selector = np.ix_(*index)
+            sessions, conversions = sessions[selector], conversions[selector]
+            summed = tuple(position for position, axis in enumerate(axes) if axis not in group_axes)
+            sessions, conversions = sessions.sum(axis=summed), conversions.sum(axis=summed)
+        # Order the remaining axes as requested in group_by
+        remaining = [axis for axis in axes if axis in group_axes]
+        permutation = [remaining.index(axis) for axis in group_axes]
+        group_labels = [np.array(self.labels[axis], dtype=object)[index[axes.index(axis)]] for axis in group_axes]
+        return group_labels, np.transpose(sessions, permutation), np.transpose(conversions, permutation)
+
+    def conversion_rate(self, **filters) -> Tuple[int, int, float]:
+        """
+        Look up the session count, conversion count and conversion rate of one cell or roll-up.
+
+        Parameters:
+        - **filters: Dimension=value (or list of values); dimensions that are not given are rolled up.
+
+        Returns:
+        - Tuple[int, int, float]: Sessions, conversions and conversion rate (NaN without sessions).
+
+        Example:
+        ```
+        sessions, conversions, rate = cube.conversion_rate(region='Asia', month='Nov')
+        ```
+        """
+        _, sessions, conversions = self._select(filters, [])
+        sessions, conversions = int(sessions), int(conversions)
+        return sessions, conversions, conversions / sessions if sessions else float('nan')
+
+    def dice(self, filters: Dict, group_by: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Restrict dimensions to sets of values and aggregate the result by the group-by dimensions.
+
+        Parameters:
+        - filters (Dict): Dimension -> value or list of values to keep.
+        - group_by (List[str], optional): Dimensions kept in the result. Default is None (grand total).
+
+        Returns:
+        - pd.DataFrame: Tidy frame with the group-by dimensions, 'sessions', 'conversions' and
+          'conversion_rate', with one row per non-empty combination.
+
+        Example:
+        ```
+        cube.dice({'traffic_type': ['Facebook ads', 'Instagram ads']}, group_by=['month'])
+        ```
+        """
+        group_by = [dim.lower() for dim in (group_by or [])]
+        group_labels, sessions, conversions = self._select(filters, group_by)
+        if group_by:
+            grid = np.nonzero(sessions)
+            result = pd.DataFrame({dim: labels[grid[position]]
+                                   for position, (dim, labels) in enumerate(zip(group_by, group_labels))})
+            result['sessions'] = sessions[grid]
+            result['conversions'] = conversions[grid]
+        else:
+            result = pd.DataFrame({'sessions': [int(sessions)], 'conversions': [int(conversions)]})
+        result['conversion_rate'] = result['conversions'] / result['sessions']
+        return result
+
+    def slice(self, dimension: str, value, group_by: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Fix one dimension to a single value and aggregate by the group-by dimensions.
+
+        Parameters:
+        - dimension (str): The dimension to fix.
+        - value: The value of the dimension.
+        - group_by (List[str], optional): Dimensions kept in the result. Default is None (grand total).
+
+        Returns:
+        - pd.DataFrame: See dice.
+
+        Example:
+        ```
+        cube.slice('month', 'Nov', group_by=['traffic_type'])
+        ```
+        """
+        return self.dice({dimension: [value]}, group_by)
+
+    def roll_up(self, group_by: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Aggregate the cube to the group-by dimensions.
+
+        Parameters:
+        - group_by (List[str], optional): Dimensions kept in the result. Default is None (grand total).
+
+        Returns:
+        - pd.DataFrame: See dice.
+
+        Example:
+        ```
+        cube.roll_up(['region', 'visitor_type'])
+        ```
+        """
+        return self.dice({}, group_by)
+
+    def save(self, file_path: str) -> None:
+        """
+        Save the base cube to a compressed .npz file. Cuboids are re-derived when the cube is loaded.
+
+        Parameters:
+        - file_path (str): Path of the file to write.
+
+        Example:
+        ```
+        cube.save('data/conversion_cube.npz')
+        ```
+        """
+        sessions, conversions = self._cuboids[tuple(range(len(self.dimensions)))]
+        metadata = json.dumps({'dimensions': self.dimensions, 'labels': self.labels, 'target': self.target})
+        np.savez_compressed(file_path, sessions=sessions, conversions=conversions, metadata=np.array(metadata))
+        print(f"Cube saved to {file_path}")
+
+    @classmethod
+    def load(cls, file_path: str) -> 'ConversionCube':
+        """
+        Load a cube saved with the save method.
+
+        Parameters:
+        - file_path (str): Path of the .npz file.
+
+        Returns:
+        - ConversionCube: The loaded cube.
+
+        Example:
+        ```
+        cube = ConversionCube.load('data/conversion_cube.npz')
+        ```
+        """
+        with np.load(file_path) as archive:
+            metadata = json.loads(str(archive['metadata']))
+            return cls._from_arrays(metadata['dimensions'], metadata['labels'], metadata['target'],
+                                    archive['sessions'], archive['conversions'])
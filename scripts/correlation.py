@@ -0,0 +1,247 @@
+from collections import OrderedDict
+from scripts.caching import dataframe_fingerprint
+from scripts.parallel import parallel_map
+from scripts.sketches import QuantileSketch
+from scripts.statistical_tests import _numeric_matrix
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+import pandas as pd
+
+
+CORRELATION_METHODS = ('pearson', 'spearman')
+_CACHE_SIZE = 32
+_correlation_cache: 'OrderedDict[tuple, pd.DataFrame]' = OrderedDict()
+
+
+class CoMoments:
+    """
+    Mergeable pairwise co-moments of numeric columns, for pairwise-complete correlations.
+
+    For every pair of columns (i, j) the accumulator keeps, over the rows where both are present,
+    the row count, the means of i and j and the centred sums of squares and cross-products.
+    A chunk is summarised with a few matrix products of its value and presence matrices, and
+    summaries are combined with the pairwise update formulas of Chan et al., so chunks can be
+    processed in any order, in parallel, or as they stream in.
+
+    Parameters:
+    - columns (List[str]): The numeric columns.
+    - rank_sketches (Dict[str, QuantileSketch], optional): Per-column sketches of the full data.
+      If given, values are replaced by their sketch mid-ranks before accumulation, which yields
+      (approximate) Spearman instead of Pearson correlations.
+
+    Example:
+    ```
+    moments = CoMoments(['bounce_rates', 'exit_rates'])
+    for chunk in connector.extract_RDS_in_chunks('customer_activity'):
+        moments.update(chunk)
+    moments.correlation()
+    ```
+
+    """
+
+    def __init__(self, columns: List[str], rank_sketches: Optional[Dict[str, QuantileSketch]] = None):
+        """
+        Initialize an empty accumulator.
+
+        Parameters:
+        - columns (List[str]): The numeric columns.
+        - rank_sketches (Dict[str, QuantileSketch], optional): Sketches used to rank values (Spearman).
+
+        """
+        self.columns = list(columns)
+        self.rank_sketches = rank_sketches
+        shape = (len(self.columns), len(self.columns))
+        self.count = np.zeros(shape)
+        self.mean = np.zeros(shape)
+        self.sum_squares = np.zeros(shape)
+        self.cross_products = np.zeros(shape)
+
+    def update(self, chunk: pd.DataFrame) -> 'CoMoments':
+        """
+        Add the rows of a chunk.
+
+        Parameters:
+        - chunk (pd.DataFrame): A chunk holding the columns.
+
+        Returns:
+        - CoMoments: The accumulator itself, to allow chaining.
+        """
+        matrix = _numeric_matrix(chunk, self.columns)
+        if self.rank_sketches is not None:
+            matrix = np.column_stack([self.rank_sketches[col].rank(matrix[:, position])
+                                      for position, col in enumerate(self.columns)]) if self.columns else matrix
+        return self.merge(self._from_matrix(matrix))
+
+    def _from_matrix(self, matrix: np.ndarray) -> 'CoMoments':
+        """
+        Summarise one chunk matrix with matrix products.
+
+        Entry (i, j) of each product is a sum of column i over the rows where column j is also
+        present: present = P^T P, sums = X^T P, squares = (X^2)^T P, cross = X^T X, with missing
+        values set to 0 in X. Values are centred on the chunk's column means first, for accuracy.
+        """
+        moments = CoMoments(self.columns)
+        present = ~np.isnan(matrix)
+        if not present.any():
+            return moments
+        column_counts = present.sum(axis=0)
+        column_means = np.nansum(matrix, axis=0) / np.maximum(column_counts, 1)
+        centred = np.where(present, matrix - column_means, 0.0)
+        cross = centred.T @ centred
+        if present.all():
+            # Without missing values every pair covers all rows and the centred sums vanish
+            count = np.full(cross.shape, float(len(matrix)))
+            sums = np.zeros(cross.shape)
+            squares = np.repeat(np.diag(cross)[:, None], len(self.columns), axis=1)
+        else:
+            present = present.astype(np.float64)
+            count = present.T @ present
+            sums = centred.T @ present
+            squares = (centred ** 2).T @ present
+        with np.errstate(invalid='ignore', divide='ignore'):
+            local_mean = np.where(count > 0, sums / count, 0.0)
+        moments.count = count
+        moments.mean = local_mean + column_means[:, None]
+        moments.sum_squares = squares - local_mean * sums
+        moments.cross_products = cross - local_mean * sums.T
+        return moments
+
+    def merge(self, other: 'CoMoments') -> 'CoMoments':
+        """
+        Merge the co-moments of another accumulator over the same columns into this one.
+
+        Parameters:
+        - other (CoMoments): The accumulator to merge.
+
+        Returns:
+        - CoMoments: The accumulator itself, to allow chaining.
+        """
+        count = self.count + other.count
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weight = np.where(count > 0, self.count * other.count / count, 0.0)
+            share = np.where(count > 0, other.count / count, 0.0)
+        delta = other.mean - self.mean
+        self.cross_products = self.cross_products + other.cross_products + weight * delta * delta.T
+        self.sum_squares = self.sum_squares + other.sum_squares + weight * delta ** 2
+        self.mean = self.mean + delta * share
+        self.count = count
+        return self
+
+    def correlation(self, min_periods: int = 1) -> pd.DataFrame:
+        """
+        Return the pairwise-complete correlation matrix.
+
+        Parameters:
+        - min_periods (int, optional): Minimum number of complete rows per pair; pairs with fewer get NaN. Default is 1.
+
+        Returns:
+        - pd.DataFrame: The correlation matrix, like pd.DataFrame.corr().
+        """
+        with np.errstate(invalid='ignore', divide='ignore'):
+            correlation = self.cross_products / np.sqrt(self.sum_squares * self.sum_squares.T)
+        correlation = np.clip(correlation, -1, 1)
+        correlation[self.count < max(min_periods, 2)] = np.nan
+        return pd.DataFrame(correlation, index=self.columns, columns=self.columns)
+
+
+def _chunk_moments(task) -> CoMoments:
+    """
+    Compute the co-moments of one chunk (runs in a worker thread).
+    """
+    chunk, columns, rank_sketches = task
+    return CoMoments(columns, rank_sketches).update(chunk)
+
+
+def _chunk_sketches(task) -> Dict[str, QuantileSketch]:
+    """
+    Sketch every column of one chunk (runs in a worker thread).
+    """
+    chunk, columns, sketch_size = task
+    matrix = _numeric_matrix(chunk, columns)
+    return {col: QuantileSketch(sketch_size, random_state=0).update(matrix[:, position])
+            for position, col in enumerate(columns)}
+
+
+def correlation_matrix(df: pd.DataFrame, columns: Optional[List[str]] = None, method: str = 'pearson',
+                       chunksize: int = 250_000, n_jobs: Optional[int] = None, sketch_size: int = 2048,
+                       use_cache: bool = True) -> pd.DataFrame:
+    """
+    Compute a pairwise-complete correlation matrix chunk by chunk, caching it by data fingerprint.
+
+    The rows are split into chunks whose co-moments are computed in parallel and merged (see CoMoments).
+    Spearman correlations rank the values with a QuantileSketch per column, built in a first pass;
+    they are exact while a column has at most sketch_size values and approximate beyond. Unlike
+    pd.DataFrame.corr(method='spearman'), values are ranked within their whole column rather than within
+    each pair's complete rows, which only differs for columns with missing values.
+    Results are kept in an in-memory cache keyed by a fingerprint of the columns' contents, so
+    repeated plots of unchanged data do not recompute the matrix.
+
+    Parameters:
+    - df (pd.DataFrame): The DataFrame holding the columns.
+    - columns (List[str], optional): Numeric columns. Defaults to all numeric columns.
+    - method (str, optional): 'pearson' or 'spearman'. Default is 'pearson'.
+    - chunksize (int, optional): Rows per chunk. Default is 250,000.
+    - n_jobs (int, optional): Number of worker threads, see parallel.resolve_n_jobs. Default is None (inline).
+    - sketch_size (int, optional): Capacity k of the rank sketches (Spearman). Default is 2048.
+    - use_cache (bool, optional): Whether to read and store the cache. Default is True.
+
+    Returns:
+    - pd.DataFrame: The correlation matrix, like pd.DataFrame.corr().
+
+    Raises:
+    - ValueError: If method is not 'pearson' or 'spearman'.
+
+    Example:
+    ```
+    corr = correlation_matrix(customer_activity_df, ['bounce_rates', 'exit_rates', 'page_values'], n_jobs=-1)
+    ```
+    """
+    if method not in CORRELATION_METHODS:
+        raise ValueError(f"Invalid method. Method can only be one of: {', '.join(CORRELATION_METHODS)}")
+    if columns is None:
+        columns = list(df.select_dtypes(include=np.number).columns)
+    key = None
+    if use_cache:
+        key = (dataframe_fingerprint(df, columns), method, sketch_size if method == 'spearman' else None)
+        if key in _correlation_cache:
+            _correlation_cache.move_to_end(key)
+            return _correlation_cache[key].copy()
+    chunks = [df.iloc[start:start + chunksize] for start in range(0, len(df), chunksize)]
+    rank_sketches = None
+    if method == 'spearman':
+        rank_sketches = {col: QuantileSketch(sketch_size, random_state=0) for col in columns}
+        for chunk_sketches in parallel_map(_chunk_sketches, [(chunk, columns, sketch_size) for chunk in chunks], n_jobs):
+            for col in columns:
+                rank_sketches[col].merge(chunk_sketches[col])
+    moments = CoMoments(columns)
+    for chunk_moments in parallel_map(_chunk_moments, [(chunk, columns, rank_sketches) for chunk in chunks], n_jobs):
+        moments.merge(chunk_moments)
+    correlation = moments.correlation()
+    if key is not None:
+        _correlation_cache[key] = correlation
+        if len(_correlation_cache) > _CACHE_SIZE:
+            _correlation_cache.popitem(last=False)
+        correlation = correlation.copy()
+    return correlation
+
+
+def stream_correlation_matrix(chunks: Iterable[pd.DataFrame], columns: List[str]) -> pd.DataFrame:
+    """
+    Compute a pairwise-complete Pearson correlation matrix from chunks that are never loaded together.
+
+    Parameters:
+    - chunks (Iterable[pd.DataFrame]): Chunks holding the columns, e.g. RDSDatabaseConnector.extract_RDS_in_chunks.
+    - columns (List[str]): Numeric columns.
+
+    Returns:
+    - pd.DataFrame: The correlation matrix.
+
+    Example:
+    ```
+    corr = stream_correlation_matrix(pd.read_csv('big.csv', chunksize=100_000), ['bounce_rates', 'exit_rates'])
+    ```
+    """
+    moments = CoMoments(columns)
+    for chunk in chunks:
+        moments.update(chunk)
+    return moments.correlation()
@@ -1,8 +1,13 @@
 import os
 import pandas as pd
 import yaml
-from sqlalchemy import create_engine, text, exc
-from typing import Dict, Optional
+from scripts._lazy import lazy_import
+from scripts.dtype_backend import apply_dtype_backend
+from scripts.instrumentation import instrumented
+from scripts.memory import apply_memory_budget
+from typing import Dict, Iterator, Optional
+
+sqlalchemy = lazy_import('sqlalchemy')
 
 
 def load_credentials(file_path: str) -> Dict:
@@ -33,6 +38,7 @@ def load_credentials(file_path: str) -> Dict:
             print(f"Error in parsing YAML file: {e}")
     
  
+@instrumented
 class RDSDatabaseConnector:
     """
     A class for connecting to and interacting with a PostgreSQL database on Amazon's AWS RDS.
@@ -67,11 +73,14 @@ class RDSDatabaseConnector:
         """
         print("***************************")
         print("Attempting to connect to SQL RDS database...")
-        db_url =  f"postgresql://{self.__credentials['RDS_USER']}:{self.__credentials['RDS_PASSWORD']}@" \
-        + f"{self.__credentials['RDS_HOST']}:{self.__credentials['RDS_PORT']}/" \
-        + f"{self.__credentials['RDS_DATABASE']}"
+        if 'DATABASE_URL' in self.__credentials: # e.g. a local SQLite stand-in: 'sqlite:///data/customer_activity.db'
+            db_url = self.__credentials['DATABASE_URL']
+        else:
+            db_url =  f"postgresql://{self.__credentials['RDS_USER']}:{self.__credentials['RDS_PASSWORD']}@" \
+            + f"{self.__credentials['RDS_HOST']}:{self.__credentials['RDS_PORT']}/" \
+            + f"{self.__credentials['RDS_DATABASE']}"
         print("Engine successfully created.")
-        return create_engine(db_url)
+        return sqlalchemy.create_engine(db_url)
         
     def connect(self):
         """
@@ -106,6 +115,10 @@ class RDSDatabaseConnector:
         """
         Fetch data from the AWS RDS database and return it as a Pandas DataFrame.
 
+        The columns use the configured dtype backend (see dtype_backend.set_dtype_backend), and if a
+        memory budget is set (see memory.set_memory_budget) and the DataFrame exceeds it, its dtypes
+        are optimised before it is returned.
+
         Parameters:
         - table_name (str, optional): The name of the table to fetch data from.
         - sql_query (str, optional): A custom SQL query to fetch data.
@@ -114,7 +127,7 @@ class RDSDatabaseConnector:
         - pd.DataFrame: The fetched data as a Pandas DataFrame.
 
         Raises:
-        - exc.SQLAlchemyError: If there is an error in the database query.
+        - sqlalchemy.exc.SQLAlchemyError: If there is an error in the database query.
 
         Example:
         ```
@@ -128,13 +141,75 @@ class RDSDatabaseConnector:
 
         with self.connect() as connection:
             try:
-                result = connection.execute(text(sql_query))
+                result = connection.execute(sqlalchemy.text(sql_query))
                 data = result.fetchall()
                 columns = result.keys()
                 df = pd.DataFrame(data, columns=columns)
-                return df
-            except exc.SQLAlchemyError as e:
+                return apply_memory_budget(apply_dtype_backend(df))
+            except sqlalchemy.exc.SQLAlchemyError as e:
                 print(f"Error in executing database query: {e}")
+
+    def extract_RDS_in_chunks(self, table_name: Optional[str] = None, sql_query: Optional[str] = None,
+                              chunksize: int = 100_000) -> Iterator[pd.DataFrame]:
+        """
+        Fetch data from the AWS RDS database as a stream of Pandas DataFrame chunks.
+
+        Rows are streamed with a server-side cursor, so each chunk can be processed (e.g. screened
+        for outliers) as it lands, without holding the whole table in memory. The chunks use the
+        configured dtype backend (see dtype_backend.set_dtype_backend).
+
+        Parameters:
+        - table_name (str, optional): The name of the table to fetch data from.
+        - sql_query (str, optional): A custom SQL query to fetch data.
+        - chunksize (int, optional): The number of rows per chunk. Default is 100,000.
+
+        Yields:
+        - pd.DataFrame: The next chunk of rows.
+
+        Raises:
+        - ValueError: If neither a table_name nor an sql_query is provided.
+
+        Example:
+        ```
+        for chunk in connector.extract_RDS_in_chunks('customer_activity', chunksize=50_000):
+            print(chunk.shape)
+        ```
+        """
+        if sql_query is None and table_name is not None:
+            sql_query = f"SELECT * FROM {table_name}"
+        elif sql_query is None and table_name is None:
+            raise ValueError("Error: Please provide a table_name to extract all data from the table or provide an sql_query.")
+
+        with self.connect() as connection:
+            result = connection.execution_options(stream_results=True).execute(sqlalchemy.text(sql_query))
+            columns = list(result.keys())
+            while True:
+                rows = result.fetchmany(chunksize)
+                if not rows:
+                    break
+                yield apply_dtype_backend(pd.DataFrame(rows, columns=columns))
+
+    def pushdown_profiler(self, table_name: str):
+        """
+        Create a profiler that computes statistics of a table inside the database (pushdown mode).
+
+        Null counts, distinct counts, summary statistics, percentiles and grouped conversion rates
+        are compiled to SQL aggregates, so only the small results are transferred instead of every row.
+
+        Parameters:
+        - table_name (str): The name of the table to profile.
+
+        Returns:
+        - SQLProfiler: The profiler bound to this connector's engine.
+
+        Example:
+        ```
+        profiler = connector.pushdown_profiler('customer_activity')
+        null_info = profiler.generate_null_counts()
+        ```
+        """
+        from scripts.sql_profiler import SQLProfiler
+        return SQLProfiler(self, table_name)
         
 
 def save_df_to_csv(df: pd.DataFrame, file_name: str, destination_folder: Optional[str] = None) -> None:
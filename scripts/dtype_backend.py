@@ -0,0 +1,157 @@
+from scripts._lazy import lazy_import
+from typing import Optional
+import os
+import pandas as pd
+
+pa = lazy_import('pyarrow')
+
+
+DTYPE_BACKEND_ENV_VARIABLE = 'EDA_DTYPE_BACKEND'
+DTYPE_BACKENDS = ('numpy', 'pyarrow')
+_dtype_backend: Optional[str] = None
+
+
+def _validate_backend(backend: str) -> str:
+    """
+    Return the backend name in lower case, raising a ValueError if it is not supported.
+    """
+    backend = backend.lower()
+    if backend not in DTYPE_BACKENDS:
+        raise ValueError(f"Invalid dtype backend. Dtype backend can only be one of: {', '.join(DTYPE_BACKENDS)}")
+    return backend
+
+
+def set_dtype_backend(backend: Optional[str]) -> None:
+    """
+    Set the dtype backend of the DataFrames produced by the loaders and used by DataFrameInfo,
+    StatisticalTests and DataTransform. None restores the default ('numpy', or EDA_DTYPE_BACKEND).
+
+    With 'pyarrow', columns are backed by Arrow arrays (pd.ArrowDtype): strings such as 'month' or
+    'visitor_type' are stored in contiguous buffers instead of Python objects, and integer and boolean
+    columns keep their type when they hold missing values instead of being upcast to float or object.
+
+    Parameters:
+    - backend (str, optional): 'numpy' or 'pyarrow'.
+
+    Raises:
+    - ValueError: If the backend is not supported.
+
+    Example:
+    ```
+    set_dtype_backend('pyarrow')
+    ```
+    """
+    global _dtype_backend
+    _dtype_backend = None if backend is None else _validate_backend(backend)
+
+
+def get_dtype_backend() -> str:
+    """
+    Return the dtype backend, from set_dtype_backend or EDA_DTYPE_BACKEND, 'numpy' if unset.
+    """
+    if _dtype_backend is not None:
+        return _dtype_backend
+    setting = os.environ.get(DTYPE_BACKEND_ENV_VARIABLE, '').strip()
+    return _validate_backend(setting) if setting else 'numpy'
+
+
+def is_arrow_backed(df: pd.DataFrame) -> bool:
+    """
+    Return whether any column of the DataFrame is backed by Arrow.
+    """
+    return any(isinstance(dtype, pd.ArrowDtype) for dtype in df.dtypes)
+
+
+def to_arrow(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert the columns of a DataFrame to Arrow-backed dtypes, keeping their values.
+
+    NaN and None become Arrow nulls. Categorical columns, which are already compact, and object
+    columns holding mixed types are left as they are.
+
+    Parameters:
+    - df (pd.DataFrame): The DataFrame to convert.
+
+    Returns:
+    - pd.DataFrame: The Arrow-backed DataFrame.
+
+    Example:
+    ```
+    arrow_df = to_arrow(customer_activity_df)
+    ```
+    """
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        if not isinstance(series.dtype, (pd.ArrowDtype, pd.CategoricalDtype)):
+            try:
+                series = pd.Series(pd.arrays.ArrowExtensionArray(pa.array(series, from_pandas=True)),
+                                   index=df.index, name=col)
+            except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+                pass
+        columns[col] = series
+    return pd.DataFrame(columns, index=df.index)
+
+
+def to_numpy_backed(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert the Arrow-backed columns of a DataFrame back to NumPy dtypes.
+
+    The conversion follows pandas' defaults: integer columns with missing values become float64,
+    strings become object columns.
+
+    Parameters:
+    - df (pd.DataFrame): The DataFrame to convert.
+
+    Returns:
+    - pd.DataFrame: The NumPy-backed DataFrame.
+    """
+    columns = {col: pa.array(df[col].array).to_pandas().set_axis(df.index).rename(col)
+               if isinstance(df[col].dtype, pd.ArrowDtype) else df[col] for col in df.columns}
+    return pd.DataFrame(columns, index=df.index)
+
+
+def apply_dtype_backend(df: pd.DataFrame, backend: Optional[str] = None) -> pd.DataFrame:
+    """
+    Convert a DataFrame to the configured dtype backend (see set_dtype_backend).
+
+    Under the default 'numpy' backend the DataFrame is returned as is, so NumPy-backed code pays nothing.
+
+    Parameters:
+    - df (pd.DataFrame): The DataFrame to convert.
+    - backend (str, optional): 'numpy' or 'pyarrow'. Defaults to the configured backend.
+
+    Returns:
+    - pd.DataFrame: The DataFrame in the backend, or the same DataFrame if it already uses it.
+    """
+    backend = get_dtype_backend() if backend is None else _validate_backend(backend)
+    if df is None or backend == 'numpy':
+        return df
+    if all(isinstance(dtype, (pd.ArrowDtype, pd.CategoricalDtype)) for dtype in df.dtypes):
+        return df
+    return to_arrow(df)
+
+
+def read_csv(file_path: str, backend: Optional[str] = None, **kwargs) -> pd.DataFrame:
+    """
+    Read a CSV file into a DataFrame in the configured dtype backend.
+
+    With 'pyarrow', the file is parsed by Arrow's multithreaded CSV reader straight into Arrow-backed columns.
+
+    Parameters:
+    - file_path (str): Path of the CSV file.
+    - backend (str, optional): 'numpy' or 'pyarrow'. Defaults to the configured backend.
+    - **kwargs: Further arguments for pd.read_csv.
+
+    Returns:
+    - pd.DataFrame: The data.
+
+    Example:
+    ```
+    df = read_csv('data/customer_activity.csv', backend='pyarrow')
+    ```
+    """
+    backend = get_dtype_backend() if backend is None else _validate_backend(backend)
+    if backend == 'pyarrow':
+        return pd.read_csv(file_path, engine='pyarrow', dtype_backend='pyarrow', **kwargs)
+    return pd.read_csv(file_path, **kwargs)
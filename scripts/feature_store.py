@@ -0,0 +1,365 @@
+from scripts._lazy import lazy_import
+from scripts.caching import dataframe_fingerprint, spec_fingerprint
+from scripts.parallel import parallel_map
+from scripts.pipeline import DEFAULT_CONFIG, extract_stage
+from scripts.transformer import DataTransform
+from typing import Dict, List, Optional, Sequence
+from urllib.parse import quote
+import argparse
+import copy
+import json
+import os
+import shutil
+import time
+import numpy as np
+import pandas as pd
+import yaml
+
+stats = lazy_import('scipy.stats')
+
+
+_NULL_PARTITION = '__HIVE_DEFAULT_PARTITION__'
+
+
+def _plain(value):
+    """
+    Convert a NumPy scalar to the equivalent Python value, so that it can be stored as JSON.
+    """
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _partition_name(partition_by: str, value) -> str:
+    """
+    Directory name of a partition, Hive style (e.g. 'month=May').
+    """
+    value = _NULL_PARTITION if pd.isna(value) else quote(str(value), safe='')
+    return f'{partition_by}={value}'
+
+
+def _prepare(source: pd.DataFrame, config: Dict, categories: Optional[Dict[str, List]] = None) -> DataTransform:
+    """
+    Apply the parameter-free cleaning steps of the pipeline's clean stage: type conversions,
+    month numbers and dropping rows without key values.
+    """
+    transformer = DataTransform(source)
+    transformer.convert_columns(config['int_columns'], 'int')
+    if categories is None:
+        transformer.convert_columns(config['categorical_columns'], 'categorical')
+    else:
+        # The categories of the full data, so that every partition encodes them identically
+        for col in config['categorical_columns']:
+            transformer.df[col] = pd.Categorical(transformer.df[col], categories=categories[col])
+    transformer.convert_month_to_int(config['month_column'])
+    transformer.df = transformer.df.dropna(subset=config['drop_null_rows'])
+    return transformer
+
+
+def clean_features(source: pd.DataFrame, parameters: Dict, config: Dict) -> pd.DataFrame:
+    """
+    Clean source rows as the pipeline's clean stage does, with persisted imputation values and categories.
+
+    Parameters:
+    - source (pd.DataFrame): Raw customer activity rows, e.g. one partition.
+    - parameters (Dict): Parameters from fit_feature_parameters.
+    - config (Dict): The 'clean' section of the pipeline configuration.
+
+    Returns:
+    - pd.DataFrame: The cleaned rows.
+    """
+    transformer = _prepare(source, config, parameters['categories'])
+    transformer.df = transformer.df.fillna({col: parameters['modes'][col] for col in config['mode_impute']})
+    transformer.df = transformer.df.fillna({col: parameters['medians'][col] for col in config['median_impute']})
+    transformer.convert_columns(config['int_after_impute'], 'int')
+    return transformer.df
+
+
+def transform_features(cleaned: pd.DataFrame, parameters: Dict, config: Dict) -> pd.DataFrame:
+    """
+    Transform cleaned rows as the pipeline's transform stage does, with persisted Yeo-Johnson lambdas.
+
+    Parameters:
+    - cleaned (pd.DataFrame): Rows from clean_features.
+    - parameters (Dict): Parameters from fit_feature_parameters.
+    - config (Dict): The 'transform' section of the pipeline configuration.
+
+    Returns:
+    - pd.DataFrame: The machine-learning features.
+    """
+    transformer = DataTransform(cleaned)
+    transformer.log_transform(config['log'])
+    for col in config['yeo_johnson']:
+        values = transformer.df[col].to_numpy(dtype=np.float64)
+        # Zeros are kept as zeros, as in DataTransform.yeo_johnson_transform
+        transformed = stats.yeojohnson(values, lmbda=parameters['yeo_johnson'][col]) if len(values) else values
+        transformer.df[col] = np.where(values != 0, transformed, 0.0)
+    return transformer.df.drop(columns=config['drop'])
+
+
+def fit_feature_parameters(source: pd.DataFrame, config: Optional[Dict] = None) -> Dict:
+    """
+    Fit the data-dependent parameters of the cleaning and transformation steps on the full source data:
+    categories, imputation modes and medians, and Yeo-Johnson lambdas.
+
+    Parameters:
+    - source (pd.DataFrame): Raw customer activity data.
+    - config (Dict, optional): Pipeline configuration with 'clean' and 'transform' sections. Defaults to DEFAULT_CONFIG.
+
+    Returns:
+    - Dict: JSON-serialisable parameters.
+
+    Example:
+    ```
+    parameters = fit_feature_parameters(customer_activity_df)
+    ```
+    """
+    config = config or DEFAULT_CONFIG
+    clean_config, transform_config = config['clean'], config['transform']
+    prepared = _prepare(source, clean_config).df
+    parameters = {
+        'categories': {col: [_plain(value) for value in prepared[col].cat.categories]
+                       for col in clean_config['categorical_columns']},
+        'modes': {col: _plain(prepared[col].mode()[0]) for col in clean_config['mode_impute']},
+        'medians': {col: _plain(prepared[col].median()) for col in clean_config['median_impute']},
+    }
+    logged = DataTransform(clean_features(source, parameters, clean_config)).log_transform(transform_config['log'])
+    nonzero = {col: logged[col][logged[col] != 0].to_numpy(dtype=np.float64) for col in transform_config['yeo_johnson']}
+    parameters['yeo_johnson'] = {col: float(stats.yeojohnson(values)[1]) for col, values in nonzero.items()}
+    return parameters
+
+
+def _build_partition(task) -> pd.DataFrame:
+    """
+    Compute the features of one source partition (runs in a worker thread).
+    """
+    partition, parameters, config = task
+    return transform_features(clean_features(partition, parameters, config['clean']), parameters, config['transform'])
+
+
+class FeatureStore:
+    """
+    An incremental, partitioned export of the machine-learning features (ML_preprocessed_data).
+
+    The source rows are split into partitions by a column (by default 'month'). Each partition is
+    cleaned and transformed with persisted parameters (fitted once on the full data, see
+    fit_feature_parameters) and written as a Parquet file under <root>/<column>=<value>/. A manifest
+    records each partition's source fingerprint and the parameters it was built with, so an update
+    only rebuilds the partitions whose rows changed, and consumers can read only the partitions
+    (and columns) they need while the others are still being refreshed.
+
+    Parameters:
+    - root (str, optional): Directory of the store. Default is 'data/feature_store'.
+    - config (Dict, optional): Configuration sections overriding the pipeline's DEFAULT_CONFIG.
+    - partition_by (str, optional): Source column defining the partitions. Default is 'month'.
+    - n_jobs (int, optional): Number of partitions built at once, see parallel.resolve_n_jobs. Default is None (inline).
+
+    Example:
+    ```
+    store = FeatureStore('data/feature_store')
+    store.update()
+    training_df = store.read(['Nov', 'Dec'], columns=['page_values', 'bounce_rates', 'revenue'])
+    ```
+
+    """
+
+    def __init__(self, root: str = 'data/feature_store', config: Optional[Dict] = None,
+                 partition_by: str = 'month', n_jobs: Optional[int] = None):
+        self.root = root
+        self.config = copy.deepcopy(DEFAULT_CONFIG)
+        for section, values in (config or {}).items():
+            self.config.setdefault(section, {}).update(values)
+        self.partition_by = partition_by
+        self.n_jobs = n_jobs
+        self._manifest_path = os.path.join(root, 'manifest.json')
+        self._parameters_path = os.path.join(root, 'parameters.json')
+
+    @staticmethod
+    def _read_json(file_path: str) -> Optional[Dict]:
+        """
+        Load a JSON file, or return None if it does not exist.
+        """
+        if not os.path.exists(file_path):
+            return None
+        with open(file_path) as file:
+            return json.load(file)
+
+    @staticmethod
+    def _write_json(content: Dict, file_path: str) -> None:
+        """
+        Write a JSON file atomically, so that readers never see a partial file.
+        """
+        temporary_path = file_path + '.tmp'
+        with open(temporary_path, 'w') as file:
+            json.dump(content, file, indent=2, default=str)
+        os.replace(temporary_path, file_path)
+
+    @property
+    def parameters(self) -> Optional[Dict]:
+        """
+        The persisted cleaning and transformation parameters, or None before the first fit.
+        """
+        return self._read_json(self._parameters_path)
+
+    @property
+    def manifest(self) -> Dict:
+        """
+        The manifest: partition column, output columns and one entry per partition.
+        """
+        return self._read_json(self._manifest_path) or {'partition_by': self.partition_by, 'columns': [],
+                                                        'partitions': {}}
+
+    def fit(self, source: pd.DataFrame) -> Dict:
+        """
+        Fit the parameters on the full source data and persist them. Every partition is rebuilt at the next update.
+
+        Parameters:
+        - source (pd.DataFrame): Raw customer activity data.
+
+        Returns:
+        - Dict: The parameters.
+        """
+        parameters = fit_feature_parameters(source, self.config)
+        os.makedirs(self.root, exist_ok=True)
+        self._write_json(parameters, self._parameters_path)
+        return parameters
+
+    def update(self, source: Optional[pd.DataFrame] = None, refit: bool = False) -> pd.DataFrame:
+        """
+        Bring the store up to date with the source data, rebuilding only new or changed partitions.
+
+        A partition is rebuilt when its rows (values, dtypes or index), the parameters or the cleaning and
+        transformation configuration changed, or when its file is missing. Partitions no longer in the
+        source are deleted. The manifest is rewritten after each partition, so consumers can read the
+        partitions already written while the update is running.
+
+        Parameters:
+        - source (pd.DataFrame, optional): Raw customer activity data. Defaults to the pipeline's extract stage.
+        - refit (bool, optional): Whether to refit the parameters on the source first. Parameters are
+          always fitted when none are persisted. Default is False.
+
+        Returns:
+        - pd.DataFrame: One row per partition with its status ('written', 'unchanged' or 'deleted') and row count.
+
+        Example:
+        ```
+        FeatureStore().update(connector.extract_RDS_to_dataframe('customer_activity'))
+        ```
+        """
+        if source is None:
+            source = extract_stage({}, self.config['extract'])
+        parameters = self.parameters
+        if refit or parameters is None:
+            parameters = self.fit(source)
+        build_key = spec_fingerprint({'parameters': parameters, 'clean': self.config['clean'],
+                                      'transform': self.config['transform']})
+        manifest = self.manifest
+        if manifest['partition_by'] != self.partition_by:
+            manifest = {'partition_by': self.partition_by, 'columns': [], 'partitions': {}}
+        entries = manifest['partitions']
+        partitions = {_partition_name(self.partition_by, value): (value, rows) for value, rows
+                      in source.groupby(self.partition_by, dropna=False, sort=True, observed=True)}
+        statuses = []
+        stale = []
+        for name, (value, rows) in partitions.items():
+            fingerprint = dataframe_fingerprint(rows)
+            entry = entries.get(name)
+            if entry is not None and entry['source_fingerprint'] == fingerprint and entry['build_key'] == build_key \
+                    and os.path.exists(os.path.join(self.root, entry['file'])):
+                statuses.append({'partition': name, 'status': 'unchanged', 'rows': entry['rows']})
+            else:
+                stale.append((name, value, fingerprint, rows))
+        features = parallel_map(_build_partition, [(rows, parameters, self.config) for _, _, _, rows in stale], self.n_jobs)
+        for (name, value, fingerprint, _), partition_features in zip(stale, features):
+            relative_path = os.path.join(name, 'part.parquet')
+            file_path = os.path.join(self.root, relative_path)
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            partition_features.to_parquet(file_path + '.tmp', index=True)
+            os.replace(file_path + '.tmp', file_path)
+            entries[name] = {'value': _plain(value) if not pd.isna(value) else None, 'file': relative_path,
+                             'rows': len(partition_features), 'source_fingerprint': fingerprint,
+                             'build_key': build_key, 'updated_at': time.strftime('%Y-%m-%dT%H:%M:%S')}
+            manifest['columns'] = [str(col) for col in partition_features.columns]
+            self._write_json(manifest, self._manifest_path)
+            statuses.append({'partition': name, 'status': 'written', 'rows': len(partition_features)})
+        for name in [name for name in entries if name not in partitions]:
+            shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+            statuses.append({'partition': name, 'status': 'deleted', 'rows': entries.pop(name)['rows']})
+        os.makedirs(self.root, exist_ok=True)
+        self._write_json(manifest, self._manifest_path)
+        return pd.DataFrame(statuses, columns=['partition', 'status', 'rows']).sort_values('partition',
+                                                                                           ignore_index=True)
+
+    def partitions(self) -> pd.DataFrame:
+        """
+        List the partitions in the store.
+
+        Returns:
+        - pd.DataFrame: One row per partition with its value, file, row count and update time.
+        """
+        entries = self.manifest['partitions']
+        return pd.DataFrame([{'partition': name, **entry} for name, entry in entries.items()],
+                            columns=['partition', 'value', 'file', 'rows', 'updated_at'])
+
+    def read(self, partitions: Optional[Sequence] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Read the features of some partitions (and columns) only, in the source's row order.
+
+        Parameters:
+        - partitions (Sequence, optional): Values of the partition column to read, e.g. ['Nov', 'Dec'].
+          Defaults to all partitions.
+        - columns (List[str], optional): Columns to read. Defaults to all columns.
+
+        Returns:
+        - pd.DataFrame: The features, indexed by the source row index.
+
+        Raises:
+        - ValueError: If a partition is not in the store.
+
+        Example:
+        ```
+        features = FeatureStore().read(['Nov', 'Dec'], columns=['page_values', 'revenue'])
+        ```
+        """
+        manifest = self.manifest
+        entries = manifest['partitions']
+        names = list(entries) if partitions is None else [_partition_name(self.partition_by, value)
+                                                          for value in partitions]
+        missing = [str(value) for value, name in zip(partitions or [], names) if name not in entries]
+        if missing:
+            available = sorted(str(entry['value']) for entry in entries.values())
+            raise ValueError(f"Invalid partitions: {', '.join(missing)}. "
+                             f"Partitions can only be one of: {', '.join(available)}")
+        frames = [pd.read_parquet(os.path.join(self.root, entries[name]['file']), columns=columns) for name in names]
+        if not frames:
+            return pd.DataFrame(columns=columns if columns is not None else manifest['columns'])
+        return pd.concat(frames).sort_index()
+
+
+def main(arguments: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Command-line entry point, see python -m scripts.feature_store --help.
+    """
+    parser = argparse.ArgumentParser(description='Incrementally export the machine-learning features to a '
+                                                 'partitioned Parquet feature store.')
+    parser.add_argument('--root', default='data/feature_store', help='Directory of the feature store.')
+    parser.add_argument('--config', help='YAML file overriding the pipeline configuration, keyed by stage.')
+    parser.add_argument('--credentials', help='YAML credentials: extract from the RDS database instead of the CSV.')
+    parser.add_argument('--csv', help='CSV file to extract from.')
+    parser.add_argument('--partition-by', default='month', help='Source column defining the partitions.')
+    parser.add_argument('--refit', action='store_true', help='Refit the cleaning and transformation parameters.')
+    parser.add_argument('--n-jobs', type=int, help='Number of partitions built at once.')
+    options = parser.parse_args(arguments)
+    config = {}
+    if options.config:
+        with open(options.config) as file:
+            config = yaml.safe_load(file) or {}
+    for key, value in (('credentials', options.credentials), ('csv', options.csv)):
+        if value is not None:
+            config.setdefault('extract', {})[key] = value
+    store = FeatureStore(options.root, config, partition_by=options.partition_by, n_jobs=options.n_jobs)
+    summary = store.update(refit=options.refit)
+    print(summary.to_string(index=False))
+    return summary
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+from tabulate import tabulate
+from typing import Dict, List, Sequence
+import argparse
+import statistics
+import subprocess
+import sys
+
+
+DEFAULT_MODULES = ['scripts.info_extractor', 'scripts.transformer', 'scripts.statistical_tests',
+                   'scripts.outlier_detector', 'scripts.plotter', 'scripts.db_utils']
+HEAVY_DEPENDENCIES = ['scipy', 'matplotlib', 'seaborn', 'statsmodels', 'missingno', 'sqlalchemy']
+
+_PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+loaded = [name for name in {heavy!r} if name in sys.modules]
+print(elapsed, ','.join(loaded))
+"""
+
+
+def measure_import(module: str, repeats: int = 5) -> Dict:
+    """
+    Measure the time to import a module in fresh interpreters, and which heavy dependencies it loads.
+
+    Parameters:
+    - module (str): The module to import, e.g. 'scripts.plotter'.
+    - repeats (int, optional): Number of fresh interpreters to time. Default is 5.
+
+    Returns:
+    - dict: 'module', 'median_seconds', 'min_seconds' and 'heavy_dependencies_loaded'.
+
+    Example:
+    ```
+    measure_import('scripts.transformer')
+    ```
+    """
+    timings, loaded = [], ''
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, '-c', _PROBE.format(module=module, heavy=HEAVY_DEPENDENCIES)],
+                                capture_output=True, text=True, check=True).stdout.split()
+        timings.append(float(output[0]))
+        loaded = output[1] if len(output) > 1 else ''
+    return {'module': module, 'median_seconds': round(statistics.median(timings), 3), 'min_seconds': round(min(timings), 3),
+            'heavy_dependencies_loaded': loaded or '-'}
+
+
+def slowest_imports(module: str, top: int = 10) -> List[Dict]:
+    """
+    List the slowest imports triggered by importing a module, using python -X importtime.
+
+    Parameters:
+    - module (str): The module to import.
+    - top (int, optional): Number of imports to list. Default is 10.
+
+    Returns:
+    - List[dict]: 'imported_module', 'self_seconds' and 'cumulative_seconds', slowest cumulative time first.
+    """
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True, check=True).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append({'imported_module': name.rstrip(), 'self_seconds': round(int(self_us) / 1e6, 3),
+                     'cumulative_seconds': round(int(cumulative_us) / 1e6, 3)})
+    return sorted(rows, key=lambda row: row['cumulative_seconds'], reverse=True)[:top]
+
+
+def run_benchmark(modules: Sequence[str] = DEFAULT_MODULES, repeats: int = 5, top: int = 0) -> None:
+    """
+    Print the import time of each module and, optionally, its slowest imports.
+
+    Parameters:
+    - modules (Sequence[str], optional): Modules to benchmark. Default is the main scripts modules.
+    - repeats (int, optional): Number of fresh interpreters per module. Default is 5.
+    - top (int, optional): Number of slowest imports to list per module. Default is 0 (none).
+
+    Example:
+    ```
+    python -m scripts.import_benchmark --repeats 10 --top 5
+    ```
+    """
+    results = [measure_import(module, repeats) for module in modules]
+    print(tabulate(results, headers='keys', tablefmt='pretty'))
+    for module in modules if top else []:
+        print(f"\nSlowest imports of {module}:")
+        print(tabulate(slowest_imports(module, top), headers='keys', tablefmt='pretty'))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the import time of the scripts modules.')
+    parser.add_argument('modules', nargs='*', default=DEFAULT_MODULES, help='Modules to import.')
+    parser.add_argument('--repeats', type=int, default=5, help='Fresh interpreters per module.')
+    parser.add_argument('--top', type=int, default=0, help='Slowest imports to list per module.')
+    arguments = parser.parse_args()
+    run_benchmark(arguments.modules, arguments.repeats, arguments.top)
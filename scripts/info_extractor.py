@@ -1,9 +1,12 @@
+from scripts.instrumentation import instrumented
+from scripts.shared_frame import SharedFrame, working_frame
 from tabulate import tabulate
-from typing import Optional, List
+from typing import Dict, Optional, List, Union
 import numpy as np
 import pandas as pd
 
 
+@instrumented
 class DataFrameInfo:
     """
     Initialize the DataFrameInfo object with a DataFrame. Used internally when an instance of the call is called.
@@ -13,15 +16,20 @@ class DataFrameInfo:
 
     """
 
-    def __init__(self, dataframe: pd.DataFrame):
+    def __init__(self, dataframe: Union[pd.DataFrame, SharedFrame], copy: bool = True):
         """
         Initialize the DataFrameInfo object with a DataFrame.
 
+        Under the 'pyarrow' dtype backend (see dtype_backend.set_dtype_backend) the columns are converted to Arrow.
+        A SharedFrame is copied unless copy=False, which works on its zero-copy, read-only view of the
+        shared memory. Its string columns come back with the 'category' dtype rather than 'object'.
+
         Parameters:
-        - dataframe (pd.DataFrame): The DataFrame to analyze.
+        - dataframe (pd.DataFrame or SharedFrame): The DataFrame to analyze.
+        - copy (bool, optional): Whether to work on a copy of the DataFrame. Default is True.
 
         """
-        self.df = dataframe.copy()
+        self.df = working_frame(dataframe, copy)
 
     def get_slice(self, columns=None) -> pd.DataFrame:
         """
@@ -317,8 +325,154 @@ class DataFrameInfo:
         """
         skew_data = []
         for col in columns:
-            skew_value = self.df[col].skew()
+            # Arrow-backed columns do not support the skew reduction
+            skew_value = self.df[col].astype(np.float64).skew()
             skew_data.append([col, skew_value])
         
         print(tabulate(skew_data, headers=[
               "Column", "Skewness"], tablefmt="pretty"))
+
+    def _group_by(self, group_by, columns=None, numeric_only: bool = False):
+        """
+        Build the groupby object shared by the grouped profiling methods.
+
+        The group keys are factorised once and every statistic of the calling method is computed
+        from the same groupby object, so all segments are profiled in one vectorised pass instead
+        of slicing the DataFrame segment by segment.
+
+        Parameters:
+        - group_by (str or List[str]): Column(s) defining the segments, e.g. 'region' or ['region', 'month'].
+        - columns: Columns to profile. See docs for get_slice method > help(get_slice).
+                   The group keys are always excluded from the profiled columns.
+        - numeric_only (bool, optional): Whether to keep only numeric columns. Default is False.
+
+        Returns:
+        - Tuple[List[str], DataFrameGroupBy]: The group keys and the groupby object.
+        """
+        keys = [group_by.lower()] if isinstance(group_by, str) else [key.lower() for key in group_by]
+        subset = self.get_slice(columns)
+        subset = subset[[col for col in subset.columns if col not in keys]]
+        if numeric_only:
+            subset = subset.select_dtypes(include=np.number)
+        return keys, subset.groupby([self.df[key] for key in keys], observed=True, sort=True)
+
+    @staticmethod
+    def _tidy_grouped(frames: Dict[str, pd.DataFrame], keys: List[str]) -> pd.DataFrame:
+        """
+        Combine wide (segments x columns) frames into one tidy frame with one row per segment and column.
+
+        Parameters:
+        - frames (Dict[str, pd.DataFrame]): Wide frames keyed by the name of the statistic they hold.
+          All frames must share the same index and columns.
+        - keys (List[str]): Names of the group keys.
+
+        Returns:
+        - pd.DataFrame: Tidy frame with the group keys, a 'column' column and one column per statistic.
+        """
+        tidy = None
+        for name, frame in frames.items():
+            long = frame.reset_index().melt(id_vars=keys, var_name='column', value_name=name)
+            tidy = long if tidy is None else tidy.assign(**{name: long[name].to_numpy()})
+        return tidy
+
+    def grouped_null_counts(self, group_by, columns=None) -> pd.DataFrame:
+        """
+        Generate null counts and percentages for every segment of the DataFrame in one groupby pass.
+
+        Parameters:
+        - group_by (str or List[str]): Column(s) defining the segments.
+        - columns: Columns to include in the subset.
+        See docs for get_slice method for the requirements of the 'columns' parameter > help(get_slice)
+
+        Returns:
+        - pd.DataFrame: Tidy frame with the group keys, 'column', 'null_count' and 'null_percentage'.
+
+        Example:
+        ```
+        null_info = df_info.grouped_null_counts(['region', 'month'])
+        ```
+
+        """
+        keys, grouped = self._group_by(group_by, columns)
+        sizes = grouped.size()
+        null_counts = grouped.count().rsub(sizes, axis=0)
+        null_percentages = null_counts.div(sizes, axis=0) * 100
+        return self._tidy_grouped({'null_count': null_counts, 'null_percentage': null_percentages}, keys)
+
+    def grouped_statistical_values(self, group_by, columns=None) -> pd.DataFrame:
+        """
+        Extract the describe() statistics of numeric columns for every segment in one groupby pass.
+
+        Parameters:
+        - group_by (str or List[str]): Column(s) defining the segments.
+        - columns: Columns to include in the subset.
+        See docs for get_slice method for the requirements of the 'columns' parameter > help(get_slice)
+
+        Returns:
+        - pd.DataFrame: Tidy frame with the group keys, 'column' and the columns 
+          count, mean, std, min, 25%, 50%, 75% and max.
+
+        Example:
+        ```
+        stats = df_info.grouped_statistical_values('traffic_type', ['bounce_rates', 'page_values'])
+        ```
+
+        """
+        keys, grouped = self._group_by(group_by, columns, numeric_only=True)
+        quartiles = grouped.quantile([0.25, 0.5, 0.75])
+        frames = {
+            'count': grouped.count(),
+            'mean': grouped.mean(),
+            'std': grouped.std(),
+            'min': grouped.min(),
+            '25%': quartiles.xs(0.25, level=-1),
+            '50%': quartiles.xs(0.5, level=-1),
+            '75%': quartiles.xs(0.75, level=-1),
+            'max': grouped.max()
+        }
+        return self._tidy_grouped(frames, keys)
+
+    def grouped_skewness_values(self, group_by, columns=None) -> pd.DataFrame:
+        """
+        Calculate skewness values of numeric columns for every segment in one groupby pass.
+
+        Parameters:
+        - group_by (str or List[str]): Column(s) defining the segments.
+        - columns: Columns to include in the subset.
+        See docs for get_slice method for the requirements of the 'columns' parameter > help(get_slice)
+
+        Returns:
+        - pd.DataFrame: Tidy frame with the group keys, 'column' and 'skewness'.
+
+        Example:
+        ```
+        skew = df_info.grouped_skewness_values('visitor_type', ['product_related_duration'])
+        ```
+
+        """
+        keys, grouped = self._group_by(group_by, columns, numeric_only=True)
+        return self._tidy_grouped({'skewness': grouped.skew()}, keys)
+
+    def grouped_conversion_rate(self, group_by, target: str = 'revenue') -> pd.DataFrame:
+        """
+        Calculate the conversion rate of a boolean target column for every segment in one groupby pass.
+
+        Sessions with a missing target are left out of 'sessions' and of the rate, as in ConversionCube.
+
+        Parameters:
+        - group_by (str or List[str]): Column(s) defining the segments.
+        - target (str, optional): Boolean (or 0/1) column marking a conversion. Default is 'revenue'.
+
+        Returns:
+        - pd.DataFrame: Tidy frame with the group keys, 'sessions', 'conversions' and 'conversion_rate'.
+
+        Example:
+        ```
+        conversion = df_info.grouped_conversion_rate(['traffic_type', 'region'])
+        ```
+
+        """
+        keys, grouped = self._group_by(group_by, target)
+        conversion = grouped[target.lower()].agg(sessions='count', conversions='sum', conversion_rate='mean')
+        conversion['conversions'] = conversion['conversions'].astype(int)
+        return conversion.reset_index()
@@ -0,0 +1,332 @@
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+import atexit
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+
+PROFILE_ENV_VARIABLE = 'EDA_PROFILE'
+PROFILE_OUTPUT_ENV_VARIABLE = 'EDA_PROFILE_OUTPUT'
+
+# Classes whose public methods can be instrumented, see instrumented
+_registry: List[type] = []
+_active_profiler: Optional['Profiler'] = None
+_original_methods: Dict[tuple, object] = {}
+_lock = threading.RLock()
+
+
+class Profiler:
+    """
+    Collects one record per instrumented method call: wall time, CPU time, peak memory increase,
+    rows in and out, and number of DataFrame copies.
+
+    A Profiler is created by the profiling context manager (or by setting the EDA_PROFILE environment
+    variable) and can be exported as JSON or as a Chrome trace (open it in chrome://tracing or Perfetto).
+
+    Parameters:
+    - memory (bool, optional): Whether to trace memory allocations with tracemalloc, which slows
+      the profiled code down. Default is True.
+
+    Example:
+    ```
+    with profiling() as profiler:
+        DataTransform(df).impute_nulls_with_median(['administrative_duration'])
+    profiler.summary()
+    profiler.to_chrome_trace('eda_trace.json')
+    ```
+
+    """
+
+    def __init__(self, memory: bool = True):
+        self.memory = memory
+        self.records: List[Dict] = []
+        self.copies = 0
+        self._origin = time.perf_counter()
+        self._local = threading.local()
+
+    def _stack(self) -> List[Dict]:
+        """
+        Return the stack of open calls of the current thread.
+        """
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def _enter(self, name: str, instance) -> Dict:
+        """
+        Open a call record.
+        """
+        stack = self._stack()
+        frame = {'name': name, 'rows_in': _row_count(getattr(instance, 'df', None)), 'depth': len(stack),
+                 'copies': self.copies, 'child_peak': 0, 'memory_start': 0}
+        if self.memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                # Keep the caller's peak so far before the peak is reset for this call
+                stack[-1]['child_peak'] = max(stack[-1]['child_peak'], peak)
+            tracemalloc.reset_peak()
+            frame['memory_start'] = current
+        frame['wall_start'] = time.perf_counter()
+        frame['cpu_start'] = time.process_time()
+        stack.append(frame)
+        return frame
+
+    def _exit(self, frame: Dict, instance, result) -> None:
+        """
+        Close a call record and store it.
+        """
+        wall_end = time.perf_counter()
+        cpu_end = time.process_time()
+        stack = self._stack()
+        stack.pop()
+        peak_increase = None
+        if self.memory and tracemalloc.is_tracing():
+            peak = max(tracemalloc.get_traced_memory()[1], frame['child_peak'])
+            peak_increase = max(peak - frame['memory_start'], 0)
+            if stack:
+                stack[-1]['child_peak'] = max(stack[-1]['child_peak'], peak)
+        rows_out = _row_count(result)
+        if rows_out is None:
+            rows_out = _row_count(getattr(instance, 'df', None))
+        record = {'name': frame['name'],
+                  'start_seconds': frame['wall_start'] - self._origin,
+                  'wall_seconds': wall_end - frame['wall_start'],
+                  'cpu_seconds': cpu_end - frame['cpu_start'],
+                  'peak_memory_increase_bytes': peak_increase,
+                  'rows_in': frame['rows_in'],
+                  'rows_out': rows_out,
+                  'dataframe_copies': self.copies - frame['copies'],
+                  'depth': frame['depth'],
+                  'thread_id': threading.get_ident()}
+        with _lock:
+            self.records.append(record)
+
+    def summary(self):
+        """
+        Aggregate the records per method: number of calls and total and maximum of the measures.
+
+        Nested calls are included in their callers' measures.
+
+        Returns:
+        - pd.DataFrame: One row per method, sorted by total wall time.
+        """
+        import pandas as pd
+        columns = ['name', 'wall_seconds', 'cpu_seconds', 'peak_memory_increase_bytes', 'dataframe_copies']
+        records = pd.DataFrame(self.records, columns=columns)
+        summary = records.groupby('name').agg(calls=('wall_seconds', 'size'),
+                                              wall_seconds=('wall_seconds', 'sum'),
+                                              cpu_seconds=('cpu_seconds', 'sum'),
+                                              max_peak_memory_increase_bytes=('peak_memory_increase_bytes', 'max'),
+                                              dataframe_copies=('dataframe_copies', 'sum'))
+        return summary.sort_values('wall_seconds', ascending=False)
+
+    def to_json(self, file_path: str) -> None:
+        """
+        Write the records to a JSON file.
+
+        Parameters:
+        - file_path (str): Path of the file to write.
+        """
+        with open(file_path, 'w') as file:
+            json.dump(self.records, file, indent=2)
+
+    def to_chrome_trace(self, file_path: str) -> None:
+        """
+        Write the records as a Chrome trace (Trace Event Format), viewable in chrome://tracing or Perfetto.
+
+        Parameters:
+        - file_path (str): Path of the file to write.
+        """
+        events = [{'name': record['name'], 'cat': record['name'].split('.')[0], 'ph': 'X',
+                   'ts': record['start_seconds'] * 1e6, 'dur': record['wall_seconds'] * 1e6,
+                   'pid': os.getpid(), 'tid': record['thread_id'],
+                   'args': {key: value for key, value in record.items()
+                            if key not in ('name', 'start_seconds', 'wall_seconds', 'thread_id')}}
+                  for record in self.records]
+        with open(file_path, 'w') as file:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file)
+
+
+def _row_count(value) -> Optional[int]:
+    """
+    Number of rows of a DataFrame or Series, None for other values.
+    """
+    if type(value).__name__ in ('DataFrame', 'Series') and hasattr(value, 'shape'):
+        return int(value.shape[0])
+    return None
+
+
+def _wrap(function, name: str):
+    """
+    Wrap a method so that its calls are recorded by the active profiler.
+    """
+    @functools.wraps(function)
+    def wrapper(self, *args, **kwargs):
+        profiler = _active_profiler
+        if profiler is None:
+            return function(self, *args, **kwargs)
+        frame = profiler._enter(name, self)
+        result = None
+        try:
+            result = function(self, *args, **kwargs)
+            return result
+        finally:
+            profiler._exit(frame, self, result)
+    return wrapper
+
+
+def _instrument_class(cls: type) -> None:
+    """
+    Replace the public methods (and the constructor, which copies the DataFrame) defined by a class
+    with recording wrappers.
+    """
+    for attribute, value in list(vars(cls).items()):
+        public = not attribute.startswith('_') or attribute == '__init__'
+        if not public or not inspect.isfunction(value) or (cls, attribute) in _original_methods:
+            continue
+        _original_methods[(cls, attribute)] = value
+        setattr(cls, attribute, _wrap(value, f'{cls.__name__}.{attribute}'))
+
+
+def _count_copies(copy):
+    """
+    Wrap pd.DataFrame.copy so that the active profiler counts the copies.
+    """
+    @functools.wraps(copy)
+    def counted_copy(self, *args, **kwargs):
+        if _active_profiler is not None:
+            _active_profiler.copies += 1
+        return copy(self, *args, **kwargs)
+    return counted_copy
+
+
+def instrumented(cls: type) -> type:
+    """
+    Class decorator registering a class whose public methods are recorded while profiling is enabled.
+
+    While profiling is disabled the class is left untouched, so registration costs nothing.
+
+    Parameters:
+    - cls (type): The class to register.
+
+    Returns:
+    - type: The same class.
+
+    Example:
+    ```
+    @instrumented
+    class DataTransform:
+        ...
+    ```
+    """
+    with _lock:
+        _registry.append(cls)
+        if _active_profiler is not None:
+            _instrument_class(cls)
+    return cls
+
+
+def enable_profiling(memory: bool = True) -> Profiler:
+    """
+    Start recording the calls of the public methods of all registered classes.
+
+    Parameters:
+    - memory (bool, optional): Whether to trace memory with tracemalloc. Default is True.
+
+    Returns:
+    - Profiler: The profiler collecting the records.
+    """
+    global _active_profiler
+    import pandas as pd
+    with _lock:
+        if _active_profiler is not None:
+            return _active_profiler
+        _active_profiler = Profiler(memory)
+        for cls in _registry:
+            _instrument_class(cls)
+        _original_methods[(pd.DataFrame, 'copy')] = pd.DataFrame.copy
+        pd.DataFrame.copy = _count_copies(pd.DataFrame.copy)
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _active_profiler._started_tracemalloc = True
+        return _active_profiler
+
+
+def disable_profiling() -> Optional[Profiler]:
+    """
+    Stop recording and restore the original methods, so that instrumented classes run at full speed.
+
+    Returns:
+    - Profiler or None: The profiler that was active, with its records.
+    """
+    global _active_profiler
+    with _lock:
+        profiler = _active_profiler
+        _active_profiler = None
+        for (cls, attribute), original in _original_methods.items():
+            setattr(cls, attribute, original)
+        _original_methods.clear()
+        if profiler is not None and getattr(profiler, '_started_tracemalloc', False):
+            tracemalloc.stop()
+        return profiler
+
+
+@contextmanager
+def profiling(memory: bool = True, json_path: Optional[str] = None,
+              trace_path: Optional[str] = None) -> Iterator[Profiler]:
+    """
+    Record the calls of the public methods of RDSDatabaseConnector, DataFrameInfo, StatisticalTests,
+    OutlierDetector, Plotter, DataTransform (and any other registered class) within a block.
+
+    Parameters:
+    - memory (bool, optional): Whether to trace memory with tracemalloc. Default is True.
+    - json_path (str, optional): File to write the records to as JSON when the block ends.
+    - trace_path (str, optional): File to write the records to as a Chrome trace when the block ends.
+
+    Returns:
+    - Iterator[Profiler]: The profiler collecting the records.
+
+    Example:
+    ```
+    with profiling(trace_path='eda_trace.json') as profiler:
+        OutlierDetector(df).IQR_outliers('page_values')
+    print(profiler.summary())
+    ```
+    """
+    already_active = _active_profiler is not None
+    profiler = enable_profiling(memory)
+    try:
+        yield profiler
+    finally:
+        if not already_active:
+            disable_profiling()
+        if json_path:
+            profiler.to_json(json_path)
+        if trace_path:
+            profiler.to_chrome_trace(trace_path)
+
+
+def _profile_from_environment() -> None:
+    """
+    Enable profiling for the whole process when EDA_PROFILE is set, writing the records at exit
+    to <EDA_PROFILE_OUTPUT>.json and <EDA_PROFILE_OUTPUT>.trace.json (default prefix 'eda_profile').
+    EDA_PROFILE=nomemory profiles without tracemalloc.
+    """
+    setting = os.environ.get(PROFILE_ENV_VARIABLE, '').strip().lower()
+    if setting in ('', '0', 'false', 'no', 'off'):
+        return
+    profiler = enable_profiling(memory=setting != 'nomemory')
+    prefix = os.environ.get(PROFILE_OUTPUT_ENV_VARIABLE, 'eda_profile')
+
+    def export() -> None:
+        profiler.to_json(f'{prefix}.json')
+        profiler.to_chrome_trace(f'{prefix}.trace.json')
+    atexit.register(export)
+
+
+_profile_from_environment()
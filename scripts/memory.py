@@ -0,0 +1,193 @@
+from scripts._lazy import lazy_import
+from scripts.dtype_backend import to_numpy_backed
+from typing import Optional, Tuple, Union
+import os
+import re
+import numpy as np
+import pandas as pd
+
+pa = lazy_import('pyarrow')
+
+
+MEMORY_BUDGET_ENV_VARIABLE = 'EDA_MEMORY_BUDGET'
+_UNITS = {'': 1, 'B': 1, 'KB': 2 ** 10, 'MB': 2 ** 20, 'GB': 2 ** 30, 'TB': 2 ** 40}
+_memory_budget: Optional[int] = None
+
+
+def parse_bytes(size: Union[int, float, str]) -> int:
+    """
+    Convert a size such as 500_000_000, '500MB' or '1.5 GB' to a number of bytes (units are powers of 1024).
+
+    Parameters:
+    - size (int, float or str): The size.
+
+    Returns:
+    - int: The number of bytes.
+
+    Raises:
+    - ValueError: If the size cannot be parsed.
+    """
+    if isinstance(size, (int, float)):
+        return int(size)
+    match = re.fullmatch(r'\s*([0-9.]+)\s*([KMGT]?B?)\s*', size.upper())
+    if not match:
+        raise ValueError(f"Invalid size '{size}'. Use a number of bytes or a value such as '500MB' or '2GB'.")
+    value, unit = match.groups()
+    unit = unit if unit.endswith('B') or unit == '' else unit + 'B'
+    return int(float(value) * _UNITS[unit])
+
+
+def set_memory_budget(budget: Optional[Union[int, str]]) -> None:
+    """
+    Set the memory budget respected by the loaders and DataTransform. None disables the budget.
+
+    The budget can also be set with the EDA_MEMORY_BUDGET environment variable; set_memory_budget takes precedence.
+
+    Parameters:
+    - budget (int or str, optional): Budget per DataFrame, in bytes or as a string such as '500MB'.
+
+    Example:
+    ```
+    set_memory_budget('1GB')
+    ```
+    """
+    global _memory_budget
+    _memory_budget = None if budget is None else parse_bytes(budget)
+
+
+def get_memory_budget() -> Optional[int]:
+    """
+    Return the memory budget in bytes, from set_memory_budget or EDA_MEMORY_BUDGET, or None if unset.
+    """
+    if _memory_budget is not None:
+        return _memory_budget
+    setting = os.environ.get(MEMORY_BUDGET_ENV_VARIABLE, '').strip()
+    return parse_bytes(setting) if setting else None
+
+
+def memory_report(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Report the dtype and memory usage (including the contents of object columns) of every column.
+
+    Parameters:
+    - df (pd.DataFrame): The DataFrame to analyse.
+
+    Returns:
+    - pd.DataFrame: 'dtype', 'bytes' and 'distinct_values' per column.
+
+    Example:
+    ```
+    memory_report(customer_activity_df).sort_values('bytes', ascending=False)
+    ```
+    """
+    return pd.DataFrame({'dtype': df.dtypes.astype(str),
+                         'bytes': df.memory_usage(deep=True, index=False),
+                         'distinct_values': df.nunique()})
+
+
+def _optimized_column(series: pd.Series, categorical_threshold: float) -> pd.Series:
+    """
+    Return the column in the smallest dtype that holds exactly the same values.
+    """
+    if isinstance(series.dtype, pd.ArrowDtype):
+        # Optimise the NumPy equivalent and bring a same-kind numeric dtype back to Arrow, keeping the nulls
+        numpy_series = to_numpy_backed(series.to_frame())[series.name]
+        optimized = _optimized_column(numpy_series, categorical_threshold)
+        if isinstance(optimized.dtype, pd.CategoricalDtype):
+            return optimized
+        if optimized.dtype != numpy_series.dtype and optimized.dtype.kind == series.dtype.numpy_dtype.kind:
+            return series.astype(pd.ArrowDtype(pa.from_numpy_dtype(optimized.dtype)))
+        return series
+    if pd.api.types.is_bool_dtype(series) or isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+    if pd.api.types.is_integer_dtype(series):
+        # Signed types, so that subtracting values cannot wrap below zero as unsigned types would;
+        # small signed types still overflow silently when a product or sum leaves their range
+        return pd.to_numeric(series, downcast='integer')
+    if pd.api.types.is_float_dtype(series):
+        values = series.to_numpy()
+        finite = values[~np.isnan(values)]
+        if len(finite) and not np.isnan(values).any() and np.array_equal(finite, np.round(finite)) \
+                and np.abs(finite).max() < 2 ** 53:
+            return _optimized_column(series.astype(np.int64), categorical_threshold)
+        if series.dtype != np.float32 and np.array_equal(values.astype(np.float32).astype(values.dtype), values,
+                                                         equal_nan=True):
+            return series.astype(np.float32)
+        return series
+    if pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+        n_values = series.count()
+        if n_values and series.nunique() / n_values <= categorical_threshold:
+            return series.astype('category')
+    return series
+
+
+def optimize_dtypes(df: pd.DataFrame, categorical_threshold: float = 0.5,
+                    verbose: bool = True) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Shrink a DataFrame's memory by converting columns to smaller dtypes without changing any value.
+
+    - Integers are downcast to the smallest signed integer type holding their range. NumPy arithmetic
+      keeps that type and wraps around silently on overflow: 'informational' becomes int8, so
+      df['informational'] * 100 overflows. Cast with .astype('int64') before such arithmetic.
+    - Floats holding only whole numbers (and no missing values) become integers; other floats become
+      float32 only if every value round-trips exactly.
+    - Strings with few distinct values (at most categorical_threshold times the non-null count)
+      become categoricals, e.g. 'region' or 'visitor_type'.
+
+    Parameters:
+    - df (pd.DataFrame): The DataFrame to optimise (left unchanged).
+    - categorical_threshold (float, optional): Maximum ratio of distinct to non-null values for a string
+      column to become categorical. Default is 0.5.
+    - verbose (bool, optional): Whether to print the total bytes before and after. Default is True.
+
+    Returns:
+    - Tuple[pd.DataFrame, pd.DataFrame]: The optimised DataFrame, and a report with 'dtype_before',
+      'dtype_after', 'bytes_before' and 'bytes_after' per column.
+
+    Example:
+    ```
+    optimised_df, report = optimize_dtypes(customer_activity_df)
+    ```
+    """
+    optimized = pd.DataFrame({col: _optimized_column(df[col], categorical_threshold) for col in df.columns},
+                             index=df.index)
+    report = pd.DataFrame({'dtype_before': df.dtypes.astype(str), 'dtype_after': optimized.dtypes.astype(str),
+                           'bytes_before': df.memory_usage(deep=True, index=False),
+                           'bytes_after': optimized.memory_usage(deep=True, index=False)})
+    if verbose:
+        before, after = report['bytes_before'].sum(), report['bytes_after'].sum()
+        print(f"Memory usage reduced from {before / 2 ** 20:.2f} MB to {after / 2 ** 20:.2f} MB "
+              f"({100 * (1 - after / before) if before else 0:.1f}% less)")
+    return optimized, report
+
+
+def apply_memory_budget(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Optimise a DataFrame's dtypes if it exceeds the configured memory budget (automatic memory mode).
+
+    Without a budget the DataFrame is returned as is, without measuring it. Integer columns of an
+    optimised DataFrame may be int8 or int16, which overflow silently in arithmetic (see optimize_dtypes).
+
+    Parameters:
+    - df (pd.DataFrame): The DataFrame to check.
+
+    Returns:
+    - pd.DataFrame: The DataFrame, optimised with optimize_dtypes if it was over budget.
+
+    Example:
+    ```
+    set_memory_budget('500MB')
+    df = apply_memory_budget(df)
+    ```
+    """
+    budget = get_memory_budget()
+    if budget is None or df is None:
+        return df
+    if df.memory_usage(deep=True).sum() <= budget:
+        return df
+    df, report = optimize_dtypes(df)
+    used = df.memory_usage(deep=True).sum()
+    if used > budget:
+        print(f"Warning: the DataFrame uses {used / 2 ** 20:.2f} MB after dtype optimisation, "
+              f"over the memory budget of {budget / 2 ** 20:.2f} MB.")
+    return df
@@ -0,0 +1,140 @@
+from typing import List, Optional
+import numpy as np
+import pandas as pd
+
+
+# Number of set bits of every byte value
+_BIT_COUNTS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.int64)
+
+
+class NullityProfile:
+    """
+    Bit-packed null masks of a DataFrame's columns and the aggregates used to visualise them.
+
+    Each column's null mask is stored with np.packbits, one bit per row, so the profile of a frame
+    takes 1/8 of a boolean mask's memory. Row-bucket densities, co-nullity counts and the nullity
+    correlation are computed from the packed bytes with popcount lookups and np.add.reduceat, so
+    the plots drawn from them (a fixed number of buckets, one cell per pair of columns) cost the
+    same whatever the number of rows.
+
+    Parameters:
+    - dataframe (pd.DataFrame): The DataFrame to profile.
+    - columns (List[str], optional): Columns to profile. Defaults to all columns.
+
+    Example:
+    ```
+    profile = NullityProfile(customer_activity_df)
+    profile.null_counts
+    profile.bucket_densities(100)
+    profile.nullity_correlation()
+    ```
+
+    """
+
+    def __init__(self, dataframe: pd.DataFrame, columns: Optional[List[str]] = None):
+        """
+        Pack the null mask of every column.
+
+        Parameters:
+        - dataframe (pd.DataFrame): The DataFrame to profile.
+        - columns (List[str], optional): Columns to profile. Defaults to all columns.
+
+        """
+        self.columns = list(dataframe.columns if columns is None else columns)
+        self.n_rows = len(dataframe)
+        self.packed = np.zeros((len(self.columns), (self.n_rows + 7) // 8), dtype=np.uint8)
+        for position, column in enumerate(self.columns):
+            self.packed[position] = np.packbits(dataframe[column].isna().to_numpy())
+
+    @property
+    def null_counts(self) -> pd.Series:
+        """
+        Number of nulls per column.
+        """
+        return pd.Series(_BIT_COUNTS[self.packed].sum(axis=1), index=self.columns, name='null_count')
+
+    def bucket_densities(self, n_buckets: int = 100) -> pd.DataFrame:
+        """
+        Fraction of nulls per column in consecutive buckets of rows.
+
+        Buckets are aligned on whole bytes (multiples of 8 rows), so their null counts are sums of
+        popcounts over byte ranges, computed for all columns at once with np.add.reduceat.
+
+        Parameters:
+        - n_buckets (int, optional): Maximum number of buckets. Default is 100.
+
+        Returns:
+        - pd.DataFrame: Null fraction per bucket (rows, indexed by the bucket's first row) and column.
+
+        Example:
+        ```
+        densities = profile.bucket_densities(200)
+        ```
+        """
+        n_bytes = self.packed.shape[1]
+        if n_bytes == 0:
+            return pd.DataFrame(columns=self.columns, dtype=np.float64)
+        bucket_bytes = -(-n_bytes // n_buckets)
+        starts = np.arange(0, n_bytes, bucket_bytes)
+        null_counts = np.add.reduceat(_BIT_COUNTS[self.packed], starts, axis=1)
+        first_rows = starts * 8
+        bucket_rows = np.diff(np.append(first_rows, self.n_rows))
+        return pd.DataFrame((null_counts / bucket_rows).T, index=pd.Index(first_rows, name='first_row'),
+                            columns=self.columns)
+
+    def co_nullity(self, block_bytes: Optional[int] = None) -> pd.DataFrame:
+        """
+        Number of rows in which both columns of each pair are null.
+
+        The packed masks of every pair are ANDed and popcounted, a block of bytes at a time to bound memory.
+        The diagonal holds the null counts.
+
+        Parameters:
+        - block_bytes (int, optional): Bytes of each mask processed per block. Defaults to about 4 MB of pair masks.
+
+        Returns:
+        - pd.DataFrame: Square matrix of co-null counts.
+
+        Example:
+        ```
+        both_null = profile.co_nullity()
+        ```
+        """
+        n_columns, n_bytes = self.packed.shape
+        block_bytes = block_bytes or max(1, 2 ** 22 // max(n_columns * n_columns, 1))
+        counts = np.zeros((n_columns, n_columns), dtype=np.int64)
+        for start in range(0, n_bytes, block_bytes):
+            block = self.packed[:, start:start + block_bytes]
+            counts += _BIT_COUNTS[block[:, None, :] & block[None, :, :]].sum(axis=2)
+        return pd.DataFrame(counts, index=self.columns, columns=self.columns)
+
+    def nullity_correlation(self, drop_complete: bool = True) -> pd.DataFrame:
+        """
+        Correlation of the columns' null indicators, as shown by missingno's heatmap.
+
+        Computed from the co-null counts: for two binary indicators the Pearson correlation is
+        (N * n_ij - n_i * n_j) / sqrt(n_i (N - n_i) n_j (N - n_j)).
+
+        Parameters:
+        - drop_complete (bool, optional): Whether to leave out columns that are never or always null,
+          whose correlation is undefined. Default is True.
+
+        Returns:
+        - pd.DataFrame: Square nullity correlation matrix.
+
+        Example:
+        ```
+        profile.nullity_correlation()
+        ```
+        """
+        co_null = self.co_nullity()
+        nulls = np.diag(co_null.to_numpy()).astype(np.float64)
+        total = float(self.n_rows)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            correlation = ((total * co_null.to_numpy() - np.outer(nulls, nulls))
+                           / np.sqrt(np.outer(nulls * (total - nulls), nulls * (total - nulls))))
+        correlation = pd.DataFrame(np.clip(correlation, -1, 1), index=self.columns, columns=self.columns)
+        if drop_complete:
+            partial = [col for col, count in zip(self.columns, nulls) if 0 < count < total]
+            correlation = correlation.loc[partial, partial]
+        return correlation
@@ -0,0 +1,54 @@
+from scripts.outlier_detector import OutlierDetector
+from typing import Dict
+import argparse
+import numpy as np
+import pandas as pd
+
+
+def check_mahalanobis_calibration(n_rows: int = 20_000, n_features: int = 3, threshold_quantile: float = 0.975,
+                                  tolerance: float = 0.005, random_state: int = 0) -> Dict:
+    """
+    Check that mahalanobis_outliers flags the expected share of rows of a Gaussian sample.
+
+    Without outliers, the squared robust distances follow a chi-square distribution, so the share of
+    rows above the threshold_quantile cut-off should be close to 1 - threshold_quantile (2.5% by default).
+
+    Parameters:
+    - n_rows (int, optional): Rows of the Gaussian sample. Default is 20,000.
+    - n_features (int, optional): Number of correlated features. Default is 3.
+    - threshold_quantile (float, optional): Chi-square quantile of the cut-off. Default is 0.975.
+    - tolerance (float, optional): Allowed absolute difference from the expected share. Default is 0.005.
+    - random_state (int, optional): Seed of the sample and of the fit. Default is 0.
+
+    Returns:
+    - dict: 'expected_share' and 'flagged_share'.
+
+    Raises:
+    - AssertionError: If the flagged share differs from the expected share by more than the tolerance.
+
+    Example:
+    ```
+    python -m scripts.outlier_calibration --seeds 5
+    ```
+    """
+    rng = np.random.default_rng(random_state)
+    factor = rng.normal(size=(n_features, n_features))
+    covariance = factor @ factor.T + n_features * np.eye(n_features)
+    sample = pd.DataFrame(rng.multivariate_normal(rng.normal(size=n_features), covariance, size=n_rows),
+                          columns=[f'feature_{position}' for position in range(n_features)])
+    flagged = OutlierDetector(sample).mahalanobis_outliers(threshold_quantile=threshold_quantile,
+                                                           random_state=random_state)['outlier'].mean()
+    expected = 1 - threshold_quantile
+    assert abs(flagged - expected) <= tolerance, \
+        f"mahalanobis_outliers flagged {flagged:.2%} of a Gaussian sample, expected {expected:.2%}"
+    return {'expected_share': expected, 'flagged_share': flagged}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check the calibration of the robust Mahalanobis outliers.')
+    parser.add_argument('--seeds', type=int, default=3, help='Number of Gaussian samples to check.')
+    parser.add_argument('--features', type=int, default=3, help='Number of features.')
+    arguments = parser.parse_args()
+    for seed in range(arguments.seeds):
+        result = check_mahalanobis_calibration(n_features=arguments.features, random_state=seed)
+        print(f"seed {seed}: flagged {result['flagged_share']:.2%} (expected {result['expected_share']:.2%})")
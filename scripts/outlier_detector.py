@@ -1,18 +1,513 @@
-from scripts.statistical_tests import StatisticalTests
-from typing import List
+from scripts._lazy import lazy_import
+from scripts.instrumentation import instrumented
+from scripts.parallel import parallel_map
+from scripts.sketches import QuantileSketch
+from scripts.statistical_tests import StatisticalTests, _column_quantiles, _numeric_matrix
+from typing import Dict, List, Optional, Sequence, Tuple
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 
+stats = lazy_import('scipy.stats')
 
+
+OUTLIER_METHODS = ('zscore', 'modified_zscore', 'iqr')
+# Covariances with a larger condition number are treated as singular by the MCD fit
+_MAXIMUM_CONDITION_NUMBER = 1e12
+
+
+def _outlier_fences(matrix: np.ndarray, methods: Sequence[str], z_threshold: float = 3.0,
+                    modified_z_threshold: float = 3.5, iqr_factor: float = 1.5) -> Dict[str, np.ndarray]:
+    """
+    Compute lower and upper outlier fences of every column of a matrix for several methods.
+
+    A value is an outlier when it lies strictly outside its column's fences:
+    - 'zscore': mean -/+ z_threshold * standard deviation (|z-score| > z_threshold).
+    - 'modified_zscore': median -/+ modified_z_threshold * MAD / 0.6745 (Iglewicz and Hoaglin).
+      When the MAD is zero, 1.253314 * mean absolute deviation replaces MAD / 0.6745.
+    - 'iqr': Q1 - iqr_factor * IQR and Q3 + iqr_factor * IQR.
+
+    Parameters:
+    - matrix (np.ndarray): Matrix of shape (n_rows, n_columns), NaN for missing values.
+    - methods (Sequence[str]): Methods among 'zscore', 'modified_zscore' and 'iqr'.
+    - z_threshold (float, optional): Threshold of the z-score method. Default is 3.
+    - modified_z_threshold (float, optional): Threshold of the modified z-score method. Default is 3.5.
+    - iqr_factor (float, optional): IQR multiplier. Default is 1.5.
+
+    Returns:
+    - Dict[str, np.ndarray]: Method -> array of shape (2, n_columns) with the lower and upper fences.
+    """
+    fences = {}
+    with np.errstate(invalid='ignore'):
+        if 'zscore' in methods:
+            mean, std = np.nanmean(matrix, axis=0), np.nanstd(matrix, axis=0)
+            fences['zscore'] = np.vstack((mean - z_threshold * std, mean + z_threshold * std))
+        if 'modified_zscore' in methods or 'iqr' in methods:
+            Q1, median, Q3 = _column_quantiles(matrix, [0.25, 0.5, 0.75])
+        if 'modified_zscore' in methods:
+            deviations = np.abs(matrix - median)
+            scale = _column_quantiles(deviations, [0.5])[0] / 0.6745
+            scale = np.where(scale > 0, scale, 1.253314 * np.nanmean(deviations, axis=0))
+            fences['modified_zscore'] = np.vstack((median - modified_z_threshold * scale,
+                                                   median + modified_z_threshold * scale))
+        if 'iqr' in methods:
+            IQR = Q3 - Q1
+            fences['iqr'] = np.vstack((Q1 - iqr_factor * IQR, Q3 + iqr_factor * IQR))
+    return fences
+
+
+def _average_path_length(n: np.ndarray) -> np.ndarray:
+    """
+    Average path length of an unsuccessful search in a binary search tree of n points, c(n).
+
+    Parameters:
+    - n (np.ndarray): Number of points.
+
+    Returns:
+    - np.ndarray: c(n), with c(n) = 0 for n <= 1 and c(2) = 1.
+    """
+    n = np.asarray(n, dtype=np.float64)
+    safe = np.maximum(n, 2)
+    lengths = 2 * (np.log(safe - 1) + np.euler_gamma) - 2 * (safe - 1) / safe
+    return np.where(n > 2, lengths, np.where(n == 2, 1.0, 0.0))
+
+
+def _build_isolation_tree(sample: np.ndarray, max_depth: int, rng: np.random.Generator) -> Tuple[np.ndarray, ...]:
+    """
+    Grow one isolation tree on a subsample, stored as flat node arrays.
+
+    Leaves point to themselves with an infinite threshold, so rows can descend every tree for
+    exactly max_depth vectorised steps without tracking which rows have reached a leaf.
+
+    Parameters:
+    - sample (np.ndarray): Subsample of shape (n_samples, n_features), without NaN.
+    - max_depth (int): Height limit of the tree.
+    - rng (np.random.Generator): Random number generator.
+
+    Returns:
+    - Tuple[np.ndarray, ...]: feature, threshold, left child and right child of every node, and the
+      path length of rows ending at each node (depth + c(leaf size)).
+    """
+    feature, threshold, left, right, depths, size = [], [], [], [], [], []
+    stack = [(np.arange(len(sample)), 0, None)]
+    while stack:
+        rows, depth, parent = stack.pop()
+        node = len(feature)
+        if parent is not None:
+            parent_node, side = parent
+            (left if side == 0 else right)[parent_node] = node
+        feature.append(0)
+        threshold.append(np.inf)
+        left.append(node)
+        right.append(node)
+        depths.append(depth)
+        size.append(len(rows))
+        if depth >= max_depth or len(rows) <= 1:
+            continue
+        values = sample[rows]
+        low, high = values.min(axis=0), values.max(axis=0)
+        candidates = np.flatnonzero(high > low)
+        if len(candidates) == 0:
+            continue
+        split_feature = rng.choice(candidates)
+        split = rng.uniform(low[split_feature], high[split_feature])
+        feature[node], threshold[node] = split_feature, split
+        goes_left = values[:, split_feature] < split
+        stack.append((rows[~goes_left], depth + 1, (node, 1)))
+        stack.append((rows[goes_left], depth + 1, (node, 0)))
+    path_length = np.array(depths, dtype=np.float64) + _average_path_length(np.array(size))
+    return np.array(feature), np.array(threshold), np.array(left), np.array(right), path_length
+
+
+def _isolation_path_lengths(task: Tuple) -> np.ndarray:
+    """
+    Mean path length of a batch of rows over all trees of an isolation forest (worker function).
+
+    All rows descend each tree together, one level per vectorised step.
+
+    Parameters:
+    - task (Tuple): (trees, max_depth, batch), the node arrays of every tree, their height limit
+      and a (n_rows, n_features) batch.
+
+    Returns:
+    - np.ndarray: The mean path length of each row.
+    """
+    trees, max_depth, batch = task
+    total = np.zeros(len(batch))
+    # Column-major flat copy of the batch: value (row, feature) is at feature * n_rows + row
+    values = np.ascontiguousarray(batch.T).ravel()
+    rows = np.arange(len(batch))
+    for feature, threshold, left, right, path_length in trees:
+        node = np.zeros(len(batch), dtype=np.int64)
+        for _ in range(max_depth):
+            goes_left = values.take(feature.take(node) * len(batch) + rows) < threshold.take(node)
+            node = np.where(goes_left, left.take(node), right.take(node))
+        total += path_length.take(node)
+    return total / len(trees)
+
+
+def _mahalanobis_distances(task: Tuple) -> np.ndarray:
+    """
+    Squared Mahalanobis distances of a batch of rows (worker function).
+
+    Parameters:
+    - task (Tuple): (batch, location, precision_factor), where precision_factor is the inverse of the
+      Cholesky factor of the covariance.
+
+    Returns:
+    - np.ndarray: The squared distance of each row (NaN for rows with missing values).
+    """
+    batch, location, precision_factor = task
+    whitened = (batch - location) @ precision_factor.T
+    return np.einsum('ij,ij->i', whitened, whitened)
+
+
+def _is_singular(covariance: np.ndarray) -> bool:
+    """
+    Return whether a covariance matrix is singular, or too ill-conditioned to be inverted reliably.
+    """
+    return np.linalg.det(covariance) <= 0 or np.linalg.cond(covariance) > _MAXIMUM_CONDITION_NUMBER
+
+
+def _concentrated_support(sample: np.ndarray, h: int, n_starts: int,
+                          rng: np.random.Generator) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Run the FAST-MCD starts and C-steps with a support of h points.
+
+    Random (p + 1)-point starts, grown with random points until their covariance is regular, are refined
+    with C-steps (keep the h points closest to the current estimate, re-estimate). Starts that reach a
+    singular covariance are discarded: a zero determinant means the support lies on a hyperplane, not
+    that it is the tightest fit.
+
+    Returns:
+    - Tuple[np.ndarray, np.ndarray] or None: Location and covariance of the support with the smallest
+      determinant, or None if every start reached a singular covariance.
+    """
+    n, p = sample.shape
+
+    def distances(location, covariance):
+        centred = sample - location
+        return np.einsum('ij,ij->i', centred @ np.linalg.inv(covariance), centred)
+
+    def estimate(support):
+        return sample[support].mean(axis=0), np.atleast_2d(np.cov(sample[support], rowvar=False))
+
+    best_determinant, best = np.inf, None
+    for _ in range(n_starts):
+        order = rng.permutation(n)
+        size = p + 1
+        location, covariance = estimate(order[:size])
+        while _is_singular(covariance) and size < h:
+            size += 1
+            location, covariance = estimate(order[:size])
+        if _is_singular(covariance):
+            continue
+        determinant = np.inf
+        for _ in range(30):
+            support = np.argpartition(distances(location, covariance), h - 1)[:h]
+            new_location, new_covariance = estimate(support)
+            if _is_singular(new_covariance):
+                determinant = None
+                break
+            new_determinant = np.linalg.det(new_covariance)
+            if new_determinant >= determinant:
+                break
+            location, covariance, determinant = new_location, new_covariance, new_determinant
+        if determinant is not None and determinant < best_determinant:
+            best_determinant, best = determinant, (location, covariance)
+    return best
+
+
+def _minimum_covariance_determinant(sample: np.ndarray, support_fraction: Optional[float], n_starts: int,
+                                    rng: np.random.Generator, columns: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Robust location and covariance with the FAST-MCD algorithm (Rousseeuw and Van Driessen).
+
+    The estimate with the smallest covariance determinant over h-point supports is kept, then corrected
+    for consistency and reweighted with the 97.5% chi-square cut-off.
+
+    Zero-inflated columns (e.g. 'page_values', zero for 77% of sessions) make every half-sample
+    support share a single value, so no regular fit exists at the default support. The support is then
+    raised in steps of 5% of the rows until the fit is regular, and a warning names the columns and
+    the support used. A larger support is less robust: it tolerates fewer outliers.
+
+    Parameters:
+    - sample (np.ndarray): Complete rows of shape (n_samples, n_features).
+    - support_fraction (float, optional): Share h / n of points in the support. Default (n + p + 1) / 2n.
+    - n_starts (int): Number of random starts.
+    - rng (np.random.Generator): Random number generator.
+    - columns (List[str]): Names of the features, used in the messages.
+
+    Returns:
+    - Tuple[np.ndarray, np.ndarray]: Robust location and covariance.
+
+    Raises:
+    - ValueError: If the covariance is singular even with every row in the support, i.e. a column is
+      constant or the columns are linearly dependent.
+    """
+    n, p = sample.shape
+    h = int(np.ceil(support_fraction * n)) if support_fraction else (n + p + 1) // 2
+    h = min(max(h, p + 1), n)
+    best = _concentrated_support(sample, h, n_starts, rng)
+    fallback_h = h
+    if best is None:
+        # A support no larger than the most repeated value of a column is constant in that column
+        largest_tie = max(np.unique(values, return_counts=True)[1].max() for values in sample.T)
+        for fraction in np.arange(0.05, 1.0 + 1e-9, 0.05):
+            candidate = min(n, int(np.ceil(fraction * n)))
+            if candidate <= max(h, largest_tie) and candidate < n:
+                continue
+            fallback_h = candidate
+            best = _concentrated_support(sample, fallback_h, n_starts, rng)
+            if best is not None:
+                break
+    if best is None:
+        raise ValueError(_singular_covariance_message(sample, columns))
+    if fallback_h > h:
+        tied = _tied_columns(sample, h, columns)
+        print(f"Warning: the MCD support of {h / n:.0%} of the rows is singular"
+              + (f" because at least that share of rows has a single value in {', '.join(tied)}" if tied else "")
+              + f". The support was raised to {fallback_h / n:.0%} of the rows, which is less robust; rows with "
+              "values away from the shared values are likely to be flagged.")
+
+    def distances(location, covariance):
+        centred = sample - location
+        return np.einsum('ij,ij->i', centred @ np.linalg.inv(covariance), centred)
+
+    location, covariance = best
+    squared = distances(location, covariance)
+    covariance = covariance * np.median(squared) / stats.chi2.ppf(0.5, p)
+    inliers = distances(location, covariance) <= stats.chi2.ppf(0.975, p)
+    reweighted_location = sample[inliers].mean(axis=0)
+    reweighted_covariance = np.atleast_2d(np.cov(sample[inliers], rowvar=False))
+    if _is_singular(reweighted_covariance):
+        # The reweighting step would only keep rows on the shared values: keep the raw estimate
+        return location, covariance
+    squared = distances(reweighted_location, reweighted_covariance)
+    return reweighted_location, reweighted_covariance * np.median(squared) / stats.chi2.ppf(0.5, p)
+
+
+def _tied_columns(sample: np.ndarray, h: int, columns: List[str]) -> List[str]:
+    """
+    Return the columns in which at least h rows share a single value, e.g. the zeros of zero-inflated columns.
+    """
+    return [col for col, values in zip(columns, sample.T) if np.unique(values, return_counts=True)[1].max() >= h]
+
+
+def _singular_covariance_message(sample: np.ndarray, columns: List[str]) -> str:
+    """
+    Explain why no regular covariance exists even with every row in the support.
+    """
+    constant = _tied_columns(sample, len(sample), columns)
+    if constant:
+        return f"The covariance is singular: {', '.join(constant)} has a single value in every row. Remove it."
+    return (f"The covariance is singular: the columns {', '.join(columns)} are linearly dependent, e.g. one is "
+            "a sum or multiple of others. Remove the redundant columns.")
+
+
+class OutlierMasks:
+    """
+    Bit-packed outlier masks of several detection methods over several columns.
+
+    The masks are stored with np.packbits along the rows, using one bit per row, method and column,
+    so a frame's masks take 1/8 of the memory of boolean arrays and no rows are copied.
+
+    Parameters:
+    - packed (np.ndarray): Packed masks of shape (n_methods, n_columns, ceil(n_rows / 8)).
+    - methods (List[str]): The detection methods.
+    - columns (List[str]): The columns.
+    - n_rows (int): The number of rows.
+    - fences (pd.DataFrame): Lower and upper fences per method and column.
+
+    Example:
+    ```
+    masks = outlier_detector.outlier_masks()
+    masks.counts
+    rows = masks.rows('iqr')
+    ```
+
+    """
+
+    def __init__(self, packed: np.ndarray, methods: List[str], columns: List[str], n_rows: int, fences: pd.DataFrame):
+        self.packed = packed
+        self.methods = methods
+        self.columns = columns
+        self.n_rows = n_rows
+        self.fences = fences
+
+    @property
+    def counts(self) -> pd.DataFrame:
+        """
+        Number of outliers per column (rows) and method (columns).
+        """
+        bit_counts = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+        counts = bit_counts[self.packed].sum(axis=2)
+        return pd.DataFrame(counts.T, index=pd.Index(self.columns, name='column'), columns=self.methods)
+
+    def mask(self, method: str, columns: Optional[List[str]] = None) -> np.ndarray:
+        """
+        Unpack the outlier mask of a method, combined (any) over columns.
+
+        Parameters:
+        - method (str): The detection method.
+        - columns (List[str], optional): Columns to combine. Default is all columns.
+
+        Returns:
+        - np.ndarray: Boolean array with one entry per row, True where any selected column is an outlier.
+        """
+        positions = [self.columns.index(col) for col in (self.columns if columns is None else columns)]
+        combined = np.bitwise_or.reduce(self.packed[self.methods.index(method), positions], axis=0)
+        return np.unpackbits(combined, count=self.n_rows).astype(bool)
+
+    def rows(self, method: str, columns: Optional[List[str]] = None) -> np.ndarray:
+        """
+        Positions of the rows flagged by a method in any of the selected columns.
+
+        Parameters:
+        - method (str): The detection method.
+        - columns (List[str], optional): Columns to combine. Default is all columns.
+
+        Returns:
+        - np.ndarray: Row positions, usable with df.iloc or np.take.
+        """
+        return np.flatnonzero(self.mask(method, columns))
+
+
+class StreamingOutlierDetector:
+    """
+    Screen data for outliers chunk by chunk, without holding the full frame in memory.
+
+    Running statistics are kept per column: count, mean and variance with Welford's algorithm
+    (merged chunk-wise with Chan's parallel update), and a QuantileSketch for the quartiles, the
+    median and the MAD. Memory depends on the number of columns and the sketch size, not on the
+    number of rows. Fences match OutlierDetector.outlier_masks up to the sketch's approximation.
+
+    Parameters:
+    - columns (List[str]): Numeric columns to screen.
+    - methods (Sequence[str], optional): Methods among 'zscore', 'modified_zscore' and 'iqr'. Default is all three.
+    - z_threshold (float, optional): |z-score| above which a value is an outlier. Default is 3.
+    - modified_z_threshold (float, optional): |modified z-score| above which a value is an outlier. Default is 3.5.
+    - iqr_factor (float, optional): IQR multiplier of the fences. Default is 1.5.
+    - sketch_size (int, optional): Capacity k of each QuantileSketch. Default is 2048.
+
+    Example:
+    ```
+    detector = StreamingOutlierDetector(['product_related_duration', 'page_values'])
+    for chunk in connector.extract_RDS_in_chunks('customer_activity', chunksize=50_000):
+        masks = detector.process(chunk)
+        print(masks.counts)
+    ```
+
+    """
+
+    def __init__(self, columns: List[str], methods: Sequence[str] = OUTLIER_METHODS, z_threshold: float = 3.0,
+                 modified_z_threshold: float = 3.5, iqr_factor: float = 1.5, sketch_size: int = 2048):
+        invalid = set(methods) - set(OUTLIER_METHODS)
+        if invalid:
+            raise ValueError(f"Invalid methods {sorted(invalid)}. Methods can only be: {', '.join(OUTLIER_METHODS)}")
+        self.columns = [col.lower() for col in columns]
+        self.methods = list(methods)
+        self.z_threshold = z_threshold
+        self.modified_z_threshold = modified_z_threshold
+        self.iqr_factor = iqr_factor
+        self.count = np.zeros(len(columns))
+        self.mean = np.zeros(len(columns))
+        self._m2 = np.zeros(len(columns))
+        self.sketches = [QuantileSketch(sketch_size, random_state=position) for position in range(len(columns))]
+
+    def update(self, chunk: pd.DataFrame) -> 'StreamingOutlierDetector':
+        """
+        Add a chunk of rows to the running statistics.
+
+        Parameters:
+        - chunk (pd.DataFrame): A chunk containing the screened columns.
+
+        Returns:
+        - StreamingOutlierDetector: The detector itself, to allow chaining.
+        """
+        matrix = _numeric_matrix(chunk, self.columns)
+        valid = ~np.isnan(matrix)
+        chunk_count = valid.sum(axis=0)
+        chunk_mean = np.where(valid, matrix, 0).sum(axis=0) / np.maximum(chunk_count, 1)
+        chunk_m2 = (np.where(valid, matrix - chunk_mean, 0) ** 2).sum(axis=0)
+        total = self.count + chunk_count
+        delta = chunk_mean - self.mean
+        share = np.divide(chunk_count, total, out=np.zeros_like(total), where=total > 0)
+        self.mean = self.mean + delta * share
+        self._m2 = self._m2 + chunk_m2 + delta ** 2 * self.count * share
+        self.count = total
+        for position, sketch in enumerate(self.sketches):
+            sketch.update(matrix[:, position])
+        return self
+
+    def fences(self) -> pd.DataFrame:
+        """
+        Current lower and upper fences per method and column.
+
+        Returns:
+        - pd.DataFrame: 'lower_fence' and 'upper_fence' indexed by method and column, like OutlierMasks.fences.
+        """
+        bounds = {}
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if 'zscore' in self.methods:
+                std = np.sqrt(self._m2 / self.count)
+                bounds['zscore'] = (self.mean - self.z_threshold * std, self.mean + self.z_threshold * std)
+            quartiles = np.array([sketch.quantile([0.25, 0.5, 0.75]) for sketch in self.sketches]).T.reshape(3, -1)
+            Q1, median, Q3 = quartiles
+            if 'modified_zscore' in self.methods:
+                scale = np.array([sketch.absolute_deviation(center) / 0.6745
+                                  for sketch, center in zip(self.sketches, median)])
+                mean_deviation = np.array([1.253314 * sketch.absolute_deviation(center, 'mean')
+                                           for sketch, center in zip(self.sketches, median)])
+                scale = np.where(scale > 0, scale, mean_deviation)
+                bounds['modified_zscore'] = (median - self.modified_z_threshold * scale,
+                                             median + self.modified_z_threshold * scale)
+            if 'iqr' in self.methods:
+                IQR = Q3 - Q1
+                bounds['iqr'] = (Q1 - self.iqr_factor * IQR, Q3 + self.iqr_factor * IQR)
+        return pd.concat({method: pd.DataFrame({'lower_fence': lower, 'upper_fence': upper},
+                                               index=pd.Index(self.columns, name='column'))
+                          for method, (lower, upper) in bounds.items()}, names=['method'])
+
+    def flag(self, chunk: pd.DataFrame) -> 'OutlierMasks':
+        """
+        Flag the outliers of a chunk against the current fences, without updating the statistics.
+
+        Parameters:
+        - chunk (pd.DataFrame): A chunk containing the screened columns.
+
+        Returns:
+        - OutlierMasks: Bit-packed masks of the chunk's rows, with counts and the fences used.
+        """
+        matrix = _numeric_matrix(chunk, self.columns)
+        fences = self.fences()
+        packed = np.empty((len(self.methods), len(self.columns), (len(matrix) + 7) // 8), dtype=np.uint8)
+        for position, method in enumerate(self.methods):
+            lower = fences.loc[method, 'lower_fence'].to_numpy()
+            upper = fences.loc[method, 'upper_fence'].to_numpy()
+            packed[position] = np.packbits(((matrix < lower) | (matrix > upper)).T, axis=1)
+        return OutlierMasks(packed, self.methods, self.columns, len(matrix), fences)
+
+    def process(self, chunk: pd.DataFrame) -> 'OutlierMasks':
+        """
+        Update the running statistics with a chunk, then flag the chunk's outliers.
+
+        Parameters:
+        - chunk (pd.DataFrame): A chunk containing the screened columns.
+
+        Returns:
+        - OutlierMasks: Bit-packed masks of the chunk's rows, with counts and the fences used.
+        """
+        return self.update(chunk).flag(chunk)
+
+
+@instrumented
 class OutlierDetector(StatisticalTests):
     """
     A class for performing outlier detection operations on a DataFrame.
     Inherits from StatisticalTests for statistical tests and data analysis capabilities.
     """
-    def __init__(self, dataframe):
-        super().__init__(dataframe)
+    def __init__(self, dataframe, copy: bool = True):
+        super().__init__(dataframe, copy)
     
     def z_scores(self, column: str) -> pd.DataFrame:
         """
@@ -53,4 +548,188 @@ class OutlierDetector(StatisticalTests):
             Q1, Q3, IQR, results_str = self.IQR(col)
             outliers = self.df[(self.df[col] < (Q1 - 1.5 * IQR)) | (self.df[col] > (Q3 + 1.5 * IQR))]
             print("Outliers:")
-            print(f'shape: {outliers.shape}')
\ No newline at end of file
+            print(f'shape: {outliers.shape}')
+
+    def outlier_fences(self, columns: Optional[List[str]] = None, method: str = 'iqr',
+                       **thresholds) -> pd.DataFrame:
+        """
+        Compute the lower and upper outlier fences of several columns in one vectorised pass.
+
+        Parameters:
+        - columns (List[str], optional): Numeric columns. Defaults to all numeric features.
+        - method (str, optional): 'zscore', 'modified_zscore' or 'iqr'. Default is 'iqr'.
+        - **thresholds: z_threshold, modified_z_threshold or iqr_factor, see outlier_masks.
+
+        Returns:
+        - pd.DataFrame: One row per column with 'lower_fence' and 'upper_fence'.
+
+        Raises:
+        - ValueError: If the method is not supported.
+
+        Example:
+        ```
+        fences = outlier_detector.outlier_fences(['page_values', 'bounce_rates'], method='iqr')
+        ```
+        """
+        if method not in OUTLIER_METHODS:
+            raise ValueError(f"Invalid method. Method can only be one of: {', '.join(OUTLIER_METHODS)}")
+        if columns is None:
+            columns = list(self.extract_numeric_features().columns)
+        lower, upper = _outlier_fences(_numeric_matrix(self.df, columns), [method], **thresholds)[method]
+        return pd.DataFrame({'lower_fence': lower, 'upper_fence': upper}, index=pd.Index(columns, name='column'))
+
+    def outlier_masks(self, columns: Optional[List[str]] = None, methods: Sequence[str] = OUTLIER_METHODS,
+                      z_threshold: float = 3.0, modified_z_threshold: float = 3.5,
+                      iqr_factor: float = 1.5) -> OutlierMasks:
+        """
+        Flag outliers of all numeric columns with several methods in one vectorised pass.
+
+        The columns are read once as a float matrix; means, standard deviations, quartiles, medians
+        and MADs of every column are computed together, and every value is compared with its
+        column's fences. The masks are returned bit-packed, with per-column counts, and no rows of
+        the DataFrame are copied.
+
+        Parameters:
+        - columns (List[str], optional): Numeric columns. Defaults to all numeric features.
+        - methods (Sequence[str], optional): Methods among 'zscore', 'modified_zscore' and 'iqr'. Default is all three.
+        - z_threshold (float, optional): |z-score| above which a value is an outlier. Default is 3.
+        - modified_z_threshold (float, optional): |modified z-score| above which a value is an outlier. Default is 3.5.
+        - iqr_factor (float, optional): IQR multiplier of the fences. Default is 1.5.
+
+        Returns:
+        - OutlierMasks: The packed masks, with 'counts' and 'fences'.
+
+        Raises:
+        - ValueError: If a method is not supported.
+
+        Example:
+        ```
+        masks = outlier_detector.outlier_masks(['product_related_duration', 'page_values'])
+        print(masks.counts)
+        ```
+        """
+        methods = list(methods)
+        invalid = set(methods) - set(OUTLIER_METHODS)
+        if invalid:
+            raise ValueError(f"Invalid methods {sorted(invalid)}. Methods can only be: {', '.join(OUTLIER_METHODS)}")
+        if columns is None:
+            columns = list(self.extract_numeric_features().columns)
+        matrix = _numeric_matrix(self.df, columns)
+        fences = _outlier_fences(matrix, methods, z_threshold, modified_z_threshold, iqr_factor)
+        packed = np.empty((len(methods), len(columns), (len(matrix) + 7) // 8), dtype=np.uint8)
+        for position, method in enumerate(methods):
+            lower, upper = fences[method]
+            packed[position] = np.packbits(((matrix < lower) | (matrix > upper)).T, axis=1)
+        fences = pd.concat({method: pd.DataFrame({'lower_fence': bounds[0], 'upper_fence': bounds[1]},
+                                                 index=pd.Index(columns, name='column'))
+                            for method, bounds in fences.items()}, names=['method'])
+        return OutlierMasks(packed, methods, columns, len(matrix), fences)
+
+    def mahalanobis_outliers(self, columns: Optional[List[str]] = None, threshold_quantile: float = 0.975,
+                             support_fraction: Optional[float] = None, sample_size: int = 10_000,
+                             n_starts: int = 20, batch_size: int = 100_000, n_jobs: Optional[int] = None,
+                             random_state: Optional[int] = 0) -> pd.DataFrame:
+        """
+        Flag multivariate outliers with robust Mahalanobis distances from a Minimum Covariance Determinant fit.
+
+        Unusual combinations (e.g. a high 'product_related_duration' with a high 'exit_rates') can be
+        outliers even when each value is ordinary on its own. The robust location and covariance are
+        fitted with FAST-MCD on a random subsample of complete rows, so the fit does not depend on the
+        number of rows; the distances of all rows are then computed in batches across workers. The
+        chi-square cut-off assumes roughly elliptical data: heavily skewed columns such as the durations
+        flag many rows in their long tails (about 29% for 'product_related' and 'product_related_duration',
+        9% after np.log1p), so consider log-transforming them first.
+
+        Zero-inflated columns ('page_values', 'informational', 'bounce_rates'...) have no regular fit on
+        half of the rows, since the zeros alone fill the support. The support is then raised until the
+        fit is regular, with a printed warning, and most rows with non-zero values in those columns are
+        flagged: they are unusual relative to the zeros, which is rarely the question being asked.
+
+        Parameters:
+        - columns (List[str], optional): Numeric columns. Defaults to all numeric features.
+        - threshold_quantile (float, optional): Chi-square quantile of the squared distance above which
+          a row is an outlier. Default is 0.975.
+        - support_fraction (float, optional): Share of rows in the MCD support. Default is (n + p + 1) / 2n.
+        - sample_size (int, optional): Complete rows used to fit the MCD. Default is 10,000.
+        - n_starts (int, optional): Random starts of FAST-MCD. Default is 20.
+        - batch_size (int, optional): Rows scored per batch. Default is 100,000.
+        - n_jobs (int, optional): Number of worker threads, -1 for all cores. Default is None (no pool).
+        - random_state (int, optional): Seed of the subsample and the starts. Default is 0.
+
+        Returns:
+        - pd.DataFrame: 'mahalanobis_distance' (squared robust distance, NaN for incomplete rows) and
+          'outlier', indexed like the DataFrame.
+
+        Raises:
+        - ValueError: If the covariance is singular even with every row in the support (a constant column,
+          or linearly dependent columns).
+
+        Example:
+        ```
+        multivariate = outlier_detector.mahalanobis_outliers(['product_related', 'product_related_duration'])
+        multivariate['outlier'].sum()
+        ```
+        """
+        if columns is None:
+            columns = list(self.extract_numeric_features().columns)
+        rng = np.random.default_rng(random_state)
+        matrix = _numeric_matrix(self.df, columns)
+        complete = np.flatnonzero(~np.isnan(matrix).any(axis=1))
+        fit_rows = complete if len(complete) <= sample_size else rng.choice(complete, size=sample_size, replace=False)
+        location, covariance = _minimum_covariance_determinant(matrix[fit_rows], support_fraction, n_starts, rng,
+                                                               columns)
+        precision_factor = np.linalg.inv(np.linalg.cholesky(covariance))
+        tasks = [(matrix[start:start + batch_size], location, precision_factor)
+                 for start in range(0, len(matrix), batch_size)]
+        distances = np.concatenate(parallel_map(_mahalanobis_distances, tasks, n_jobs=n_jobs)) if tasks else np.empty(0)
+        with np.errstate(invalid='ignore'):
+            outliers = distances > stats.chi2.ppf(threshold_quantile, len(columns))
+        return pd.DataFrame({'mahalanobis_distance': distances, 'outlier': outliers}, index=self.df.index)
+
+    def isolation_forest_outliers(self, columns: Optional[List[str]] = None, n_estimators: int = 100,
+                                  max_samples: int = 256, contamination: Optional[float] = None,
+                                  batch_size: int = 100_000, n_jobs: Optional[int] = None,
+                                  random_state: Optional[int] = 0) -> pd.DataFrame:
+        """
+        Score multivariate outliers with an isolation forest implemented in NumPy.
+
+        Each tree is grown on a small random subsample (max_samples rows) with random splits, so fitting
+        does not depend on the number of rows. Anomalies are isolated in fewer splits: the score is
+        2 ** (-mean path length / c(max_samples)), close to 1 for anomalies. All rows of a batch descend
+        each tree together, and batches are scored across worker processes. Missing values are
+        replaced by the column median before scoring.
+
+        Parameters:
+        - columns (List[str], optional): Numeric columns. Defaults to all numeric features.
+        - n_estimators (int, optional): Number of trees. Default is 100.
+        - max_samples (int, optional): Rows per tree subsample. Default is 256.
+        - contamination (float, optional): Expected share of outliers; the top share of scores is flagged.
+          Default is None, which flags scores above 0.5.
+        - batch_size (int, optional): Rows scored per batch. Default is 100,000.
+        - n_jobs (int, optional): Number of worker processes, -1 for all cores. Default is None (no pool).
+        - random_state (int, optional): Seed of the subsamples and splits. Default is 0.
+
+        Returns:
+        - pd.DataFrame: 'isolation_score' and 'outlier', indexed like the DataFrame.
+
+        Example:
+        ```
+        isolation = outlier_detector.isolation_forest_outliers(contamination=0.01, n_jobs=-1)
+        ```
+        """
+        if columns is None:
+            columns = list(self.extract_numeric_features().columns)
+        rng = np.random.default_rng(random_state)
+        matrix = _numeric_matrix(self.df, columns)
+        medians = _column_quantiles(matrix, [0.5])[0]
+        matrix = np.where(np.isnan(matrix), medians, matrix)
+        samples = min(max_samples, len(matrix))
+        max_depth = int(np.ceil(np.log2(max(samples, 2))))
+        trees = [_build_isolation_tree(matrix[rng.choice(len(matrix), size=samples, replace=False)], max_depth, rng)
+                 for _ in range(n_estimators)]
+        tasks = [(trees, max_depth, matrix[start:start + batch_size]) for start in range(0, len(matrix), batch_size)]
+        path_lengths = parallel_map(_isolation_path_lengths, tasks, n_jobs=n_jobs, backend='processes')
+        path_lengths = np.concatenate(path_lengths) if path_lengths else np.empty(0)
+        scores = 2 ** (-path_lengths / _average_path_length(samples))
+        threshold = 0.5 if contamination is None else np.quantile(scores, 1 - contamination)
+        return pd.DataFrame({'isolation_score': scores, 'outlier': scores > threshold}, index=self.df.index)
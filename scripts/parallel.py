@@ -0,0 +1,63 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional
+import os
+
+
+def resolve_n_jobs(n_jobs: Optional[int] = None) -> int:
+    """
+    Resolve an n_jobs parameter to a number of workers.
+
+    Parameters:
+    - n_jobs (int, optional): Number of workers. None means 1, -1 means all cores,
+      and other negative values mean all cores but (|n_jobs| - 1).
+
+    Returns:
+    - int: The number of workers, at least 1.
+
+    Example:
+    ```
+    workers = resolve_n_jobs(-1)
+    ```
+    """
+    if n_jobs is None:
+        return 1
+    if n_jobs < 0:
+        return max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+    return max(1, n_jobs)
+
+
+def parallel_map(function: Callable, items: Iterable, n_jobs: Optional[int] = None,
+                 backend: str = 'threads') -> List:
+    """
+    Apply a function to every item, spreading the calls across a pool of workers.
+
+    The 'threads' backend suits NumPy-heavy work that releases the GIL and avoids copying data
+    to the workers. The 'processes' backend needs a picklable, module-level function.
+    With a single worker (or a single item) the calls run inline, without creating a pool.
+
+    Parameters:
+    - function (Callable): Function applied to each item.
+    - items (Iterable): Items to process.
+    - n_jobs (int, optional): Number of workers, see resolve_n_jobs. Default is None (inline).
+    - backend (str, optional): 'threads' or 'processes'. Default is 'threads'.
+
+    Returns:
+    - List: The results, in the order of the items.
+
+    Raises:
+    - ValueError: If the backend is not supported.
+
+    Example:
+    ```
+    p_values = parallel_map(test_column, columns, n_jobs=-1)
+    ```
+    """
+    if backend not in ('threads', 'processes'):
+        raise ValueError("Invalid backend. Backend can only be one of: threads, processes")
+    items = list(items)
+    n_workers = min(resolve_n_jobs(n_jobs), len(items))
+    if n_workers <= 1:
+        return [function(item) for item in items]
+    executor_class = ThreadPoolExecutor if backend == 'threads' else ProcessPoolExecutor
+    with executor_class(max_workers=n_workers) as executor:
+        return list(executor.map(function, items))
@@ -0,0 +1,329 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from scripts.caching import dataframe_fingerprint, spec_fingerprint
+from scripts.dtype_backend import get_dtype_backend, read_csv
+from scripts.memory import apply_memory_budget, get_memory_budget
+from scripts.parallel import resolve_n_jobs
+from typing import Callable, Dict, Iterable, List, Optional
+import argparse
+import copy
+import json
+import os
+import time
+import pandas as pd
+import yaml
+
+
+DEFAULT_CONFIG = {
+    'extract': {
+        'csv': 'data/customer_activity.csv',
+        'credentials': None,
+        'table': 'customer_activity',
+    },
+    'clean': {
+        'int_columns': ['weekend', 'revenue'],
+        'categorical_columns': ['browser', 'region', 'traffic_type', 'operating_systems', 'visitor_type'],
+        'month_column': 'month',
+        'drop_null_rows': ['operating_systems'],
+        'mode_impute': ['administrative', 'product_related'],
+        'median_impute': ['administrative_duration', 'informational_duration', 'product_related_duration'],
+        'int_after_impute': ['administrative', 'product_related'],
+    },
+    'transform': {
+        'log': ['bounce_rates', 'exit_rates', 'administrative_duration', 'informational_duration'],
+        'yeo_johnson': ['product_related_duration', 'page_values'],
+        'drop': ['exit_rates'],
+    },
+    'outliers': {
+        'columns': ['product_related_duration', 'informational_duration', 'administrative_duration',
+                    'page_values', 'bounce_rates'],
+        'methods': ['zscore', 'modified_zscore', 'iqr'],
+    },
+    'export': {
+        # Not 'data': the notebooks read the committed CSV files there, in a different layout
+        'output_dir': 'data/pipeline',
+        'clean_file': 'customer_web_data_clean.csv',
+        'ml_file': 'ML_preprocessed_data.csv',
+        'outliers_file': 'outlier_summary.csv',
+    },
+}
+
+
+def extract_stage(inputs: Dict[str, pd.DataFrame], config: Dict) -> pd.DataFrame:
+    """
+    Load the raw customer activity data from the RDS database (if credentials are configured) or from a CSV file.
+    The columns use the configured dtype backend (EDA_DTYPE_BACKEND), and under a memory budget
+    (EDA_MEMORY_BUDGET) the dtypes are optimised.
+    """
+    from scripts.db_utils import RDSDatabaseConnector, load_credentials
+    if config['credentials']:
+        connector = RDSDatabaseConnector(load_credentials(config['credentials']))
+        try:
+            return connector.extract_RDS_to_dataframe(config['table'])
+        finally:
+            connector.close()
+    return apply_memory_budget(read_csv(config['csv']))
+
+
+def clean_stage(inputs: Dict[str, pd.DataFrame], config: Dict) -> pd.DataFrame:
+    """
+    Convert types, drop rows without key values and impute nulls, as in the EDA notebook.
+    """
+    from scripts.transformer import DataTransform
+    transformer = DataTransform(inputs['extract'])
+    transformer.convert_columns(config['int_columns'], 'int')
+    transformer.convert_columns(config['categorical_columns'], 'categorical')
+    transformer.convert_month_to_int(config['month_column'])
+    transformer.df = transformer.df.dropna(subset=config['drop_null_rows'])
+    transformer.impute_nulls_with_mode(config['mode_impute'])
+    transformer.impute_nulls_with_median(config['median_impute'])
+    transformer.convert_columns(config['int_after_impute'], 'int')
+    return transformer.df
+
+
+def transform_stage(inputs: Dict[str, pd.DataFrame], config: Dict) -> pd.DataFrame:
+    """
+    Reduce skewness with log and Yeo-Johnson transforms and drop redundant columns, for machine learning.
+    """
+    from scripts.transformer import DataTransform
+    transformer = DataTransform(inputs['clean'])
+    transformer.log_transform(config['log'])
+    transformer.yeo_johnson_transform(config['yeo_johnson'])
+    return transformer.df.drop(columns=config['drop'])
+
+
+def outliers_stage(inputs: Dict[str, pd.DataFrame], config: Dict) -> pd.DataFrame:
+    """
+    Count the outliers of the cleaned data per column and method, with the methods' fences.
+    """
+    from scripts.outlier_detector import OutlierDetector
+    masks = OutlierDetector(inputs['clean']).outlier_masks(config['columns'], methods=config['methods'])
+    counts = masks.counts.stack().rename('outlier_count')
+    counts.index = counts.index.swaplevel()
+    fences = masks.fences.copy()
+    fences['outlier_count'] = counts.reindex(fences.index)
+    return fences.reset_index()
+
+
+def export_stage(inputs: Dict[str, pd.DataFrame], config: Dict) -> pd.DataFrame:
+    """
+    Write the cleaned data, the machine-learning data and the outlier summary to CSV files.
+    """
+    from scripts.db_utils import save_df_to_csv
+    files = {'clean': config['clean_file'], 'transform': config['ml_file'], 'outliers': config['outliers_file']}
+    for stage, file_name in files.items():
+        save_df_to_csv(inputs[stage], file_name, config['output_dir'])
+    return pd.DataFrame({'stage': list(files), 'file': [os.path.join(config['output_dir'], name)
+                                                        for name in files.values()]})
+
+
+class Stage:
+    """
+    A step of the pipeline: a function of its dependencies' outputs and of its configuration.
+
+    Parameters:
+    - name (str): Name of the stage, which is also its configuration section.
+    - function (Callable): Function (inputs, config) -> pd.DataFrame, inputs being keyed by dependency name.
+    - dependencies (List[str], optional): Names of the stages whose outputs are inputs.
+
+    """
+
+    def __init__(self, name: str, function: Callable, dependencies: Optional[List[str]] = None):
+        self.name = name
+        self.function = function
+        self.dependencies = dependencies or []
+
+
+DEFAULT_STAGES = [
+    Stage('extract', extract_stage),
+    Stage('clean', clean_stage, ['extract']),
+    Stage('transform', transform_stage, ['clean']),
+    Stage('outliers', outliers_stage, ['clean']),
+    Stage('export', export_stage, ['clean', 'transform', 'outliers']),
+]
+
+
+class Pipeline:
+    """
+    A DAG of EDA stages (extract -> clean -> transform / outliers -> export) with an on-disk stage cache.
+
+    Each stage's output is cached on disk under a key combining the stage's configuration and the
+    fingerprints of its inputs' contents, so a stage is only run when its inputs or configuration
+    changed: if a daily extract returns the same rows, every later stage is skipped. Extracting from
+    a CSV file is skipped while the file is unchanged; extracting from the database always runs.
+    Stages whose dependencies are complete run concurrently in a thread pool (e.g. transform and outliers).
+
+    Parameters:
+    - config (Dict, optional): Configuration sections overriding DEFAULT_CONFIG, keyed by stage name.
+    - cache_dir (str, optional): Directory of the stage cache. Default is '.pipeline_cache'.
+    - n_jobs (int, optional): Number of stages run at once, see parallel.resolve_n_jobs. Default is -1 (all cores).
+    - stages (List[Stage], optional): The stages. Defaults to DEFAULT_STAGES.
+
+    Example:
+    ```
+    report = Pipeline({'extract': {'credentials': 'credentials.yaml'}}).run()
+    ```
+
+    """
+
+    def __init__(self, config: Optional[Dict] = None, cache_dir: str = '.pipeline_cache',
+                 n_jobs: Optional[int] = -1, stages: Optional[List[Stage]] = None):
+        self.config = copy.deepcopy(DEFAULT_CONFIG)
+        for section, values in (config or {}).items():
+            self.config.setdefault(section, {}).update(values)
+        self.cache_dir = cache_dir
+        self.n_jobs = n_jobs
+        self.stages = {stage.name: stage for stage in (stages or DEFAULT_STAGES)}
+        self._manifest_path = os.path.join(cache_dir, 'manifest.json')
+
+    def _required(self, targets: Iterable[str]) -> List[str]:
+        """
+        Return the target stages and their transitive dependencies, in topological order.
+
+        Raises:
+        - ValueError: If a stage is unknown or the dependencies contain a cycle.
+        """
+        order, visiting = [], set()
+
+        def visit(name: str) -> None:
+            if name not in self.stages:
+                raise ValueError(f"Invalid stage '{name}'. Stages can only be: {', '.join(self.stages)}")
+            if name in order:
+                return
+            if name in visiting:
+                raise ValueError(f"The pipeline has a dependency cycle through '{name}'.")
+            visiting.add(name)
+            for dependency in self.stages[name].dependencies:
+                visit(dependency)
+            order.append(name)
+        for target in targets:
+            visit(target)
+        return order
+
+    def _stage_key(self, name: str, input_fingerprints: Dict[str, str]) -> Optional[str]:
+        """
+        Cache key of a stage run, or None if the stage must always run (database extract).
+        """
+        config = self.config.get(name, {})
+        source = None
+        if name == 'extract':
+            if config.get('credentials'):
+                return None
+            status = os.stat(config['csv'])
+            source = {'size': status.st_size, 'mtime_ns': status.st_mtime_ns,
+                      'dtype_backend': get_dtype_backend(), 'memory_budget': get_memory_budget()}
+        return spec_fingerprint({'stage': name, 'config': config, 'inputs': input_fingerprints, 'source': source})
+
+    def _outputs_exist(self, name: str) -> bool:
+        """
+        Whether the files written by a stage outside the cache still exist (only export writes any).
+        """
+        if name != 'export':
+            return True
+        config = self.config['export']
+        names = (config['clean_file'], config['ml_file'], config['outliers_file'])
+        return all(os.path.exists(os.path.join(config['output_dir'], file_name)) for file_name in names)
+
+    def run(self, targets: Optional[List[str]] = None, force: Iterable[str] = ()) -> pd.DataFrame:
+        """
+        Run the stages needed for the targets, skipping up-to-date stages.
+
+        Parameters:
+        - targets (List[str], optional): Stages to bring up to date. Default is all stages.
+        - force (Iterable[str], optional): Stages to run even if their cache is up to date.
+
+        Returns:
+        - pd.DataFrame: One row per stage with 'stage', 'status' ('ran' or 'cached'), 'rows' and 'seconds'.
+
+        Example:
+        ```
+        Pipeline().run(['transform'], force=['clean'])
+        ```
+        """
+        order = self._required(targets or list(self.stages))
+        force = set(force)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        manifest = {}
+        if os.path.exists(self._manifest_path):
+            with open(self._manifest_path) as file:
+                manifest = json.load(file)
+        outputs: Dict[str, pd.DataFrame] = {}
+        fingerprints: Dict[str, str] = {}
+        report: Dict[str, Dict] = {}
+
+        def load(name: str) -> pd.DataFrame:
+            if name not in outputs:
+                outputs[name] = pd.read_pickle(manifest[name]['file'])
+            return outputs[name]
+
+        def execute(name: str) -> Dict:
+            stage = self.stages[name]
+            start = time.perf_counter()
+            key = self._stage_key(name, {dependency: fingerprints[dependency] for dependency in stage.dependencies})
+            entry = manifest.get(name, {})
+            up_to_date = key is not None and entry.get('key') == key and os.path.exists(entry['file'])
+            if up_to_date and name not in force and self._outputs_exist(name):
+                return {'stage': name, 'status': 'cached', 'fingerprint': entry['fingerprint'],
+                        'rows': entry['rows'], 'seconds': time.perf_counter() - start}
+            inputs = {dependency: load(dependency) for dependency in stage.dependencies}
+            output = stage.function(inputs, self.config.get(name, {}))
+            fingerprint = dataframe_fingerprint(output)
+            file_path = os.path.join(self.cache_dir, f'{name}.pkl')
+            output.to_pickle(file_path)
+            outputs[name] = output
+            return {'stage': name, 'status': 'ran', 'fingerprint': fingerprint, 'rows': len(output),
+                    'seconds': time.perf_counter() - start, 'key': key, 'file': file_path}
+
+        pending = list(order)
+        with ThreadPoolExecutor(max_workers=resolve_n_jobs(self.n_jobs)) as executor:
+            running = {}
+            while pending or running:
+                for name in [name for name in pending
+                             if all(dependency in report for dependency in self.stages[name].dependencies)]:
+                    pending.remove(name)
+                    running[executor.submit(execute, name)] = name
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    result = future.result()
+                    fingerprints[name] = result['fingerprint']
+                    report[name] = result
+                    if result['status'] == 'ran':
+                        manifest[name] = {'key': result['key'], 'fingerprint': result['fingerprint'],
+                                          'rows': result['rows'], 'file': result['file']}
+                        with open(self._manifest_path, 'w') as file:
+                            json.dump(manifest, file, indent=2)
+        summary = pd.DataFrame([report[name] for name in order], columns=['stage', 'status', 'rows', 'seconds'])
+        print(summary.to_string(index=False))
+        return summary
+
+
+def main(arguments: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Command-line entry point, see python -m scripts.pipeline --help.
+    """
+    parser = argparse.ArgumentParser(description='Run the EDA pipeline: extract, clean, transform, outliers, export.')
+    parser.add_argument('targets', nargs='*', help='Stages to bring up to date (default: all).')
+    parser.add_argument('--config', help='YAML file overriding the default configuration, keyed by stage.')
+    parser.add_argument('--credentials', help='YAML credentials: extract from the RDS database instead of the CSV.')
+    parser.add_argument('--csv', help='CSV file to extract from.')
+    parser.add_argument('--output-dir', help="Directory of the exported CSV files (default: data/pipeline). Files "
+                        "with the same names are overwritten, so pointing it at 'data' replaces the CSV files "
+                        "the notebooks read.")
+    parser.add_argument('--cache-dir', default='.pipeline_cache', help='Directory of the stage cache.')
+    parser.add_argument('--force', nargs='*', default=[], help='Stages to run even if up to date.')
+    parser.add_argument('--n-jobs', type=int, default=-1, help='Number of stages run concurrently.')
+    options = parser.parse_args(arguments)
+    config = {}
+    if options.config:
+        with open(options.config) as file:
+            config = yaml.safe_load(file) or {}
+    for section, key, value in (('extract', 'credentials', options.credentials), ('extract', 'csv', options.csv),
+                                ('export', 'output_dir', options.output_dir)):
+        if value is not None:
+            config.setdefault(section, {})[key] = value
+    pipeline = Pipeline(config, cache_dir=options.cache_dir, n_jobs=options.n_jobs)
+    return pipeline.run(options.targets or None, force=options.force)
+
+
+if __name__ == '__main__':
+    main()
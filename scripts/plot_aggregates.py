@@ -0,0 +1,196 @@
+from scripts._lazy import lazy_import
+from scripts.statistical_tests import _column_quantiles, _numeric_matrix, _stratified_sample_indices
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+stats = lazy_import('scipy.stats')
+
+
+def _binned_counts(matrix: np.ndarray, bins: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Count the values of every column of a matrix into equal-width bins with a single np.bincount.
+
+    Each column is binned between its own minimum and maximum; the bin indices of column j are
+    offset by j * bins so that all columns are counted in one pass. Missing values are skipped.
+
+    Parameters:
+    - matrix (np.ndarray): Matrix of shape (n_rows, n_columns), with NaN marking missing values.
+    - bins (int): Number of bins per column.
+
+    Returns:
+    - Tuple[np.ndarray, np.ndarray]: Counts of shape (n_columns, bins) and bin edges of shape (n_columns, bins + 1).
+    """
+    n_columns = matrix.shape[1]
+    with np.errstate(invalid='ignore'):
+        if len(matrix):
+            low, high = np.nanmin(matrix, axis=0), np.nanmax(matrix, axis=0)
+        else:
+            low = high = np.full(n_columns, np.nan)
+    low, high = np.nan_to_num(low), np.nan_to_num(high)
+    # Constant columns get a unit-wide range centred on the value, as np.histogram does
+    constant = high <= low
+    low, high = np.where(constant, low - 0.5, low), np.where(constant, high + 0.5, high)
+    edges = low[:, None] + (high - low)[:, None] * np.linspace(0, 1, bins + 1)
+    with np.errstate(invalid='ignore'):
+        positions = np.floor((matrix - low) / ((high - low) / bins))
+    valid = ~np.isnan(positions)
+    bin_index = np.clip(positions[valid], 0, bins - 1).astype(np.int64)
+    offsets = np.broadcast_to(np.arange(n_columns) * bins, matrix.shape)[valid]
+    counts = np.bincount(bin_index + offsets, minlength=n_columns * bins).reshape(n_columns, bins)
+    return counts, edges
+
+
+def histograms(df: pd.DataFrame, columns: List[str], bins: int = 30) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """
+    Compute equal-width histograms of numeric columns in one vectorised pass.
+
+    Parameters:
+    - df (pd.DataFrame): The DataFrame holding the columns.
+    - columns (List[str]): Numeric (or boolean) columns.
+    - bins (int, optional): Number of bins per column. Default is 30.
+
+    Returns:
+    - Dict[str, Tuple[np.ndarray, np.ndarray]]: Column -> (counts, bin edges), like np.histogram.
+
+    Example:
+    ```
+    counts, edges = histograms(df, ['page_values', 'bounce_rates'])['page_values']
+    ```
+    """
+    counts, edges = _binned_counts(_numeric_matrix(df, columns), bins)
+    return {column: (counts[position], edges[position]) for position, column in enumerate(columns)}
+
+
+def kde_grids(df: pd.DataFrame, columns: List[str], grid_size: int = 512,
+              bw_method: str = 'scott') -> Dict[str, Optional[Tuple[np.ndarray, np.ndarray]]]:
+    """
+    Compute Gaussian kernel density estimates of numeric columns on a grid, by binned convolution.
+
+    The values are first counted into grid_size fine bins, then the bin counts are convolved with
+    a Gaussian kernel. This is the usual binned approximation of a KDE: its cost depends on the
+    grid size, not on the number of rows. The bandwidth follows scipy.stats.gaussian_kde
+    (Scott's or Silverman's rule times the sample standard deviation), which seaborn also uses.
+    The grid spans the range of the data.
+
+    Parameters:
+    - df (pd.DataFrame): The DataFrame holding the columns.
+    - columns (List[str]): Numeric (or boolean) columns.
+    - grid_size (int, optional): Number of grid points. Default is 512.
+    - bw_method (str, optional): 'scott' or 'silverman'. Default is 'scott'.
+
+    Returns:
+    - Dict[str, Optional[Tuple[np.ndarray, np.ndarray]]]: Column -> (grid, density), or None for
+      columns with fewer than two distinct values, where a density is not defined.
+
+    Raises:
+    - ValueError: If bw_method is not 'scott' or 'silverman'.
+
+    Example:
+    ```
+    grid, density = kde_grids(df, ['product_related_duration'])['product_related_duration']
+    ```
+    """
+    if bw_method not in ('scott', 'silverman'):
+        raise ValueError("Invalid bw_method. bw_method can only be one of: scott, silverman")
+    matrix = _numeric_matrix(df, columns)
+    counts, edges = _binned_counts(matrix, grid_size)
+    n = counts.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        std = np.nanstd(matrix, axis=0, ddof=1) if len(matrix) else np.full(len(columns), np.nan)
+        factor = n ** (-1 / 5) if bw_method == 'scott' else (n * 3 / 4) ** (-1 / 5)
+    bandwidth = factor * std
+    widths = edges[:, 1] - edges[:, 0]
+    kdes = {}
+    for position, column in enumerate(columns):
+        if not (np.isfinite(bandwidth[position]) and bandwidth[position] > 0):
+            kdes[column] = None
+            continue
+        sigma = bandwidth[position] / widths[position]
+        half_width = int(min(np.ceil(4 * sigma), grid_size))
+        offsets = np.arange(-half_width, half_width + 1)
+        kernel = np.exp(-0.5 * (offsets / sigma) ** 2) / (np.sqrt(2 * np.pi) * bandwidth[position])
+        density = np.convolve(counts[position], kernel)[half_width:half_width + grid_size] / n[position]
+        grid = (edges[position, :-1] + edges[position, 1:]) / 2
+        kdes[column] = (grid, density)
+    return kdes
+
+
+def category_counts(df: pd.DataFrame, columns: List[str], normalize: bool = False) -> Dict[str, pd.Series]:
+    """
+    Count the categories of columns, most frequent first. Missing values are not counted.
+
+    Parameters:
+    - df (pd.DataFrame): The DataFrame holding the columns.
+    - columns (List[str]): Categorical (or discrete) columns.
+    - normalize (bool, optional): Whether to return proportions instead of counts. Default is False.
+
+    Returns:
+    - Dict[str, pd.Series]: Column -> counts (or proportions) indexed by category.
+
+    Example:
+    ```
+    counts = category_counts(df, ['month', 'region'])['month']
+    ```
+    """
+    return {column: df[column].value_counts(normalize=normalize, dropna=True) for column in columns}
+
+
+def qq_quantiles(df: pd.DataFrame, columns: List[str], n_quantiles: int = 500, sample_size: Optional[int] = None,
+                 stratify_by: Optional[str] = None, standardize: bool = False,
+                 random_state: Optional[int] = 0) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """
+    Compute normal QQ plot points of numeric columns in one vectorised pass, on a grid of quantiles.
+
+    Instead of one point per row, at most n_quantiles points per column are computed: half of them
+    evenly spaced in rank and half evenly spaced along the theoretical (normal) axis, so that the
+    tails stay visible; the smallest and largest values are always included. All sample quantiles
+    of all columns are read from one sort of the value matrix, and the theoretical quantiles use
+    the plotting positions rank / (n + 1) of statsmodels' qqplot. With sample_size, the rows are
+    first reduced to a random (optionally stratified) subsample, which bounds the sort as well.
+
+    Parameters:
+    - df (pd.DataFrame): The DataFrame holding the columns.
+    - columns (List[str]): Numeric columns.
+    - n_quantiles (int, optional): Maximum number of points per column. Default is 500.
+    - sample_size (int, optional): Number of rows to subsample first. Default is None (all rows).
+    - stratify_by (str, optional): Column whose categories are sampled proportionally.
+    - standardize (bool, optional): Whether to standardise the sample quantiles with the column's mean and
+      standard deviation, like qqplot(fit=True). Default is False.
+    - random_state (int, optional): Seed of the subsample. Default is 0.
+
+    Returns:
+    - Dict[str, Tuple[np.ndarray, np.ndarray]]: Column -> (theoretical quantiles, sample quantiles).
+      Columns without values are left out.
+
+    Example:
+    ```
+    theoretical, sample = qq_quantiles(df, ['page_values', 'bounce_rates'])['page_values']
+    ```
+    """
+    matrix = _numeric_matrix(df, columns)
+    if sample_size is not None and sample_size < len(df):
+        strata = np.zeros(len(df), dtype=np.int64)
+        if stratify_by is not None:
+            strata = pd.factorize(df[stratify_by], use_na_sentinel=False)[0]
+        matrix = matrix[_stratified_sample_indices(strata, sample_size, np.random.default_rng(random_state))]
+    n_valid = (~np.isnan(matrix)).sum(axis=0)
+    n_max = int(n_valid.max()) if len(columns) else 0
+    if n_max == 0:
+        return {}
+    n_points = max(min(n_quantiles, n_max), 2)
+    # Ranks (as fractions of the sorted values) evenly spaced, and evenly spaced on the normal axis
+    extreme = stats.norm.ppf(1 / (n_max + 1))
+    normal_grid = (stats.norm.cdf(np.linspace(extreme, -extreme, n_points // 2)) * (n_max + 1) - 1) / max(n_max - 1, 1)
+    grid = np.unique(np.clip(np.concatenate((np.linspace(0, 1, n_points - n_points // 2), normal_grid)), 0, 1))
+    sample = _column_quantiles(matrix, grid)
+    ranks = grid[:, None] * (n_valid - 1) + 1
+    theoretical = stats.norm.ppf(ranks / (n_valid + 1))
+    if standardize:
+        # All-null columns are left out below; skipping them here avoids empty-slice warnings
+        valid = n_valid > 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sample[:, valid] = ((sample[:, valid] - np.nanmean(matrix[:, valid], axis=0))
+                                / np.nanstd(matrix[:, valid], axis=0))
+    return {column: (theoretical[:, position], sample[:, position])
+            for position, column in enumerate(columns) if n_valid[position] > 0}
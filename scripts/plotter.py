@@ -1,14 +1,20 @@
-from scipy import stats
-from statsmodels.graphics.gofplots import qqplot
+from scripts._lazy import lazy_import
+from scripts.correlation import correlation_matrix
+from scripts.instrumentation import instrumented
+from scripts.nullity import NullityProfile
+from scripts.plot_aggregates import category_counts, histograms, kde_grids, qq_quantiles
 from scripts.statistical_tests import StatisticalTests
 from typing import List
-import missingno as msno
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 
+# Plotting libraries are only imported when a plot is drawn
+plt = lazy_import('matplotlib.pyplot')
+sns = lazy_import('seaborn')
+stats = lazy_import('scipy.stats')
 
+
+@instrumented
 class Plotter(StatisticalTests):
     """
     A class for creating various plots and visualizations based on a DataFrame.
@@ -16,7 +22,48 @@ class Plotter(StatisticalTests):
 
     def __init__(self, dataframe):
         self.df = dataframe.copy()
-        
+
+    @staticmethod
+    def _grid_axes(n_panels: int, col_wrap: int = 3, height: float = 3):
+        """
+        Create a figure with a grid of n_panels axes, col_wrap per row, hiding unused axes.
+
+        Returns:
+        - Tuple[matplotlib.figure.Figure, List[matplotlib.axes.Axes]]: The figure and the panels' axes.
+        """
+        ncols = max(min(col_wrap, n_panels), 1)
+        nrows = max(int(np.ceil(n_panels / ncols)), 1)
+        fig, axes = plt.subplots(nrows=nrows, ncols=ncols, figsize=(ncols * height, nrows * height), squeeze=False)
+        axes = list(np.ravel(axes))
+        for ax in axes[n_panels:]:
+            ax.set_visible(False)
+        return fig, axes[:n_panels]
+
+    @staticmethod
+    def _draw_histogram(ax, counts: np.ndarray, edges: np.ndarray, kde=None, stat: str = 'count',
+                        color: str = 'blue') -> None:
+        """
+        Draw a precomputed histogram, and optionally a precomputed KDE scaled to it, on an axis.
+
+        Parameters:
+        - ax (matplotlib.axes.Axes): The axis to draw on.
+        - counts (np.ndarray): Bin counts, see plot_aggregates.histograms.
+        - edges (np.ndarray): Bin edges.
+        - kde (Tuple[np.ndarray, np.ndarray], optional): Grid and density, see plot_aggregates.kde_grids.
+        - stat (str, optional): 'count' or 'probability'. Default is 'count'.
+        - color (str, optional): Color of the bars and the line. Default is 'blue'.
+
+        """
+        total = counts.sum()
+        scale = 1 / total if stat == 'probability' and total else 1
+        widths = np.diff(edges)
+        ax.bar(edges[:-1], counts * scale, width=widths, align='edge', color=color, alpha=0.4, edgecolor='white')
+        if kde is not None:
+            grid, density = kde
+            # Density times bin width times total gives the expected count per bin
+            ax.plot(grid, density * widths[0] * total * scale, color=color)
+        ax.set_ylabel(stat.capitalize())
+
     def discrete_probability_distribution(self, column_name: str, **kwargs) -> None:
         """
         Creates a bar plot for discrete probability distribution.
@@ -28,8 +75,8 @@ class Plotter(StatisticalTests):
         """
         plt.rc("axes.spines", top=False, right=False)
         sns.set_style(style='darkgrid', rc=None)
-        probs = self.df[column_name].value_counts(normalize=True)
-        # Create bar plot
+        probs = category_counts(self.df, [column_name], normalize=True)[column_name]
+        # Create bar plot from the precomputed proportions
         dpd = sns.barplot(y=probs.values, x=probs.index)
         dpd.set_xticklabels(dpd.get_xticklabels(), rotation=45, ha='right')
         plt.xlabel('Values')
@@ -41,35 +88,47 @@ class Plotter(StatisticalTests):
         """
         Creates a histogram for continuous probability distribution.
 
+        The histogram and KDE are pre-aggregated with plot_aggregates, so only 30 bars and
+        a KDE grid are drawn whatever the number of rows.
+
         Parameters:
         - column_name (str): Name of the column for which to create the plot.
         - column_list (List[str], optional): List of additional columns for comparison.
         
         """
-        if column_list is not None:
-            for col in column_list:
-                sns.histplot(self.df[col], kde=True, color='blue', stat="probability", bins=30)
-                super().print_summary_statistics(col)
-        else:
-            sns.histplot(self.df[column_name], kde=True, color='blue', stat="probability", bins=30)
-            super().print_summary_statistics(column_name)
-
-    def correlation_heatmap(self, column_list: List[str]) -> None:
+        columns = column_list if column_list is not None else [column_name]
+        column_histograms = histograms(self.df, columns, bins=30)
+        kdes = kde_grids(self.df, columns)
+        ax = plt.gca()
+        for col in columns:
+            self._draw_histogram(ax, *column_histograms[col], kde=kdes[col], stat='probability')
+            ax.set_xlabel(col)
+            super().print_summary_statistics(col)
+
+    def correlation_heatmap(self, column_list: List[str], method: str = 'pearson') -> None:
         """
         Creates a heatmap of the correlation matrix.
 
+        The matrix comes from correlation.correlation_matrix, which caches it by data fingerprint.
+
         Parameters:
         - column_list (List[str]): List of column names for correlation analysis.
+        - method (str, optional): 'pearson' or 'spearman'. Default is 'pearson'.
 
         """
-        sns.heatmap(self.df[column_list].corr(), annot=True, cmap='coolwarm')
+        sns.heatmap(correlation_matrix(self.df, column_list, method=method), annot=True, cmap='coolwarm')
 
-    def correlation_matrix_df(self) -> None:
+    def correlation_matrix_df(self, method: str = 'pearson') -> None:
         """
         Creates a heatmap of the correlation matrix for all numerical variables.
 
+        The matrix comes from correlation.correlation_matrix, which caches it by data fingerprint.
+
+        Parameters:
+        - method (str, optional): 'pearson' or 'spearman'. Default is 'pearson'.
+
         """
-        corr = self.df.select_dtypes(include=np.number).corr()
+        corr = correlation_matrix(self.df, list(super().extract_numeric_features().columns), method=method)
         mask = np.zeros_like(corr, dtype=bool)
         mask[np.triu_indices_from(mask)] = True
         cmap = sns.diverging_palette(220, 10, as_cmap=True)
@@ -80,76 +139,163 @@ class Plotter(StatisticalTests):
         plt.title('Correlation Matrix of all Numerical Variables')
         plt.show()
 
-    def qq_plot(self, column_list: List[str]) -> None:
+    @staticmethod
+    def _columns_with_points(points: dict, columns: List[str]) -> List[str]:
+        """
+        Return the columns that have QQ points, printing a message for each column without any value.
+        """
+        for col in columns:
+            if col not in points:
+                print(f"Skipping {col}: it has no non-null values to plot.")
+        return [col for col in columns if col in points]
+
+    @staticmethod
+    def _draw_qq(ax, theoretical: np.ndarray, sample: np.ndarray, line: str = 'q') -> None:
+        """
+        Draw precomputed QQ points and a reference line on an axis, like statsmodels' qqplot.
+
+        Parameters:
+        - ax (matplotlib.axes.Axes): The axis to draw on.
+        - theoretical (np.ndarray): Theoretical quantiles, see plot_aggregates.qq_quantiles.
+        - sample (np.ndarray): Sample quantiles.
+        - line (str, optional): 'q' for a line through the quartiles, '45' for y = x. Default is 'q'.
+
+        """
+        ax.plot(theoretical, sample, 'o', markerfacecolor='C0', markeredgecolor='C0', markersize=4)
+        if line == 'q':
+            # Line through the points at the theoretical quartiles
+            x = stats.norm.ppf([0.25, 0.75])
+            y = np.interp(x, theoretical, sample)
+            slope = (y[1] - y[0]) / (x[1] - x[0])
+            ax.plot(theoretical, y[0] + slope * (theoretical - x[0]), 'r-')
+        elif line == '45':
+            ax.plot(theoretical, theoretical, 'r-')
+        ax.set_xlabel('Theoretical Quantiles')
+        ax.set_ylabel('Sample Quantiles')
+
+    def qq_plot(self, column_list: List[str], n_quantiles: int = 500, sample_size: int = None,
+                stratify_by: str = None) -> None:
         """
         Creates QQ plots for a list of columns.
 
+        The QQ points of all columns are computed in one vectorised pass on a grid of at most
+        n_quantiles quantiles (see plot_aggregates.qq_quantiles), optionally on a stratified subsample.
+
         Parameters:
         - column_list (List[str]): List of column names for QQ plot.
+        - n_quantiles (int, optional): Maximum number of points per plot. Default is 500.
+        - sample_size (int, optional): Number of rows to subsample first. Default is None (all rows).
+        - stratify_by (str, optional): Column whose categories are sampled proportionally.
+          Columns without any non-null value are skipped with a printed message.
 
         """
-        for column in column_list:
-            qqplot(self.df[column], scale=1 ,line='q')
+        points = qq_quantiles(self.df, column_list, n_quantiles, sample_size, stratify_by)
+        for column in self._columns_with_points(points, column_list):
+            fig, ax = plt.subplots()
+            self._draw_qq(ax, *points[column], line='q')
 
-    def multi_qq_plot(self, columns: List[str]) -> None:
+    def multi_qq_plot(self, columns: List[str], n_quantiles: int = 500, sample_size: int = None,
+                      stratify_by: str = None) -> None:
         """
-        Creates multiple QQ plots in a grid.
+        Creates multiple QQ plots in a grid, of standardised values against a y = x line.
 
         Parameters:
         - columns (List[str]): List of column names for QQ plot.
+        - n_quantiles (int, optional): Maximum number of points per plot. Default is 500.
+        - sample_size (int, optional): Number of rows to subsample first. Default is None (all rows).
+        - stratify_by (str, optional): Column whose categories are sampled proportionally.
+          Columns without any non-null value are skipped with a printed message.
 
         """
-        remainder = 1 if len(columns) % 4 != 0 else 0
-        rows = int(len(columns) / 4 + remainder)
-        fig, axes = plt.subplots(
-            ncols=3, nrows=rows, sharex=False, figsize=(12, 6))
-        # np.ravel flattens the 2d axis array, meaning that we iterate and plot on x:y axis
-        for col, ax in zip(columns, np.ravel(axes)):
-            qqplot(self.df[col], line='s', ax=ax, fit=True)
+        points = qq_quantiles(self.df, columns, n_quantiles, sample_size, stratify_by, standardize=True)
+        columns = self._columns_with_points(points, columns)
+        fig, axes = self._grid_axes(len(columns), col_wrap=3, height=4)
+        for col, ax in zip(columns, axes):
+            self._draw_qq(ax, *points[col], line='45')
             ax.set_title(f'{col} QQ Plot')
         plt.tight_layout()
 
-    def nulls_dataframe_plot(self) -> None:
+    def nulls_dataframe_plot(self, n_buckets: int = 200) -> None:
+        """
+        Creates a matrix plot showing the nullity of the DataFrame, in the style of missingno's matrix.
+
+        Rows are aggregated into n_buckets buckets by a bit-packed NullityProfile and each cell
+        is shaded by the fraction of present values, so the plot costs the same for any number of rows.
+
+        Parameters:
+        - n_buckets (int, optional): Maximum number of row buckets drawn. Default is 200.
+
+        """
+        profile = NullityProfile(self.df)
+        presence = 1 - profile.bucket_densities(n_buckets)
+        fig, ax = plt.subplots(figsize=(max(6, 0.6 * len(profile.columns)), 8))
+        ax.imshow(presence.to_numpy(), aspect='auto', cmap='Greys', vmin=0, vmax=1.25, interpolation='nearest')
+        ax.set_xticks(range(len(profile.columns)))
+        ax.set_xticklabels(profile.columns, rotation=45, ha='left')
+        ax.xaxis.tick_top()
+        ax.set_yticks([0, len(presence) - 1] if len(presence) else [])
+        ax.set_yticklabels([1, profile.n_rows] if len(presence) else [])
+        ax.grid(False)
+        for position, count in enumerate(profile.null_counts):
+            ax.text(position, len(presence) - 0.5, f'{count}', ha='center', va='top', fontsize=8)
+
+    def nulls_correlation_plot(self) -> None:
         """
-        Creates a matrix plot showing the nullity of the DataFrame.
+        Creates a heatmap of the nullity correlation between columns, in the style of missingno's heatmap.
+
+        The correlation is computed from bit-packed co-null counts (see NullityProfile.nullity_correlation).
+        Columns that are never or always null are left out.
 
         """
-        msno.matrix(self.df)
+        corr = NullityProfile(self.df).nullity_correlation()
+        mask = np.zeros_like(corr, dtype=bool)
+        mask[np.triu_indices_from(mask)] = True
+        sns.heatmap(corr, mask=mask, annot=True, fmt='.1f', cmap='RdBu', vmin=-1, vmax=1)
+        plt.title('Nullity Correlation')
 
-    def pair_correlations_grid(self, numeric_features: List[str] = None) -> None:
+    def pair_correlations_grid(self, numeric_features: List[str] = None, sample_size: int = 5000,
+                               random_state: int = 0) -> None:
         """
-        Creates a pair plot for numerical features.
+        Creates a pair plot for numerical features, drawn from a random sample of rows.
+
+        Scatter plots of millions of points are slow and unreadable, so at most sample_size rows are plotted.
 
         Parameters:
         - numeric_features (List[str], optional): List of numerical feature names.
+        - sample_size (int, optional): Maximum number of rows to plot. Default is 5000.
+        - random_state (int, optional): Seed of the sample. Default is 0.
 
         """
-        if numeric_features is not None:
-            sns.pairplot(self.df[numeric_features])
-        else:
-            numeric_features = super().extract_numeric_features()
-            sns.pairplot(self.df[numeric_features])
-
-    def numeric_distributions_grid(self, numeric_features: List[str]=None, kde: bool=True) -> None:
+        if numeric_features is None:
+            numeric_features = list(super().extract_numeric_features().columns)
+        sample = self.df[numeric_features]
+        if len(sample) > sample_size:
+            sample = sample.sample(n=sample_size, random_state=random_state)
+        sns.pairplot(sample)
+
+    def numeric_distributions_grid(self, numeric_features: List[str]=None, kde: bool=True, bins: int=30) -> None:
         """
         Creates a grid of histograms for numerical features.
 
+        All histograms (and KDEs) are computed in one vectorised pass by plot_aggregates and drawn
+        from those summaries, so plot time and memory do not grow with the number of rows.
+
         Parameters:
         - numeric_features (List[str], optional): List of numerical feature names.
         - kde (bool, optional): Whether to include kernel density estimate. Default is True.
+        - bins (int, optional): Number of bins per histogram. Default is 30.
 
         """
-        if numeric_features is not None:
-            sns.set(font_scale=0.7)
-            f = pd.melt(self.df, value_vars=numeric_features)
-            g = sns.FacetGrid(f, col="variable",  col_wrap=3, sharex=False, sharey=False)
-            g = g.map(sns.histplot, "value", kde=kde)
-        else:
-            numeric_features = super().extract_numeric_features()
-            sns.set(font_scale=0.7)
-            f = pd.melt(self.df, value_vars=numeric_features)
-            g = sns.FacetGrid(f, col="variable",  col_wrap=3, sharex=False, sharey=False)
-            g = g.map(sns.histplot, "value", kde=kde)
+        if numeric_features is None:
+            numeric_features = list(super().extract_numeric_features().columns)
+        sns.set(font_scale=0.7)
+        column_histograms = histograms(self.df, numeric_features, bins=bins)
+        kdes = kde_grids(self.df, numeric_features) if kde else {}
+        fig, axes = self._grid_axes(len(numeric_features))
+        for col, ax in zip(numeric_features, axes):
+            self._draw_histogram(ax, *column_histograms[col], kde=kdes.get(col))
+            ax.set_title(f'variable = {col}')
+        fig.tight_layout()
 
     def count_plot(self, x: str, **kwargs) -> None:
         """
@@ -167,13 +313,21 @@ class Plotter(StatisticalTests):
         """
         Creates a grid of count plots for categorical features.
 
+        The counts are computed per column by plot_aggregates and drawn as bars, so no long-format
+        copy of the data is built.
+
         Parameters:
         - categorical_features (List[str]): List of categorical feature names.
 
         """
-        figure = pd.melt(self.df, value_vars=categorical_features)
-        grid = sns.FacetGrid(figure, col='variable',  col_wrap=3, sharex=False, sharey=False)
-        grid = grid.map(self.count_plot, 'value')
+        counts = category_counts(self.df, categorical_features)
+        fig, axes = self._grid_axes(len(categorical_features))
+        for col, ax in zip(categorical_features, axes):
+            ax.bar(counts[col].index.astype(str), counts[col].to_numpy())
+            ax.tick_params(axis='x', labelrotation=90)
+            ax.set_title(f'variable = {col}')
+            ax.set_ylabel('count')
+        fig.tight_layout()
 
     def log_transform_plot(self, col: str) -> None:
         """
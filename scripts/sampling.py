@@ -0,0 +1,393 @@
+from collections import OrderedDict
+from scripts._lazy import lazy_import
+from scripts.caching import dataframe_fingerprint
+from typing import Callable, Dict, Iterable, List, Optional, Union
+import numpy as np
+import pandas as pd
+
+stats = lazy_import('scipy.stats')
+
+
+_CACHE_SIZE = 16
+_sample_cache: 'OrderedDict[tuple, StratifiedSample]' = OrderedDict()
+
+
+def _stratum_key(key) -> tuple:
+    """
+    Normalise a group key to a tuple in which missing values are None, so that it can be used in a dict.
+    """
+    key = key if isinstance(key, tuple) else (key,)
+    return tuple(None if pd.isna(value) else value for value in key)
+
+
+class StratifiedReservoir:
+    """
+    A one-pass stratified reservoir sample of a stream of DataFrame chunks.
+
+    Every row gets a uniform random key, and for each stratum (combination of the strata columns)
+    the rows with the smallest keys are kept (bottom-k sampling), so the first rows kept in each
+    stratum are a uniform random sample of the stratum, whatever the order and size of the chunks.
+    The reservoir also counts the rows of each stratum, which sets the proportional allocation of
+    the final sample and the weights of the estimates.
+
+    Each stratum keeps at most capacity rows, so memory is bounded by capacity times the number of strata.
+
+    Parameters:
+    - strata (str or List[str]): Column(s) defining the strata, e.g. ['revenue', 'region', 'month'].
+    - capacity (int, optional): Rows kept per stratum; the largest sample that can be drawn. Default is 10,000.
+    - random_state (int, optional): Seed of the random keys. Default is 0.
+
+    Example:
+    ```
+    reservoir = StratifiedReservoir(['revenue', 'region', 'month'], capacity=5000)
+    for chunk in connector.extract_RDS_in_chunks('customer_activity'):
+        reservoir.update(chunk)
+    sample = reservoir.sample(5000)
+    ```
+
+    """
+
+    def __init__(self, strata: Union[str, List[str]], capacity: int = 10_000, random_state: Optional[int] = 0):
+        self.strata = [strata] if isinstance(strata, str) else list(strata)
+        self.capacity = capacity
+        self.rows: Optional[pd.DataFrame] = None
+        self.keys = np.empty(0)
+        self.codes = np.empty(0, dtype=np.int64)
+        self.positions = np.empty(0, dtype=np.int64)
+        self.rows_seen = 0
+        self.stratum_codes: Dict[tuple, int] = {}
+        self.counts = np.zeros(0, dtype=np.int64)
+        self._rng = np.random.default_rng(random_state)
+
+    def _encode(self, chunk: pd.DataFrame) -> np.ndarray:
+        """
+        Return the stratum code of every row of a chunk, registering new strata.
+        """
+        groups = chunk.groupby(self.strata, dropna=False, observed=True, sort=False)
+        local_codes = groups.ngroup().to_numpy()
+        global_codes = np.array([self.stratum_codes.setdefault(_stratum_key(key), len(self.stratum_codes))
+                                 for key in groups.size().index], dtype=np.int64)
+        return global_codes[local_codes] if len(local_codes) else local_codes
+
+    def update(self, chunk: pd.DataFrame) -> 'StratifiedReservoir':
+        """
+        Add the rows of a chunk.
+
+        Parameters:
+        - chunk (pd.DataFrame): The next chunk of rows.
+
+        Returns:
+        - StratifiedReservoir: The reservoir itself, to allow chaining.
+        """
+        if len(chunk) == 0:
+            return self
+        codes = self._encode(chunk)
+        self.counts = np.bincount(codes, minlength=len(self.stratum_codes)) + np.pad(
+            self.counts, (0, len(self.stratum_codes) - len(self.counts)))
+        rows = chunk if self.rows is None else pd.concat([self.rows, chunk])
+        keys = np.concatenate([self.keys, self._rng.random(len(chunk))])
+        codes = np.concatenate([self.codes, codes])
+        positions = np.concatenate([self.positions, np.arange(self.rows_seen, self.rows_seen + len(chunk))])
+        self.rows_seen += len(chunk)
+        # Order by stratum and key, and keep the first capacity rows of each stratum
+        order = np.lexsort((keys, codes))
+        stratum_sizes = np.bincount(codes, minlength=len(self.stratum_codes))
+        starts = np.concatenate(([0], np.cumsum(stratum_sizes)[:-1]))
+        kept = order[np.arange(len(order)) - starts[codes[order]] < self.capacity]
+        self.rows, self.keys, self.codes, self.positions = rows.iloc[kept], keys[kept], codes[kept], positions[kept]
+        return self
+
+    def sample(self, size: int, full_data: Optional[Callable[[], pd.DataFrame]] = None) -> 'StratifiedSample':
+        """
+        Draw a stratified sample of about size rows, allocated to the strata in proportion to their
+        sizes (at least one row per stratum).
+
+        Parameters:
+        - size (int): Target sample size, at most capacity rows per stratum.
+        - full_data (Callable[[], pd.DataFrame], optional): Function loading the full data, used to escalate analyses.
+
+        Returns:
+        - StratifiedSample: The sample, in the order of the stream.
+
+        Raises:
+        - ValueError: If no rows were added.
+        """
+        if self.rows is None:
+            raise ValueError("The reservoir is empty: add chunks with update before sampling.")
+        total = self.counts.sum()
+        allocation = np.where(self.counts > 0, np.maximum(np.round(self.counts * size / max(total, 1)), 1), 0)
+        allocation = np.minimum(allocation, self.capacity).astype(np.int64)
+        # The rows are ordered by stratum and key, so the first rows of each stratum have the smallest keys
+        stratum_sizes = np.bincount(self.codes, minlength=len(self.counts))
+        starts = np.concatenate(([0], np.cumsum(stratum_sizes)[:-1]))
+        selected = np.arange(len(self.codes)) - starts[self.codes] < allocation[self.codes]
+        rows = np.flatnonzero(selected)
+        rows = rows[np.argsort(self.positions[rows])]
+        return StratifiedSample(self.rows.iloc[rows], self.strata, self.codes[rows], self.counts.copy(),
+                                list(self.stratum_codes), full_data)
+
+
+class StratifiedSample:
+    """
+    A stratified sample with the population size of every stratum, for design-based estimates.
+
+    Estimates weight each sampled row by N_h / n_h (rows of its stratum in the data / in the sample)
+    and their standard errors use the stratified variance formula with finite population correction,
+    linearised for means over a subset of rows (non-null values, or a group of group_by). The
+    intervals are normal approximations: for small groups of very skewed columns (e.g. page_values
+    per region in a sample of 1,500 rows) they cover the true value less often than stated, and
+    full=True gives the exact values.
+    Any analysis class (DataFrameInfo, StatisticalTests, Plotter...) can be run on the sample,
+    or escalated to the full data on demand.
+
+    Parameters:
+    - rows (pd.DataFrame): The sampled rows.
+    - strata (List[str]): The strata columns.
+    - codes (np.ndarray): Stratum code of every sampled row.
+    - population_counts (np.ndarray): Rows of every stratum in the data.
+    - strata_values (List[tuple]): Values of the strata columns of every stratum code.
+    - full_data (Callable[[], pd.DataFrame], optional): Function loading the full data.
+
+    Example:
+    ```
+    sample = stratified_sample(customer_activity_df, ['revenue', 'region', 'month'], size=2000)
+    sample.estimate(['page_values', 'bounce_rates'])
+    sample.estimate('revenue', group_by='visitor_type')
+    sample.analysis(Plotter).numeric_distributions_grid(['page_values'])
+    sample.analysis(DataFrameInfo, full=True).grouped_conversion_rate('region')
+    ```
+
+    """
+
+    def __init__(self, rows: pd.DataFrame, strata: List[str], codes: np.ndarray, population_counts: np.ndarray,
+                 strata_values: List[tuple], full_data: Optional[Callable[[], pd.DataFrame]] = None):
+        self.df = rows
+        self.strata = strata
+        self.codes = codes
+        self.population_counts = population_counts
+        self.sample_counts = np.bincount(codes, minlength=len(population_counts))
+        self.strata_values = strata_values
+        self._full_data = full_data
+        self._full_df: Optional[pd.DataFrame] = None
+
+    @property
+    def population_rows(self) -> int:
+        """
+        Number of rows of the full data.
+        """
+        return int(self.population_counts.sum())
+
+    def strata_summary(self) -> pd.DataFrame:
+        """
+        Rows of every stratum in the data and in the sample.
+
+        Returns:
+        - pd.DataFrame: 'population_rows' and 'sample_rows', indexed by the strata values.
+        """
+        index = pd.MultiIndex.from_tuples(self.strata_values, names=self.strata)
+        return pd.DataFrame({'population_rows': self.population_counts, 'sample_rows': self.sample_counts},
+                            index=index)
+
+    def full_data(self) -> pd.DataFrame:
+        """
+        Load (once) and return the full data.
+
+        Returns:
+        - pd.DataFrame: The full data.
+
+        Raises:
+        - ValueError: If the sample was built without a way to load the full data.
+        """
+        if self._full_df is None:
+            if self._full_data is None:
+                raise ValueError("The full data is not available: build the sample from a DataFrame, "
+                                 "or pass full_data to load it.")
+            self._full_df = self._full_data()
+        return self._full_df
+
+    def analysis(self, cls: type, full: bool = False):
+        """
+        Create an analysis object (e.g. DataFrameInfo, StatisticalTests or Plotter) on the sample,
+        or on the full data.
+
+        Parameters:
+        - cls (type): The analysis class, constructed with a DataFrame.
+        - full (bool, optional): Whether to escalate to the full data. Default is False.
+
+        Returns:
+        - An instance of cls.
+
+        Example:
+        ```
+        sample.analysis(Plotter).count_plots_grid(['region', 'month'])
+        ```
+        """
+        return cls(self.full_data() if full else self.df)
+
+    def _domain_estimates(self, values: np.ndarray, domain: np.ndarray, statistic: str, z: float) -> List[float]:
+        """
+        Estimate the mean (or total) of values over the rows in domain, with its standard error and interval.
+        """
+        n_strata = len(self.population_counts)
+        N_h = self.population_counts.astype(np.float64)
+        n_h = self.sample_counts.astype(np.float64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weights = (N_h / n_h)[self.codes]
+        indicator = domain.astype(np.float64)
+        y = np.where(domain, values, 0.0)
+        domain_size = np.sum(weights * indicator)
+        total = np.sum(weights * y)
+        if statistic == 'total':
+            estimate, linearised = total, y
+        else:
+            estimate = total / domain_size if domain_size > 0 else np.nan
+            linearised = (y - estimate * indicator) / domain_size if domain_size > 0 else np.zeros_like(y)
+        # Stratified variance with finite population correction: sum_h N_h^2 (1 - n_h / N_h) s_h^2 / n_h
+        sums = np.bincount(self.codes, weights=linearised, minlength=n_strata)
+        squares = np.bincount(self.codes, weights=linearised ** 2, minlength=n_strata)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            variances = np.where(n_h > 1, (squares - sums ** 2 / n_h) / (n_h - 1), 0.0)
+            # Strata with a single sampled row have no variance estimate: use the pooled within-stratum variance
+            degrees = np.maximum(n_h - 1, 0)
+            pooled = np.sum(degrees * variances) / np.sum(degrees) if degrees.sum() > 0 else 0.0
+            variances = np.where(n_h == 1, pooled, variances)
+            variance = np.sum(np.where(n_h > 0, N_h ** 2 * (1 - n_h / N_h) * np.maximum(variances, 0) / n_h, 0.0))
+        std_error = float(np.sqrt(variance))
+        return [float(estimate), std_error, estimate - z * std_error, estimate + z * std_error,
+                int(domain.sum()), float(domain_size)]
+
+    def _estimates(self, data: pd.DataFrame, columns: List[str], statistic: str, keys: List[str],
+                   confidence_level: float, exact: bool) -> pd.DataFrame:
+        """
+        Estimate (or, if exact, compute) the statistic of columns of data, per group of keys.
+        """
+        if keys:
+            groups = data.groupby(keys, dropna=False, observed=True, sort=True)
+            group_codes, group_values = groups.ngroup().to_numpy(), list(groups.size().index)
+        else:
+            group_codes, group_values = np.zeros(len(data), dtype=np.int64), [()]
+        z = stats.norm.ppf(0.5 + confidence_level / 2)
+        records, index = [], []
+        for col in columns:
+            values = data[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            present = ~np.isnan(values)
+            for position, group_value in enumerate(group_values):
+                domain = present & (group_codes == position)
+                if not exact:
+                    records.append(self._domain_estimates(values, domain, statistic, z))
+                else:
+                    rows = int(domain.sum())
+                    value = values[domain].sum() if statistic == 'total' else values[domain].mean() if rows else np.nan
+                    records.append([value, 0.0, value, value, rows, float(rows)])
+                index.append((col,) + (group_value if isinstance(group_value, tuple) else (group_value,)))
+        index = pd.MultiIndex.from_tuples(index, names=['column'] + keys) if keys else \
+            pd.Index([entry[0] for entry in index], name='column')
+        return pd.DataFrame(records, index=index, columns=['estimate', 'std_error', 'ci_lower', 'ci_upper',
+                                                           'sample_rows', 'estimated_rows'])
+
+    def estimate(self, columns: Union[str, List[str]], statistic: str = 'mean', group_by=None,
+                 confidence_level: float = 0.95, full: bool = False) -> pd.DataFrame:
+        """
+        Estimate the mean (or total) of numeric or boolean columns, optionally per group, with confidence intervals.
+
+        Missing values are left out, as in pd.Series.mean. The mean of a boolean column such as
+        'revenue' is a proportion (conversion rate). With full=True the exact values are computed
+        on the full data instead, with zero-width intervals, e.g. to check an estimate.
+
+        Parameters:
+        - columns (str or List[str]): Numeric or boolean columns.
+        - statistic (str, optional): 'mean' or 'total'. Default is 'mean'.
+        - group_by (str or List[str], optional): Column(s) defining groups estimated separately.
+        - confidence_level (float, optional): Confidence level of the intervals. Default is 0.95.
+        - full (bool, optional): Whether to compute the exact values on the full data. Default is False.
+
+        Returns:
+        - pd.DataFrame: One row per column (and group) with 'estimate', 'std_error', 'ci_lower',
+          'ci_upper', 'sample_rows' and 'estimated_rows' (rows of the data the estimate is about).
+
+        Raises:
+        - ValueError: If statistic is not 'mean' or 'total'.
+
+        Example:
+        ```
+        sample.estimate('revenue', group_by='traffic_type')
+        ```
+        """
+        if statistic not in ('mean', 'total'):
+            raise ValueError("Invalid statistic. Statistic can only be one of: mean, total")
+        columns = [columns] if isinstance(columns, str) else list(columns)
+        keys = [] if group_by is None else [group_by] if isinstance(group_by, str) else list(group_by)
+        data = self.full_data() if full else self.df
+        return self._estimates(data, columns, statistic, keys, confidence_level, exact=full)
+
+    def proportions(self, column: str, confidence_level: float = 0.95, full: bool = False) -> pd.DataFrame:
+        """
+        Estimate the proportion of every value of a categorical column, with confidence intervals.
+
+        Parameters:
+        - column (str): The categorical column, e.g. 'region'.
+        - confidence_level (float, optional): Confidence level of the intervals. Default is 0.95.
+        - full (bool, optional): Whether to compute the exact proportions on the full data. Default is False.
+
+        Returns:
+        - pd.DataFrame: One row per value, as returned by estimate.
+
+        Example:
+        ```
+        sample.proportions('visitor_type')
+        ```
+        """
+        data = self.full_data() if full else self.df
+        indicators = pd.get_dummies(data[column], dtype=np.float64)
+        indicators[data[column].isna().to_numpy()] = np.nan
+        estimates = self._estimates(indicators, list(indicators.columns), 'mean', [], confidence_level, exact=full)
+        estimates.index.name = column
+        return estimates
+
+
+def stratified_sample(data: Union[pd.DataFrame, Iterable[pd.DataFrame]], strata: Union[str, List[str]],
+                      size: int = 5000, random_state: Optional[int] = 0, chunksize: int = 100_000,
+                      full_data: Optional[Callable[[], pd.DataFrame]] = None,
+                      use_cache: bool = True) -> StratifiedSample:
+    """
+    Build a stratified sample in one streaming pass, caching samples of DataFrames by data fingerprint.
+
+    Parameters:
+    - data (pd.DataFrame or Iterable[pd.DataFrame]): The data, or a stream of chunks
+      (e.g. RDSDatabaseConnector.extract_RDS_in_chunks).
+    - strata (str or List[str]): Column(s) defining the strata, e.g. ['revenue', 'region', 'month'].
+    - size (int, optional): Target sample size. Default is 5000.
+    - random_state (int, optional): Seed of the sample. Default is 0.
+    - chunksize (int, optional): Rows per chunk when streaming a DataFrame. Default is 100,000.
+    - full_data (Callable[[], pd.DataFrame], optional): Function loading the full data of a stream,
+      for escalation. A DataFrame is its own full data.
+    - use_cache (bool, optional): Whether to read and store the cache (DataFrames only). Default is True.
+
+    Returns:
+    - StratifiedSample: The sample.
+
+    Example:
+    ```
+    sample = stratified_sample(customer_activity_df, ['revenue', 'region', 'month'], size=2000)
+    ```
+    """
+    strata = [strata] if isinstance(strata, str) else list(strata)
+    key = None
+    if isinstance(data, pd.DataFrame):
+        frame = data
+        full_data = full_data or (lambda: frame)
+        if use_cache:
+            key = (dataframe_fingerprint(frame), tuple(strata), size, random_state)
+            if key in _sample_cache:
+                _sample_cache.move_to_end(key)
+                return _sample_cache[key]
+        data = (frame.iloc[start:start + chunksize] for start in range(0, len(frame), chunksize))
+    reservoir = StratifiedReservoir(strata, capacity=size, random_state=random_state)
+    for chunk in data:
+        reservoir.update(chunk)
+    sample = reservoir.sample(size, full_data)
+    if key is not None:
+        _sample_cache[key] = sample
+        if len(_sample_cache) > _CACHE_SIZE:
+            _sample_cache.popitem(last=False)
+    return sample
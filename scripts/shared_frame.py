@@ -0,0 +1,322 @@
+from multiprocessing import resource_tracker, shared_memory
+from scripts.dtype_backend import apply_dtype_backend, to_numpy_backed
+from scripts.memory import apply_memory_budget
+from typing import Dict, List, Optional, Union
+import pickle
+import struct
+import threading
+import numpy as np
+import pandas as pd
+
+
+_ALIGNMENT = 64
+_HEADER_SIZE = struct.Struct('<Q')
+_tracker_lock = threading.Lock()
+# Frames attached by the current process, reused by the tasks a worker runs
+_attached: Dict[str, 'SharedFrame'] = {}
+
+
+def _aligned(offset: int) -> int:
+    """
+    Round an offset up to the next multiple of _ALIGNMENT bytes.
+    """
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+def _open_untracked(name: str) -> shared_memory.SharedMemory:
+    """
+    Attach to an existing shared memory block without registering it with the resource tracker.
+
+    Before Python 3.13 every attaching process registers the block, and the tracker unlinks it
+    when that process exits, while the creator still uses it. Only the creator should own it.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        with _tracker_lock:
+            register = resource_tracker.register
+            resource_tracker.register = lambda *args, **kwargs: None
+            try:
+                return shared_memory.SharedMemory(name=name)
+            finally:
+                resource_tracker.register = register
+
+
+def _encode_column(values: pd.Series) -> List:
+    """
+    Split a column into its fixed-width buffers and the metadata needed to rebuild it.
+
+    Returns:
+    - List: The metadata (dict) and the list of NumPy buffers.
+    """
+    dtype = values.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        return [{'kind': 'categorical', 'categories': list(dtype.categories), 'ordered': dtype.ordered},
+                [values.cat.codes.to_numpy()]]
+    if isinstance(dtype, pd.api.extensions.ExtensionDtype) and hasattr(dtype, 'numpy_dtype'):
+        # Nullable integer, float and boolean columns: values and mask
+        return [{'kind': 'masked', 'dtype': str(dtype)},
+                [values.to_numpy(dtype=dtype.numpy_dtype, na_value=0), values.isna().to_numpy()]]
+    if pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+        # Strings have no fixed width: store them as categorical codes
+        categorical = pd.Categorical(values)
+        return [{'kind': 'categorical', 'categories': list(categorical.categories), 'ordered': False},
+                [categorical.codes]]
+    if isinstance(dtype, np.dtype) and dtype.kind in 'biufcmM':
+        return [{'kind': 'array'}, [np.asarray(values)]]
+    raise ValueError(f"Invalid column dtype {dtype}. SharedFrame supports numeric, boolean, datetime, "
+                     "categorical, string and nullable (Int64, boolean...) columns.")
+
+
+def _decode_column(meta: Dict, buffers: List[np.ndarray]):
+    """
+    Rebuild a column from its read-only buffers without copying them.
+    """
+    if meta['kind'] == 'categorical':
+        return pd.Categorical.from_codes(buffers[0], categories=meta['categories'], ordered=meta['ordered'],
+                                         validate=False)
+    if meta['kind'] == 'masked':
+        array_type = pd.api.types.pandas_dtype(meta['dtype']).construct_array_type()
+        return array_type(buffers[0], buffers[1], copy=False)
+    return buffers[0]
+
+
+class SharedFrame:
+    """
+    A DataFrame stored in a multiprocessing.shared_memory block, attachable by name from other processes.
+
+    Each column is laid out as one or more fixed-width NumPy buffers (values, categorical codes or
+    nullable masks) in a single block, after a header describing them, so any process can attach
+    to the block by its name alone and get a DataFrame whose columns are read-only views of the
+    shared buffers: nothing is pickled to the workers, and the data is held once in memory,
+    whatever the number of processes. String columns are stored as categoricals and come back with
+    the 'category' dtype rather than 'object'. Writing values in place into a read-only column (e.g.
+    df.loc[0, 'page_values'] = 0) raises ValueError: copy the column or the DataFrame first.
+
+    The creating process owns the block and must unlink it (see unlink, or use a with block).
+    A SharedFrame pickles as its name, so it can be passed to worker processes directly.
+
+    Parameters:
+    - shm (shared_memory.SharedMemory): The shared memory block.
+    - owner (bool, optional): Whether this process created the block. Default is False.
+
+    Example:
+    ```
+    with SharedFrame.create(customer_activity_df) as shared:
+        results = shared_map(profile_region, shared, ['Africa', 'Asia'], n_jobs=-1)
+
+    def profile_region(df, region):  # runs in a worker, df is a zero-copy view
+        return DataFrameInfo(df, copy=False).extract_statistical_values()
+    ```
+
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool = False):
+        self.shm = shm
+        self.owner = owner
+        header_length = _HEADER_SIZE.unpack_from(shm.buf, 0)[0]
+        self.spec = pickle.loads(bytes(shm.buf[_HEADER_SIZE.size:_HEADER_SIZE.size + header_length]))
+        self._data_start = _aligned(_HEADER_SIZE.size + header_length)
+        self._frame: Optional[pd.DataFrame] = None
+
+    @property
+    def name(self) -> str:
+        """
+        The name of the shared memory block, used to attach to it.
+        """
+        return self.shm.name
+
+    @classmethod
+    def create(cls, dataframe: pd.DataFrame, name: Optional[str] = None) -> 'SharedFrame':
+        """
+        Copy a DataFrame into a new shared memory block.
+
+        Arrow-backed columns are converted to NumPy first.
+
+        Parameters:
+        - dataframe (pd.DataFrame): The DataFrame to share.
+        - name (str, optional): Name of the block. Defaults to a random name.
+
+        Returns:
+        - SharedFrame: The shared frame, owned by this process.
+
+        Raises:
+        - ValueError: If a column has an unsupported dtype (e.g. mixed Python objects are stored as strings).
+        """
+        dataframe = to_numpy_backed(dataframe)
+        columns = [(col, *_encode_column(dataframe[col])) for col in dataframe.columns]
+        index = dataframe.index
+        if isinstance(index, pd.RangeIndex):
+            index_entry = {'kind': 'range', 'start': index.start, 'stop': index.stop, 'step': index.step,
+                           'name': index.name}
+            index_buffers = []
+        else:
+            index_entry, index_buffers = _encode_column(pd.Series(index))
+            index_entry['name'] = index.name
+        entries, buffers = [], []
+        for meta, column_buffers in [(index_entry, index_buffers)] + [(meta, bufs) for _, meta, bufs in columns]:
+            meta['buffers'] = [(str(buffer.dtype), len(buffer)) for buffer in column_buffers]
+            entries.append(meta)
+            buffers.extend(np.ascontiguousarray(buffer) for buffer in column_buffers)
+        # Buffer offsets are relative to the start of the data, which follows the header
+        offsets, offset = [], 0
+        for buffer in buffers:
+            offsets.append(offset)
+            offset = _aligned(offset + buffer.nbytes)
+        spec = {'n_rows': len(dataframe), 'columns': [col for col, _, _ in columns], 'index': entries[0],
+                'entries': entries[1:], 'offsets': offsets}
+        header = pickle.dumps(spec)
+        data_start = _aligned(_HEADER_SIZE.size + len(header))
+        shm = shared_memory.SharedMemory(name=name, create=True, size=data_start + offset)
+        _HEADER_SIZE.pack_into(shm.buf, 0, len(header))
+        shm.buf[_HEADER_SIZE.size:_HEADER_SIZE.size + len(header)] = header
+        for buffer, buffer_offset in zip(buffers, offsets):
+            np.ndarray(buffer.shape, dtype=buffer.dtype, buffer=shm.buf, offset=data_start + buffer_offset)[:] = buffer
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> 'SharedFrame':
+        """
+        Attach to a shared frame created by another process, by name.
+
+        Within a process, attaching twice to the same name returns the same SharedFrame.
+
+        Parameters:
+        - name (str): The name of the block (SharedFrame.name).
+
+        Returns:
+        - SharedFrame: The shared frame.
+        """
+        if name not in _attached:
+            _attached[name] = cls(_open_untracked(name))
+        return _attached[name]
+
+    def __reduce__(self):
+        return (SharedFrame.attach, (self.name,))
+
+    def _buffers(self, entry: Dict, position: int) -> List[np.ndarray]:
+        """
+        Read-only views of the buffers of an entry, the first of which is the buffer at position.
+        """
+        views = []
+        for offset_position, (dtype, length) in enumerate(entry['buffers'], start=position):
+            view = np.ndarray((length,), dtype=np.dtype(dtype), buffer=self.shm.buf,
+                              offset=self._data_start + self.spec['offsets'][offset_position])
+            view.flags.writeable = False
+            views.append(view)
+        return views
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Return the DataFrame, whose columns are read-only views of the shared memory (no copy).
+
+        Each call returns a new DataFrame over the same buffers, so replacing a column in one does
+        not affect the others. Writing values in place (e.g. df.loc[0, 'page_values'] = 0 or
+        fillna(inplace=True)) raises ValueError: assignment destination is read-only, so the shared data
+        cannot be changed by mistake; assign a copy of the column (df[col] = df[col].copy()) first.
+        String columns come back with the 'category' dtype rather than 'object'.
+
+        Returns:
+        - pd.DataFrame: The shared DataFrame.
+        """
+        if self._frame is None:
+            index_entry = self.spec['index']
+            position = len(index_entry['buffers'])
+            if index_entry['kind'] == 'range':
+                index = pd.RangeIndex(index_entry['start'], index_entry['stop'], index_entry['step'],
+                                      name=index_entry['name'])
+            else:
+                index = pd.Index(_decode_column(index_entry, self._buffers(index_entry, 0)), name=index_entry['name'])
+            data = {}
+            for col, entry in zip(self.spec['columns'], self.spec['entries']):
+                data[col] = _decode_column(entry, self._buffers(entry, position))
+                position += len(entry['buffers'])
+            self._frame = pd.DataFrame(data, index=index, copy=False)
+        return self._frame.copy(deep=False)
+
+    def close(self) -> None:
+        """
+        Release this process's views of the block. The DataFrames returned by to_dataframe must not be used after.
+        """
+        self._frame = None
+        _attached.pop(self.name, None)
+        try:
+            self.shm.close()
+        except BufferError:
+            # Views of the buffer are still referenced; the mapping is released with them
+            pass
+
+    def unlink(self) -> None:
+        """
+        Destroy the block (creator only), once every process has finished with it.
+        """
+        self.shm.unlink()
+
+    def __enter__(self) -> 'SharedFrame':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+        if self.owner:
+            self.unlink()
+
+
+def working_frame(data: Union[pd.DataFrame, SharedFrame], copy: bool = True,
+                  memory_budget: bool = False) -> pd.DataFrame:
+    """
+    Return the DataFrame an analysis class works on.
+
+    The data is converted to the configured dtype backend (and, with memory_budget, optimised under
+    the memory budget), and copied unless copy is False. With copy=False the class works on the caller's
+    DataFrame, or on the zero-copy, read-only view of a SharedFrame: in-place writes then raise
+    ValueError. String columns of a SharedFrame come back with the 'category' dtype, not 'object'.
+
+    Parameters:
+    - data (pd.DataFrame or SharedFrame): The data passed to the class.
+    - copy (bool, optional): Whether to copy data that needs no conversion. Default is True.
+    - memory_budget (bool, optional): Whether to apply the memory budget (see memory.apply_memory_budget).
+      Default is False.
+
+    Returns:
+    - pd.DataFrame: The DataFrame to work on.
+    """
+    frame = data.to_dataframe() if isinstance(data, SharedFrame) else data
+    converted = apply_dtype_backend(frame)
+    if memory_budget:
+        converted = apply_memory_budget(converted)
+    if copy and (converted is frame or isinstance(data, SharedFrame)):
+        # Converted columns may still be views of the shared memory (e.g. categoricals under Arrow)
+        return converted.copy()
+    return converted
+
+
+def _shared_task(task):
+    """
+    Run a function on an attached shared frame (runs in a worker process).
+    """
+    function, name, item = task
+    return function(SharedFrame.attach(name).to_dataframe(), item)
+
+
+def shared_map(function, shared: SharedFrame, items, n_jobs: Optional[int] = -1) -> List:
+    """
+    Apply function(df, item) to every item in worker processes that attach to a shared frame.
+
+    Only the frame's name and the items are sent to the workers, and each worker attaches once.
+
+    Parameters:
+    - function (Callable): Picklable, module-level function taking the DataFrame and an item.
+    - shared (SharedFrame): The shared frame.
+    - items (Iterable): Items to process, e.g. columns or segments.
+    - n_jobs (int, optional): Number of worker processes, see parallel.resolve_n_jobs. Default is -1 (all cores).
+
+    Returns:
+    - List: The results, in the order of the items.
+
+    Example:
+    ```
+    normality = shared_map(column_normality, shared, ['bounce_rates', 'exit_rates'])
+    ```
+    """
+    from scripts.parallel import parallel_map
+    return parallel_map(_shared_task, [(function, shared.name, item) for item in items], n_jobs, backend='processes')
@@ -0,0 +1,191 @@
+from typing import List, Optional
+import numpy as np
+
+
+class QuantileSketch:
+    """
+    A mergeable streaming quantile sketch for one numeric column.
+
+    The sketch keeps a hierarchy of compactors in the style of the KLL sketch: items at level i
+    stand for 2**i original values. When a level holds more than k items it is sorted and every
+    other item (starting at a random offset) is promoted to the next level. Memory is bounded by
+    about k * log2(n / k) items and the rank error by roughly log2(n / k) / k, so the sketch can
+    summarise data that does not fit in memory, chunk by chunk. Sketches built on separate chunks
+    can be merged, which makes them suitable for parallel or incremental computation.
+
+    Parameters:
+    - k (int, optional): Capacity of each level; larger values are more accurate. Default is 2048.
+    - random_state (int, optional): Seed for the compaction offsets.
+
+    Example:
+    ```
+    sketch = QuantileSketch()
+    for chunk in pd.read_csv('data/customer_activity.csv', chunksize=1000):
+        sketch.update(chunk['page_values'])
+    Q1, Q3 = sketch.quantile([0.25, 0.75])
+    ```
+
+    """
+
+    def __init__(self, k: int = 2048, random_state: Optional[int] = None):
+        """
+        Initialize an empty sketch.
+
+        Parameters:
+        - k (int, optional): Capacity of each level. Default is 2048.
+        - random_state (int, optional): Seed for the compaction offsets.
+
+        """
+        self.k = k
+        self.count = 0
+        self.min = np.nan
+        self.max = np.nan
+        self._levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(random_state)
+
+    def update(self, values) -> 'QuantileSketch':
+        """
+        Add values to the sketch. Missing values are ignored.
+
+        Parameters:
+        - values (array-like): The values to add, e.g. a column of a DataFrame chunk.
+
+        Returns:
+        - QuantileSketch: The sketch itself, to allow chaining.
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        self.count += len(values)
+        self.min = np.fmin(self.min, values.min())
+        self.max = np.fmax(self.max, values.max())
+        self._levels[0] = np.concatenate((self._levels[0], values))
+        self._compress()
+        return self
+
+    def merge(self, other: 'QuantileSketch') -> 'QuantileSketch':
+        """
+        Merge another sketch into this one.
+
+        Parameters:
+        - other (QuantileSketch): The sketch to merge.
+
+        Returns:
+        - QuantileSketch: The sketch itself, to allow chaining.
+        """
+        self.count += other.count
+        self.min = np.fmin(self.min, other.min)
+        self.max = np.fmax(self.max, other.max)
+        for level, items in enumerate(other._levels):
+            if level == len(self._levels):
+                self._levels.append(np.empty(0))
+            self._levels[level] = np.concatenate((self._levels[level], items))
+        self._compress()
+        return self
+
+    def _compress(self) -> None:
+        """
+        Compact every level holding more than k items, promoting half of its items to the next level.
+        """
+        level = 0
+        while level < len(self._levels):
+            items = self._levels[level]
+            if len(items) > self.k:
+                items = np.sort(items)
+                # An odd item out stays at this level so that the total weight is preserved
+                keep = items[-1:] if len(items) % 2 else items[:0]
+                paired = items[:len(items) - len(keep)]
+                promoted = paired[self._rng.integers(2)::2]
+                self._levels[level] = keep
+                if level + 1 == len(self._levels):
+                    self._levels.append(np.empty(0))
+                self._levels[level + 1] = np.concatenate((self._levels[level + 1], promoted))
+            level += 1
+
+    def _weighted_items(self):
+        """
+        Return the retained items in sorted order with their weights.
+
+        Returns:
+        - Tuple[np.ndarray, np.ndarray]: Sorted items and their weights.
+        """
+        items = np.concatenate(self._levels)
+        weights = np.concatenate([np.full(len(level_items), 2.0 ** level)
+                                  for level, level_items in enumerate(self._levels)])
+        order = np.argsort(items, kind='stable')
+        return items[order], weights[order]
+
+    def quantile(self, q) -> np.ndarray:
+        """
+        Estimate quantiles of the values seen so far.
+
+        Parameters:
+        - q (float or array-like): Quantile(s) between 0 and 1.
+
+        Returns:
+        - np.ndarray: The estimated quantiles (NaN if the sketch is empty).
+        """
+        q = np.atleast_1d(np.asarray(q, dtype=np.float64))
+        if self.count == 0:
+            return np.full(len(q), np.nan)
+        items, weights = self._weighted_items()
+        # Each retained item is placed at the midpoint of the weight it represents
+        positions = (np.cumsum(weights) - weights / 2) / weights.sum()
+        estimates = np.interp(q, positions, items)
+        estimates[q <= 0] = self.min
+        estimates[q >= 1] = self.max
+        return estimates
+
+    def rank(self, values) -> np.ndarray:
+        """
+        Estimate the mid-rank of values among the values seen so far, as a fraction between 0 and 1.
+
+        The mid-rank counts the values below plus half of the values equal, so ties share the
+        average rank, as in pd.Series.rank(method='average', pct=True) up to an affine change.
+
+        Parameters:
+        - values (array-like): The values to rank. Missing values get NaN.
+
+        Returns:
+        - np.ndarray: The estimated ranks (NaN if the sketch is empty).
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if self.count == 0:
+            return np.full(values.shape, np.nan)
+        items, weights = self._weighted_items()
+        cumulative = np.concatenate(([0.0], np.cumsum(weights)))
+        below = cumulative[np.searchsorted(items, values, side='left')]
+        below_or_equal = cumulative[np.searchsorted(items, values, side='right')]
+        ranks = (below + below_or_equal) / (2 * cumulative[-1])
+        ranks[np.isnan(values)] = np.nan
+        return ranks
+
+    def absolute_deviation(self, center: float, statistic: str = 'median') -> float:
+        """
+        Estimate the median or mean absolute deviation of the values seen so far from a center.
+
+        With the sketch's median as center, statistic='median' gives the MAD used by the modified z-score.
+
+        Parameters:
+        - center (float): The center of the deviations, e.g. self.quantile(0.5)[0].
+        - statistic (str, optional): 'median' or 'mean'. Default is 'median'.
+
+        Returns:
+        - float: The estimated absolute deviation (NaN if the sketch is empty).
+        """
+        if self.count == 0:
+            return np.nan
+        items, weights = self._weighted_items()
+        deviations = np.abs(items - center)
+        if statistic == 'mean':
+            return float(np.average(deviations, weights=weights))
+        order = np.argsort(deviations, kind='stable')
+        cumulative = np.cumsum(weights[order])
+        return float(deviations[order][np.searchsorted(cumulative, cumulative[-1] / 2)])
+
+    def __len__(self) -> int:
+        """
+        Number of items retained by the sketch (not the number of values seen).
+        """
+        return sum(len(items) for items in self._levels)
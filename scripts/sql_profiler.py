@@ -0,0 +1,277 @@
+from sqlalchemy import Integer, MetaData, Table, cast, distinct, func, literal, select, tablesample
+from sqlalchemy.sql import sqltypes
+from typing import Dict, List, Optional, Sequence
+import pandas as pd
+
+
+# Dialects with the standard STDDEV_SAMP aggregate
+_STDDEV_SAMP_DIALECTS = ('postgresql', 'mysql', 'mariadb', 'oracle')
+
+
+class SQLProfiler:
+    """
+    A class for profiling a database table with SQL aggregates pushed down to the database.
+
+    Instead of extracting every row with extract_RDS_to_dataframe and profiling the DataFrame locally,
+    the statistics are compiled to SQL aggregate queries and executed against the connector's engine.
+    Only the aggregated results travel over the network.
+
+    Parameters:
+    - connector (RDSDatabaseConnector): A connector whose engine points at the database.
+    - table_name (str): The name of the table to profile.
+
+    Example:
+    ```
+    profiler = SQLProfiler(connector, 'customer_activity')
+    null_info = profiler.generate_null_counts()
+    ```
+
+    """
+
+    def __init__(self, connector, table_name: str):
+        """
+        Initialize the SQLProfiler by reflecting the table definition from the database.
+
+        Parameters:
+        - connector (RDSDatabaseConnector): A connector whose engine points at the database.
+        - table_name (str): The name of the table to profile.
+
+        """
+        self.engine = connector.engine
+        self.table = Table(table_name, MetaData(), autoload_with=self.engine)
+
+    def _columns(self, columns=None, numeric_only: bool = False) -> List:
+        """
+        Resolve column names to the reflected table columns.
+
+        Parameters:
+        - columns (str or List[str], optional): Column names. All columns if None.
+        - numeric_only (bool, optional): Whether to keep only integer and floating point columns. Default is False.
+
+        Returns:
+        - List[sqlalchemy.Column]: The selected table columns.
+
+        Raises:
+        - KeyError: If a column does not exist in the table.
+        """
+        if columns is None:
+            selected = list(self.table.columns)
+        else:
+            columns = [columns] if isinstance(columns, str) else columns
+            selected = [self.table.columns[col.lower()] for col in columns]
+        if numeric_only:
+            selected = [col for col in selected
+                        if isinstance(col.type, (sqltypes.Integer, sqltypes.Numeric, sqltypes.Float))]
+        return selected
+
+    def _fetch_aggregates(self, expressions: Dict, source=None) -> Dict:
+        """
+        Execute a single SELECT of aggregate expressions and return the resulting row.
+
+        Parameters:
+        - expressions (Dict[str, ColumnElement]): Aggregate expressions keyed by label.
+        - source (FromClause, optional): The FROM clause. Defaults to the profiled table.
+
+        Returns:
+        - dict: The aggregated values keyed by label.
+        """
+        query = select(*[expression.label(label) for label, expression in expressions.items()])
+        query = query.select_from(self.table if source is None else source)
+        with self.engine.connect() as connection:
+            return dict(connection.execute(query).mappings().one())
+
+    def generate_null_counts(self, columns=None) -> pd.DataFrame:
+        """
+        Generate null counts and percentages per column with one aggregate query.
+
+        Parameters:
+        - columns (str or List[str], optional): Columns to profile. All columns if None.
+
+        Returns:
+        - pd.DataFrame: Null counts and percentages in columns, indexed by column name.
+
+        Example:
+        ```
+        null_info = profiler.generate_null_counts(['administrative', 'operating_systems'])
+        ```
+
+        """
+        selected = self._columns(columns)
+        expressions = {'__rows': func.count()}
+        expressions.update({col.name: func.count() - func.count(col) for col in selected})
+        row = self._fetch_aggregates(expressions)
+        total_rows = row.pop('__rows')
+        null_counts = pd.Series(row, dtype='int64')
+        return pd.DataFrame({
+            'null_count': null_counts,
+            'null_percentage': (null_counts / total_rows) * 100 if total_rows else float('nan')
+        })
+
+    def count_distinct_values(self, columns=None) -> pd.DataFrame:
+        """
+        Count distinct values per column with one aggregate query.
+
+        Parameters:
+        - columns (str or List[str], optional): Columns to profile. All columns if None.
+
+        Returns:
+        - pd.DataFrame: Count of distinct values in columns, indexed by column name.
+
+        Example:
+        ```
+        counts = profiler.count_distinct_values(['region', 'browser'])
+        ```
+
+        """
+        selected = self._columns(columns)
+        row = self._fetch_aggregates({col.name: func.count(distinct(col)) for col in selected})
+        distinct_counts = pd.DataFrame({
+            'column': list(row.keys()),
+            'distinct_values_count': list(row.values())
+        })
+        distinct_counts.set_index(['column'], inplace=True)
+        return distinct_counts
+
+    def extract_statistical_values(self, columns=None,
+                                   percentiles: Sequence[float] = (0.25, 0.5, 0.75),
+                                   sample_percent: Optional[float] = None) -> pd.DataFrame:
+        """
+        Extract describe()-style statistics of numeric columns with SQL aggregates.
+
+        Count, mean, standard deviation, min and max are computed in one aggregate query, with STDDEV_SAMP
+        where the dialect supports it. Elsewhere (e.g. SQLite) a second query sums the squared deviations
+        from the mean, which stays accurate for columns with a large mean, unlike sum(x²) - n·mean².
+        The percentiles are computed by the percentiles method.
+
+        Parameters:
+        - columns (str or List[str], optional): Columns to profile. All numeric columns if None.
+        - percentiles (Sequence[float], optional): Percentiles to include. Default is the quartiles.
+        - sample_percent (float, optional): See percentiles method.
+
+        Returns:
+        - pd.DataFrame: Statistical values of columns, laid out like pd.DataFrame.describe().
+
+        Example:
+        ```
+        stats = profiler.extract_statistical_values(['bounce_rates', 'exit_rates'])
+        ```
+
+        """
+        selected = self._columns(columns, numeric_only=True)
+        stddev_samp = self.engine.dialect.name in _STDDEV_SAMP_DIALECTS
+        expressions = {}
+        for col in selected:
+            value = cast(col, sqltypes.Float)
+            expressions[f'{col.name}__count'] = func.count(col)
+            expressions[f'{col.name}__mean'] = func.avg(value)
+            if stddev_samp:
+                expressions[f'{col.name}__std'] = func.stddev_samp(value)
+            expressions[f'{col.name}__min'] = func.min(col)
+            expressions[f'{col.name}__max'] = func.max(col)
+        row = self._fetch_aggregates(expressions)
+        if not stddev_samp:
+            # Second pass: squared deviations from the mean of the first pass
+            deviations = {}
+            for col in selected:
+                if row[f'{col.name}__count'] > 1:
+                    centred = cast(col, sqltypes.Float) - literal(row[f'{col.name}__mean'], sqltypes.Float)
+                    deviations[f'{col.name}__squared_deviations'] = func.sum(centred * centred)
+            if deviations:
+                row.update(self._fetch_aggregates(deviations))
+        stats = {}
+        for col in selected:
+            count = row[f'{col.name}__count']
+            std = row.get(f'{col.name}__std')
+            if not stddev_samp and count > 1:
+                std = (row[f'{col.name}__squared_deviations'] / (count - 1)) ** 0.5
+            stats[col.name] = {'count': count, 'mean': row[f'{col.name}__mean'],
+                               'std': float('nan') if std is None else std,
+                               'min': row[f'{col.name}__min'], 'max': row[f'{col.name}__max']}
+        stats = pd.DataFrame(stats, dtype='float64')
+        if len(percentiles) > 0:
+            quantiles = self.percentiles([col.name for col in selected], percentiles, sample_percent)
+            stats = pd.concat([stats.loc[['count', 'mean', 'std', 'min']], quantiles, stats.loc[['max']]])
+        return stats
+
+    def percentiles(self, columns=None, percentiles: Sequence[float] = (0.25, 0.5, 0.75),
+                    sample_percent: Optional[float] = None) -> pd.DataFrame:
+        """
+        Compute percentiles of numeric columns inside the database.
+
+        On PostgreSQL all percentiles of all columns are computed by one query using percentile_cont.
+        If sample_percent is given, the query runs on a TABLESAMPLE SYSTEM block sample of the table,
+        which gives approximate percentiles without scanning the whole table.
+        Other dialects (e.g. a local SQLite stand-in) fall back to nearest-rank percentiles
+        fetched with one ORDER BY ... LIMIT 1 OFFSET k query per percentile.
+
+        Parameters:
+        - columns (str or List[str], optional): Columns to profile. All numeric columns if None.
+        - percentiles (Sequence[float], optional): Percentiles between 0 and 1. Default is the quartiles.
+        - sample_percent (float, optional): Percentage of table blocks to sample (PostgreSQL only).
+
+        Returns:
+        - pd.DataFrame: Percentiles (rows, labelled like describe(), e.g. '25%') of columns.
+
+        Example:
+        ```
+        quartiles = profiler.percentiles(['page_values'], sample_percent=10)
+        ```
+
+        """
+        selected = self._columns(columns, numeric_only=True)
+        labels = [f'{q * 100:g}%' for q in percentiles]
+        results = {}
+        if self.engine.dialect.name == 'postgresql':
+            source = self.table
+            if sample_percent is not None:
+                source = tablesample(self.table, func.system(sample_percent))
+            expressions = {f'{col.name}__{i}': func.percentile_cont(q).within_group(source.c[col.name])
+                           for col in selected for i, q in enumerate(percentiles)}
+            row = self._fetch_aggregates(expressions, source)
+            for col in selected:
+                results[col.name] = [row[f'{col.name}__{i}'] for i in range(len(percentiles))]
+        else:
+            counts = self._fetch_aggregates({col.name: func.count(col) for col in selected})
+            with self.engine.connect() as connection:
+                for col in selected:
+                    values = []
+                    for q in percentiles:
+                        offset = max(int(round(q * (counts[col.name] - 1))), 0)
+                        query = select(col).where(col.is_not(None)).order_by(col).limit(1).offset(offset)
+                        values.append(connection.execute(query).scalar())
+                    results[col.name] = values
+        return pd.DataFrame(results, index=labels, dtype='float64')
+
+    def grouped_conversion_rate(self, group_by, target: str = 'revenue') -> pd.DataFrame:
+        """
+        Calculate the conversion rate of a boolean target column per segment with one GROUP BY query.
+
+        Parameters:
+        - group_by (str or List[str]): Column(s) defining the segments.
+        - target (str, optional): Boolean (or 0/1) column marking a conversion. Default is 'revenue'.
+
+        Returns:
+        - pd.DataFrame: Tidy frame with the group keys, 'sessions', 'conversions' and 'conversion_rate',
+          matching DataFrameInfo.grouped_conversion_rate.
+
+        Example:
+        ```
+        conversion = profiler.grouped_conversion_rate(['traffic_type', 'region'])
+        ```
+
+        """
+        keys = self._columns(group_by)
+        target_col = self._columns(target)[0]
+        # Sessions with a missing target are left out, as in DataFrameInfo.grouped_conversion_rate
+        query = (select(*keys,
+                        func.count(target_col).label('sessions'),
+                        func.coalesce(func.sum(cast(target_col, Integer)), 0).label('conversions'))
+                 .group_by(*keys)
+                 .order_by(*keys))
+        with self.engine.connect() as connection:
+            result = connection.execute(query)
+            conversion = pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+        conversion = conversion.dropna(subset=[key.name for key in keys])
+        conversion['conversions'] = conversion['conversions'].astype(int)
+        conversion['conversion_rate'] = conversion['conversions'] / conversion['sessions']
+        return conversion.reset_index(drop=True)
@@ -1,19 +1,266 @@
+from scripts._lazy import lazy_import
 from scripts.info_extractor import DataFrameInfo
-from scipy.stats import chi2, chi2_contingency, normaltest
-from typing import List, Tuple
+from scripts.instrumentation import instrumented
+from scripts.parallel import parallel_map
+from scripts.shared_frame import working_frame
+from scripts.sketches import QuantileSketch
+from itertools import combinations
+from typing import Iterable, List, Optional, Sequence, Tuple
 import math
 import numpy as np
 import pandas as pd
 
+stats = lazy_import('scipy.stats')
 
+
+def _factorize_columns(df: pd.DataFrame, columns: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Encode columns as integer codes, with -1 marking missing values.
+
+    Parameters:
+    - df (pd.DataFrame): The DataFrame holding the columns.
+    - columns (List[str]): Names of the columns to encode.
+
+    Returns:
+    - Tuple[np.ndarray, np.ndarray]: The (n_rows, n_columns) code matrix and the number of
+      distinct values of each column.
+    """
+    codes = np.empty((len(df), len(columns)), dtype=np.int64)
+    cardinalities = np.empty(len(columns), dtype=np.int64)
+    for position, column in enumerate(columns):
+        column_codes, uniques = pd.factorize(df[column], use_na_sentinel=True)
+        codes[:, position] = column_codes
+        cardinalities[position] = len(uniques)
+    return codes, cardinalities
+
+
+def _chi2_statistics(observed: np.ndarray, correction: bool = True) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Vectorised chi-square test of independence for a stack of contingency tables.
+
+    Tables of different shapes are zero-padded to a common shape: empty rows and columns
+    do not contribute to the statistic nor to the degrees of freedom. Matches
+    scipy.stats.chi2_contingency, including Yates' correction when a table has one degree of freedom.
+
+    Parameters:
+    - observed (np.ndarray): Array of shape (n_tables, n_rows, n_columns) with observed frequencies.
+    - correction (bool, optional): Whether to apply Yates' continuity correction. Default is True.
+
+    Returns:
+    - Tuple[np.ndarray, np.ndarray, np.ndarray]: chi-square statistics, degrees of freedom and p-values.
+    """
+    observed = observed.astype(np.float64)
+    totals = observed.sum(axis=(1, 2))
+    row_sums = observed.sum(axis=2)
+    col_sums = observed.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        expected = row_sums[:, :, None] * col_sums[:, None, :] / totals[:, None, None]
+    expected = np.nan_to_num(expected)
+    dof = ((row_sums > 0).sum(axis=1) - 1) * ((col_sums > 0).sum(axis=1) - 1)
+    dof = np.maximum(dof, 0)
+    difference = expected - observed
+    if correction:
+        yates = (dof == 1)[:, None, None]
+        observed = np.where(yates, observed + np.sign(difference) * np.minimum(0.5, np.abs(difference)), observed)
+        difference = expected - observed
+    with np.errstate(divide='ignore', invalid='ignore'):
+        terms = np.where(expected > 0, difference ** 2 / expected, 0.0)
+    statistics = np.where(dof > 0, terms.sum(axis=(1, 2)), 0.0)
+    p_values = np.where(dof > 0, stats.chi2.sf(statistics, np.maximum(dof, 1)), 1.0)
+    return statistics, dof, p_values
+
+
+def _numeric_matrix(df: pd.DataFrame, columns: List[str]) -> np.ndarray:
+    """
+    Extract columns as one float64 matrix, with NaN marking missing values.
+
+    Parameters:
+    - df (pd.DataFrame): The DataFrame holding the columns.
+    - columns (List[str]): Names of the numeric (or boolean) columns.
+
+    Returns:
+    - np.ndarray: Matrix of shape (n_rows, n_columns).
+    """
+    return df[columns].to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _column_quantiles(matrix: np.ndarray, q: Sequence[float]) -> np.ndarray:
+    """
+    Compute quantiles of every column of a matrix in one vectorised pass, ignoring NaN.
+
+    The matrix is sorted once along the rows (NaN sort last) and every quantile of every column
+    is read from it with linear interpolation, matching pd.DataFrame.quantile.
+
+    Parameters:
+    - matrix (np.ndarray): Matrix of shape (n_rows, n_columns).
+    - q (Sequence[float]): Quantiles between 0 and 1.
+
+    Returns:
+    - np.ndarray: Array of shape (len(q), n_columns). Columns without values are NaN.
+    """
+    ordered = np.sort(matrix, axis=0)
+    n_valid = (~np.isnan(matrix)).sum(axis=0)
+    positions = np.asarray(q, dtype=np.float64)[:, None] * np.maximum(n_valid - 1, 0)
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.minimum(lower + 1, np.maximum(n_valid - 1, 0))
+    if len(ordered) == 0:
+        return np.full(positions.shape, np.nan)
+    lower_values = np.take_along_axis(ordered, lower, axis=0)
+    upper_values = np.take_along_axis(ordered, upper, axis=0)
+    quantiles = lower_values + (upper_values - lower_values) * (positions - lower)
+    quantiles[:, n_valid == 0] = np.nan
+    return quantiles
+
+
+def _stratified_sample_indices(strata: np.ndarray, size: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Draw a stratified random sample of row positions without replacement, in one vectorised pass.
+
+    Each stratum receives a share of the sample proportional to its size (at least one row).
+    Rows are ordered by stratum and a random key, and the first rows of each stratum are kept.
+
+    Parameters:
+    - strata (np.ndarray): Integer stratum code of every row.
+    - size (int): Target sample size.
+    - rng (np.random.Generator): Random number generator.
+
+    Returns:
+    - np.ndarray: Sorted positions of the sampled rows.
+    """
+    n = len(strata)
+    if size >= n:
+        return np.arange(n)
+    counts = np.bincount(strata)
+    allocation = np.where(counts > 0, np.maximum(np.round(counts * size / n), 1), 0).astype(np.int64)
+    order = np.lexsort((rng.random(n), strata))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    rank_in_stratum = np.arange(n) - starts[strata[order]]
+    return np.sort(order[rank_in_stratum < allocation[strata[order]]])
+
+
+# Columns with at most this many distinct values are resampled through their value counts
+_MAX_COUNT_RESAMPLING_VALUES = 256
+
+
+def _resampled_statistic(statistic: str, uniques: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """
+    Evaluate a statistic on resamples described by the counts of each distinct value.
+
+    Parameters:
+    - statistic (str): 'mean' or 'median'.
+    - uniques (np.ndarray): Sorted distinct values, shape (k,).
+    - counts (np.ndarray): Count of each distinct value in each resample, shape (n_resamples, k).
+
+    Returns:
+    - np.ndarray: The statistic of each resample.
+    """
+    n = counts[0].sum()
+    if statistic == 'mean':
+        return counts @ uniques / n
+    cumulative = counts.cumsum(axis=1)
+    lower = uniques[np.argmax(cumulative > (n - 1) // 2, axis=1)]
+    upper = uniques[np.argmax(cumulative > n // 2, axis=1)]
+    return (lower + upper) / 2
+
+
+def _bootstrap_batch(task: Tuple) -> np.ndarray:
+    """
+    Draw one batch of bootstrap resamples and return their statistics (worker function).
+
+    Low-cardinality data (e.g. 0/1 conversions) is resampled exactly through multinomial value
+    counts; other data is resampled with a (batch_size, n) NumPy index matrix.
+
+    Parameters:
+    - task (Tuple): (values, uniques, counts, statistic, batch_size, seed). Either values or
+      uniques and counts are None.
+
+    Returns:
+    - np.ndarray: The statistic of each resample in the batch.
+    """
+    values, uniques, counts, statistic, batch_size, seed = task
+    rng = np.random.default_rng(seed)
+    if values is None:
+        resampled_counts = rng.multinomial(counts.sum(), counts / counts.sum(), size=batch_size)
+        return _resampled_statistic(statistic, uniques, resampled_counts)
+    indices = rng.integers(0, len(values), size=(batch_size, len(values)))
+    resamples = values[indices]
+    return resamples.mean(axis=1) if statistic == 'mean' else np.median(resamples, axis=1)
+
+
+def _group_statistic(means: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+    """
+    Statistic comparing group means: the difference for two groups, else the between-group sum of squares.
+
+    Parameters:
+    - means (np.ndarray): Group means of each resample, shape (n_resamples, k).
+    - sizes (np.ndarray): Group sizes, shape (k,).
+
+    Returns:
+    - np.ndarray: The statistic of each resample.
+    """
+    if means.shape[1] == 2:
+        return means[:, 0] - means[:, 1]
+    grand_mean = (means @ sizes / sizes.sum())[:, None]
+    return ((means - grand_mean) ** 2) @ sizes
+
+
+def _permutation_batch(task: Tuple) -> np.ndarray:
+    """
+    Draw one batch of label permutations and return their statistics (worker function).
+
+    For 0/1 values, the number of ones falling in each group under a random permutation follows a
+    multivariate hypergeometric distribution, which is sampled directly. Other values are permuted
+    with a (batch_size, n) label matrix and summed per group with one np.bincount.
+
+    Parameters:
+    - task (Tuple): (codes, values, sizes, binary, batch_size, seed).
+
+    Returns:
+    - np.ndarray: The statistic of each permutation in the batch.
+    """
+    codes, values, sizes, binary, batch_size, seed = task
+    rng = np.random.default_rng(seed)
+    k = len(sizes)
+    if binary:
+        ones = rng.multivariate_hypergeometric(sizes, int(values.sum()), size=batch_size)
+        return _group_statistic(ones / sizes, sizes)
+    labels = np.tile(codes, (batch_size, 1))
+    rng.permuted(labels, axis=1, out=labels)
+    labels += (np.arange(batch_size) * k)[:, None]
+    sums = np.bincount(labels.ravel(), weights=np.tile(values, batch_size), minlength=batch_size * k)
+    return _group_statistic(sums.reshape(batch_size, k) / sizes, sizes)
+
+
+def _resampling_tasks(payload: Tuple, n_resamples: int, batch_size: int, random_state: Optional[int]) -> List[Tuple]:
+    """
+    Split resamples into batches, each with its own seed spawned from random_state.
+
+    The batches and seeds depend only on n_resamples, batch_size and random_state, so results are
+    reproducible whatever the number of workers.
+
+    Parameters:
+    - payload (Tuple): Worker arguments preceding batch_size and seed.
+    - n_resamples (int): Total number of resamples.
+    - batch_size (int): Number of resamples per batch.
+    - random_state (int, optional): Seed for reproducible results.
+
+    Returns:
+    - List[Tuple]: One task per batch.
+    """
+    sizes = [min(batch_size, n_resamples - start) for start in range(0, n_resamples, batch_size)]
+    seeds = np.random.SeedSequence(random_state).spawn(len(sizes))
+    return [payload + (size, seed) for size, seed in zip(sizes, seeds)]
+
+
+@instrumented
 class StatisticalTests(DataFrameInfo):
     """
     A class for performing statistical tests on a DataFrame.
     Inherits from DataFrameInfo for additional data analysis capabilities.
     """
 
-    def __init__(self, dataframe):
-        self.df = dataframe.copy()
+    def __init__(self, dataframe, copy: bool = True):
+        self.df = working_frame(dataframe, copy)
 
     # NOTE Really like the method though 
     def chi_square_test(self, independent_variable: str, dependent_variables: List[str]) -> float:
@@ -40,7 +287,7 @@ class StatisticalTests(DataFrameInfo):
             for column in dependent_variables:
                 contingency_table = pd.crosstab(chi_sq_test_df[independent_variable], chi_sq_test_df[column])
                 # Step 3: Perform chi-squared test
-                chi2, p, dof, expected = chi2_contingency(contingency_table)
+                chi2, p, dof, expected = stats.chi2_contingency(contingency_table)
                 if p < 0.05:
                     print(f"Chi-square test for missing values in {independent_variable} against {column} column: ")
                     print(f"p-value = {p}: Significant")
@@ -54,11 +301,270 @@ class StatisticalTests(DataFrameInfo):
             for column in dependent_variables:
                 contingency_table = pd.crosstab(chi_sq_test_df[independent_variable], chi_sq_test_df[column])
                 # Step 3: Perform chi-squared test
-                chi2, p, dof, expected = chi2_contingency(contingency_table)
+                chi2, p, dof, expected = stats.chi2_contingency(contingency_table)
                 print(f"Chi-square test for missing values in {independent_variable} against {column} column: ")
                 print(f"p-value = {p}")
                 return p
             
+    def chi_square_batch(self, columns: Optional[List[str]] = None,
+                         pairs: Optional[List[Tuple[str, str]]] = None,
+                         correction: bool = True, max_cells: int = 20_000_000) -> pd.DataFrame:
+        """
+        Perform chi-square tests of independence for many pairs of categorical variables at once.
+
+        Every column is encoded once as integer codes. The contingency tables of a batch of pairs
+        are counted together with a single np.bincount over offset codes, and the chi-square
+        statistics and p-values of all tables are computed in one vectorised step.
+        Unlike chi_square_test, the results of every pair are returned, which makes it cheap to
+        screen all categorical columns for associations.
+
+        Parameters:
+        - columns (List[str], optional): Columns to test pairwise. Defaults to all categorical features.
+        - pairs (List[Tuple[str, str]], optional): Explicit pairs to test. Overrides 'columns'.
+        - correction (bool, optional): Whether to apply Yates' correction to 2x2 tables. Default is True.
+        - max_cells (int, optional): Upper bound on the number of row codes counted per batch,
+          which bounds the memory used. Default is 20 million.
+
+        Returns:
+        - pd.DataFrame: One row per pair with the columns 'variable_1', 'variable_2', 'chi2', 'dof',
+          'p_value' and 'n_observations'.
+
+        Example:
+        ```
+        associations = stats_tests.chi_square_batch(['month', 'region', 'traffic_type', 'visitor_type'])
+        significant = associations[associations['p_value'] < 0.05]
+        ```
+        """
+        if pairs is None:
+            if columns is None:
+                columns = self.extract_categorical_features()
+            pairs = list(combinations(columns, 2))
+        names = list(dict.fromkeys(col for pair in pairs for col in pair))
+        position = {name: i for i, name in enumerate(names)}
+        codes, cardinalities = _factorize_columns(self.df, names)
+        pair_index = np.array([[position[a], position[b]] for a, b in pairs], dtype=np.int64).reshape(-1, 2)
+        n_rows = len(self.df)
+        batch_size = max(1, max_cells // max(n_rows, 1))
+        statistics, dofs, p_values, observations = [], [], [], []
+        for start in range(0, len(pair_index), batch_size):
+            batch = pair_index[start:start + batch_size]
+            first, second = codes[:, batch[:, 0]], codes[:, batch[:, 1]]
+            n_first, n_second = cardinalities[batch[:, 0]].max(), cardinalities[batch[:, 1]].max()
+            table_size = n_first * n_second
+            # Flat index of each row in its pair's table; rows with a missing value in either column are dropped
+            flat = np.arange(len(batch)) * table_size + first * n_second + second
+            valid = (first >= 0) & (second >= 0)
+            tables = np.bincount(flat[valid], minlength=len(batch) * table_size)
+            tables = tables.reshape(len(batch), n_first, n_second)
+            batch_statistics, batch_dofs, batch_p_values = _chi2_statistics(tables, correction)
+            statistics.append(batch_statistics)
+            dofs.append(batch_dofs)
+            p_values.append(batch_p_values)
+            observations.append(tables.sum(axis=(1, 2)))
+        results = pd.DataFrame({
+            'variable_1': [a for a, b in pairs],
+            'variable_2': [b for a, b in pairs],
+            'chi2': np.concatenate(statistics) if statistics else [],
+            'dof': np.concatenate(dofs) if dofs else [],
+            'p_value': np.concatenate(p_values) if p_values else [],
+            'n_observations': np.concatenate(observations) if observations else []
+        })
+        return results
+
+    def missingness_association_matrix(self, categorical_columns: Optional[List[str]] = None,
+                                       null_columns: Optional[List[str]] = None,
+                                       correction: bool = True, n_jobs: Optional[int] = -1) -> pd.DataFrame:
+        """
+        Test whether missing values of every column with nulls are associated with every categorical column.
+
+        The null indicators of all columns with nulls are stacked into one boolean mask. For each
+        categorical column, the rows are sorted by category once and the null counts of all
+        indicators per category are summed in a single np.add.reduceat call, giving every 2 x k
+        contingency table at once; their chi-square tests are then computed in one vectorised step.
+        The categorical columns are processed in parallel across cores.
+
+        Parameters:
+        - categorical_columns (List[str], optional): Columns to test against. Defaults to all categorical features.
+        - null_columns (List[str], optional): Columns whose null indicator is tested. Defaults to all columns with nulls.
+        - correction (bool, optional): Whether to apply Yates' correction to 2x2 tables. Default is True.
+        - n_jobs (int, optional): Number of parallel workers, -1 for all cores. Default is -1.
+
+        Returns:
+        - pd.DataFrame: Matrix of p-values, indexed by null column, with one column per categorical column.
+          A column tested against itself is NaN.
+
+        Example:
+        ```
+        p_values = stats_tests.missingness_association_matrix()
+        p_values < 0.05 # Missingness that is not completely at random
+        ```
+        """
+        if categorical_columns is None:
+            categorical_columns = self.extract_categorical_features()
+        if null_columns is None:
+            null_columns = [col for col in self.df.columns if self.df[col].isnull().any()]
+        null_mask = self.df[null_columns].isnull().to_numpy()
+        codes, cardinalities = _factorize_columns(self.df, categorical_columns)
+
+        def column_p_values(position: int) -> np.ndarray:
+            column_codes = codes[:, position]
+            valid = column_codes >= 0
+            order = np.argsort(column_codes[valid], kind='stable')
+            category_sizes = np.bincount(column_codes[valid], minlength=cardinalities[position])
+            if len(order) == 0:
+                return np.full(len(null_columns), np.nan)
+            starts = np.concatenate(([0], np.cumsum(category_sizes)[:-1]))
+            null_counts = np.add.reduceat(null_mask[valid][order], starts, axis=0, dtype=np.int64).T
+            tables = np.stack((category_sizes - null_counts, null_counts), axis=1)
+            return _chi2_statistics(tables, correction)[2]
+
+        p_values = parallel_map(column_p_values, range(len(categorical_columns)), n_jobs=n_jobs)
+        matrix = pd.DataFrame(np.column_stack(p_values) if p_values else np.empty((len(null_columns), 0)),
+                              index=pd.Index(null_columns, name='null_column'), columns=categorical_columns)
+        for column in set(null_columns) & set(categorical_columns):
+            matrix.loc[column, column] = np.nan
+        return matrix
+
+    def bootstrap_confidence_interval(self, column: str, group_by=None, statistic: str = 'mean',
+                                      n_resamples: int = 10_000, confidence_level: float = 0.95,
+                                      batch_size: Optional[int] = None, n_jobs: Optional[int] = None,
+                                      random_state: Optional[int] = None) -> pd.DataFrame:
+        """
+        Estimate percentile bootstrap confidence intervals of a statistic, optionally for every segment.
+
+        Resamples are generated in batches as NumPy arrays rather than in Python loops, and batches
+        are spread across processes with seeds spawned from random_state, so results are reproducible
+        regardless of n_jobs. Columns with few distinct values (e.g. 'revenue' conversions) are
+        resampled exactly through multinomial value counts, which is independent of the number of rows.
+
+        Parameters:
+        - column (str): Name of the numeric or boolean column, e.g. 'revenue' for conversion rates.
+        - group_by (str or List[str], optional): Column(s) defining the segments. Default is None (whole column).
+        - statistic (str, optional): 'mean' or 'median'. Default is 'mean'.
+        - n_resamples (int, optional): Number of bootstrap resamples. Default is 10,000.
+        - confidence_level (float, optional): Confidence level of the interval. Default is 0.95.
+        - batch_size (int, optional): Resamples per batch. Defaults to about 4 million resampled values per batch.
+        - n_jobs (int, optional): Number of worker processes, -1 for all cores. Default is None (no pool).
+        - random_state (int, optional): Seed for reproducible results.
+
+        Returns:
+        - pd.DataFrame: One row per segment with 'n', 'estimate', 'std_error', 'ci_lower' and 'ci_upper'.
+
+        Raises:
+        - ValueError: If the statistic is not supported.
+
+        Example:
+        ```
+        conversion_ci = stats_tests.bootstrap_confidence_interval('revenue', group_by='traffic_type', random_state=0)
+        ```
+        """
+        statistic = statistic.lower()
+        if statistic not in ('mean', 'median'):
+            raise ValueError("Invalid statistic. Statistic can only be one of: mean, median")
+        values = self.df[column].astype(float)
+        if group_by is None:
+            segments = [(column, values.dropna().to_numpy())]
+        else:
+            # Group the float values, so that boolean columns such as 'revenue' are resampled as 0/1 in every segment
+            keys = [group_by.lower()] if isinstance(group_by, str) else [key.lower() for key in group_by]
+            grouped = values.groupby([self.df[key] for key in keys], observed=True, sort=True)
+            segments = [(name, group.dropna().to_numpy()) for name, group in grouped]
+        alpha = (1 - confidence_level) / 2
+        results = {}
+        for name, segment in segments:
+            if len(segment) == 0:
+                continue
+            uniques, counts = np.unique(segment, return_counts=True)
+            if len(uniques) <= _MAX_COUNT_RESAMPLING_VALUES:
+                payload = (None, uniques, counts, statistic)
+                estimate = _resampled_statistic(statistic, uniques, counts[None, :])[0]
+            else:
+                payload = (segment, None, None, statistic)
+                estimate = segment.mean() if statistic == 'mean' else np.median(segment)
+            size = batch_size or max(1, 2 ** 22 // (len(uniques) if payload[0] is None else len(segment)))
+            tasks = _resampling_tasks(payload, n_resamples, size, random_state)
+            resampled = np.concatenate(parallel_map(_bootstrap_batch, tasks, n_jobs=n_jobs, backend='processes'))
+            results[name] = {
+                'n': len(segment),
+                'estimate': estimate,
+                'std_error': resampled.std(ddof=1),
+                'ci_lower': np.quantile(resampled, alpha),
+                'ci_upper': np.quantile(resampled, 1 - alpha)
+            }
+        results = pd.DataFrame.from_dict(results, orient='index')
+        if group_by is not None:
+            results.index.names = keys
+        return results
+
+    def permutation_test(self, column: str, group_column: str, groups: Optional[List] = None,
+                         n_resamples: int = 10_000, alternative: str = 'two-sided',
+                         batch_size: Optional[int] = None, n_jobs: Optional[int] = None,
+                         random_state: Optional[int] = None) -> Tuple[float, float]:
+        """
+        Permutation test of whether the mean of a column differs between groups.
+
+        With two groups the statistic is the difference of means (first group minus second group);
+        with more groups it is the between-group sum of squares. Permutations are generated in
+        batches and spread across processes with reproducible seeding. For 0/1 columns such as
+        'revenue', the permutation distribution of conversions per group is sampled directly from
+        a multivariate hypergeometric distribution, so the cost does not depend on the number of rows.
+
+        Parameters:
+        - column (str): Name of the numeric or boolean column, e.g. 'revenue'.
+        - group_column (str): Name of the column defining the groups, e.g. 'traffic_type'.
+        - groups (List, optional): Groups to compare. Defaults to all groups, in sorted order.
+        - n_resamples (int, optional): Number of permutations. Default is 10,000.
+        - alternative (str, optional): 'two-sided', 'greater' or 'less'. Only 'two-sided' and
+          'greater' are meaningful with more than two groups. Default is 'two-sided'.
+        - batch_size (int, optional): Permutations per batch. Defaults to about 4 million permuted labels per batch.
+        - n_jobs (int, optional): Number of worker processes, -1 for all cores. Default is None (no pool).
+        - random_state (int, optional): Seed for reproducible results.
+
+        Returns:
+        - Tuple[float, float]: The observed statistic and the permutation p-value.
+
+        Raises:
+        - ValueError: If the alternative is not supported, fewer than two groups are found, or a
+          requested group has no rows.
+
+        Example:
+        ```
+        statistic, p = stats_tests.permutation_test('revenue', 'region', groups=['North America', 'Western Europe'])
+        ```
+        """
+        if alternative not in ('two-sided', 'greater', 'less'):
+            raise ValueError("Invalid alternative. Alternative can only be one of: two-sided, greater, less")
+        data = self.df[[column, group_column]].dropna()
+        if groups is not None:
+            data = data[data[group_column].isin(groups)]
+        codes, labels = pd.factorize(data[group_column], sort=groups is None)
+        if groups is not None:
+            codes = pd.Categorical(data[group_column], categories=groups).codes.astype(np.int64)
+            labels = groups
+        if len(labels) < 2:
+            raise ValueError(f"At least two groups are needed in {group_column} to run a permutation test.")
+        values = data[column].to_numpy(dtype=float)
+        sizes = np.bincount(codes, minlength=len(labels))
+        missing = [label for label, size in zip(labels, sizes) if size == 0]
+        if missing:
+            raise ValueError(f"Groups {missing} of {group_column} have no rows with a non-null {column}.")
+        observed = _group_statistic((np.bincount(codes, weights=values, minlength=len(labels)) / sizes)[None, :], sizes)[0]
+        binary = bool(np.isin(values, (0, 1)).all())
+        size = batch_size or (n_resamples if binary else max(1, 2 ** 22 // len(values)))
+        tasks = _resampling_tasks((codes, values, sizes, binary), n_resamples, size, random_state)
+        permuted = np.concatenate(parallel_map(_permutation_batch, tasks, n_jobs=n_jobs, backend='processes'))
+        tolerance = 1e-12 * max(abs(observed), 1)
+        if alternative == 'greater':
+            extreme = permuted >= observed - tolerance
+        elif alternative == 'less':
+            extreme = permuted <= observed + tolerance
+        else:
+            extreme = np.abs(permuted) >= abs(observed) - tolerance
+        p_value = (extreme.sum() + 1) / (len(permuted) + 1)
+        print(f"Permutation test of {column} across {group_column} groups {list(labels)}: ")
+        print(f"statistic = {observed}, p-value = {p_value}")
+        return observed, p_value
+
     def agostino_K2_test(self, column_name: str) -> None:
         """
         Perform D'Agostino's K^2 normality test on a continuous variable.
@@ -71,9 +577,102 @@ class StatisticalTests(DataFrameInfo):
         - column_name (str): Name of the continuous variable to test.
         """
         # Test for normality in continuous variables
-        stat, p = normaltest(self.df[column_name], nan_policy='omit')
+        stat, p = stats.normaltest(self.df[column_name], nan_policy='omit')
         print('Statistics=%.3f, p=%.3f' % (stat, p))
 
+    def normality_tests(self, columns: Optional[List[str]] = None,
+                        tests: Sequence[str] = ('dagostino', 'anderson', 'shapiro'),
+                        sample_size: Optional[int] = 5000, stratify_by=None,
+                        n_jobs: Optional[int] = -1, random_state: Optional[int] = 0) -> pd.DataFrame:
+        """
+        Run normality tests on many columns at once and return a structured results frame.
+
+        With hundreds of thousands of rows every normality test rejects, so the tests run on a
+        (optionally stratified) random subsample of rows, drawn once for all columns. Skewness and
+        excess kurtosis are reported as effect sizes alongside the p-values. D'Agostino's K^2 test
+        is computed for all complete columns in one vectorised call; the remaining per-column work
+        (columns with nulls, Anderson-Darling and Shapiro-Wilk) is spread across cores.
+
+        Parameters:
+        - columns (List[str], optional): Numeric columns to test. Defaults to all numeric features.
+        - tests (Sequence[str], optional): Tests among 'dagostino', 'anderson' and 'shapiro'. Default is all three.
+        - sample_size (int, optional): Rows in the subsample; None uses every row. Shapiro-Wilk uses
+          at most 5000 rows, drawn at random from the subsample. Default is 5000.
+        - stratify_by (str or List[str], optional): Column(s) whose proportions the subsample preserves,
+          e.g. 'revenue'. Default is None (simple random sample).
+        - n_jobs (int, optional): Number of parallel workers, -1 for all cores. Default is -1.
+        - random_state (int, optional): Seed of the subsample. Default is 0.
+
+        Returns:
+        - pd.DataFrame: One row per column with 'n', 'skewness' and 'kurtosis', plus
+          'k2_statistic' and 'k2_p_value' (dagostino), 'anderson_statistic', 'anderson_critical_5%'
+          and 'anderson_normal_5%' (anderson), 'shapiro_n', 'shapiro_statistic' and 'shapiro_p_value' (shapiro).
+
+        Raises:
+        - ValueError: If a test is not supported.
+
+        Example:
+        ```
+        normality = stats_tests.normality_tests(['bounce_rates', 'exit_rates'], stratify_by='revenue')
+        ```
+        """
+        tests = [test.lower() for test in tests]
+        invalid = set(tests) - {'dagostino', 'anderson', 'shapiro'}
+        if invalid:
+            raise ValueError(f"Invalid tests {sorted(invalid)}. Tests can only be: dagostino, anderson, shapiro")
+        if columns is None:
+            columns = list(self.extract_numeric_features().columns)
+        rng = np.random.default_rng(random_state)
+        if sample_size is None:
+            rows = np.arange(len(self.df))
+        elif stratify_by is None:
+            rows = np.sort(rng.choice(len(self.df), size=min(sample_size, len(self.df)), replace=False))
+        else:
+            keys = [stratify_by] if isinstance(stratify_by, str) else list(stratify_by)
+            strata = self.df.groupby(keys, dropna=False, sort=False).ngroup().to_numpy()
+            rows = _stratified_sample_indices(strata, sample_size, rng)
+        sample = _numeric_matrix(self.df.iloc[rows], columns)
+        complete = ~np.isnan(sample).any(axis=0)
+        results = pd.DataFrame(index=pd.Index(columns, name='column'))
+        results['n'] = (~np.isnan(sample)).sum(axis=0)
+        results['skewness'] = stats.skew(sample, axis=0, nan_policy='omit')
+        results['kurtosis'] = stats.kurtosis(sample, axis=0, nan_policy='omit')
+        # Shapiro-Wilk takes the first 5000 non-null values in this random order, drawn here because
+        # the generator is not shared with the worker threads
+        shapiro_order = rng.permutation(len(sample)) if len(sample) > 5000 else np.arange(len(sample))
+
+        def column_tests(position: int) -> dict:
+            values = sample[:, position]
+            values = values[~np.isnan(values)]
+            column_results = {}
+            # errstate is thread-local, so it is set in the worker rather than around parallel_map
+            with np.errstate(divide='ignore', invalid='ignore'):
+                if 'dagostino' in tests and not complete[position] and len(values) >= 8:
+                    column_results['k2_statistic'], column_results['k2_p_value'] = stats.normaltest(values)
+                if 'anderson' in tests and len(values) >= 3:
+                    result = stats.anderson(values, dist='norm')
+                    critical_5 = result.critical_values[list(result.significance_level).index(5.0)]
+                    column_results['anderson_statistic'] = result.statistic
+                    column_results['anderson_critical_5%'] = critical_5
+                    column_results['anderson_normal_5%'] = result.statistic < critical_5
+                if 'shapiro' in tests and len(values) >= 3:
+                    shapiro_values = sample[shapiro_order, position]
+                    shapiro_values = shapiro_values[~np.isnan(shapiro_values)][:5000]
+                    column_results['shapiro_n'] = len(shapiro_values)
+                    column_results['shapiro_statistic'], column_results['shapiro_p_value'] = \
+                        stats.shapiro(shapiro_values)
+            return column_results
+
+        if 'dagostino' in tests and complete.any() and len(sample) >= 8:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                statistic, p_value = stats.normaltest(sample[:, complete], axis=0)
+            results.loc[complete, 'k2_statistic'] = statistic
+            results.loc[complete, 'k2_p_value'] = p_value
+        per_column = parallel_map(column_tests, range(len(columns)), n_jobs=n_jobs)
+        per_column = pd.DataFrame(per_column, index=results.index)
+        ordered_columns = list(results.columns) + [col for col in per_column.columns if col not in results.columns]
+        return results.combine_first(per_column)[ordered_columns]
+
     def IQR(self, column: str) -> Tuple[float, float, float, str]:
         """
         Calculate and display Interquartile Range (IQR) statistics for a single column.
@@ -113,11 +712,107 @@ class StatisticalTests(DataFrameInfo):
         - List[Tuple[float, float, float, str]]: List of tuples, each containing Q1, Q3, IQR, 
           and a string with printed information.
         """
+        quartiles = self.quantiles(column_list, [0.25, 0.75])
         results = []
         for col in column_list:
-            result_tuple = self.IQR(col)
-            results.append(result_tuple)
-            print(result_tuple[-1])  # Print the string information
+            Q1, Q3 = quartiles.at[0.25, col], quartiles.at[0.75, col]
+            IQR = Q3 - Q1
+            result_str = f"\nResults for {col} column:"
+            result_str += f"\nQ1 (25th percentile): {Q1}"
+            result_str += f"\nQ3 (75th percentile): {Q3}"
+            result_str += f"\nIQR: {IQR}\n"
+            results.append((Q1, Q3, IQR, result_str))
+            print(result_str)  # Print the string information
         return results
+
+    def quantiles(self, columns: Optional[List[str]] = None, q: Sequence[float] = (0.25, 0.5, 0.75),
+                  sketch: bool = False, chunks: Optional[Iterable[pd.DataFrame]] = None,
+                  chunksize: int = 1_000_000, sketch_size: int = 2048) -> pd.DataFrame:
+        """
+        Compute several quantiles of several numeric columns in a single call.
+
+        By default all quantiles of all columns are read from one sort of the numeric matrix,
+        instead of one .quantile() scan per column and quantile. In sketch mode the rows are
+        streamed chunk by chunk into a QuantileSketch per column, so memory stays bounded; use it for
+        frames too large to sort at once, or pass 'chunks' (e.g. pd.read_csv(..., chunksize=...)) to
+        summarise data that is never loaded in full. Sketch results are approximate.
+
+        Parameters:
+        - columns (List[str], optional): Numeric columns. Defaults to all numeric features.
+        - q (Sequence[float], optional): Quantiles between 0 and 1. Default is (0.25, 0.5, 0.75).
+        - sketch (bool, optional): Whether to use the streaming sketch mode. Default is False.
+        - chunks (Iterable[pd.DataFrame], optional): Chunks to stream instead of this instance's DataFrame.
+          Implies sketch mode.
+        - chunksize (int, optional): Rows per chunk when streaming this instance's DataFrame. Default is 1,000,000.
+        - sketch_size (int, optional): Capacity k of each QuantileSketch. Default is 2048.
+
+        Returns:
+        - pd.DataFrame: Quantiles indexed by q, with one column per column, like pd.DataFrame.quantile.
+
+        Example:
+        ```
+        quartiles = stats_tests.quantiles(['bounce_rates', 'exit_rates', 'page_values'], q=[0.25, 0.75])
+        quartiles = stats_tests.quantiles(['page_values'], chunks=pd.read_csv('big.csv', chunksize=100_000))
+        ```
+        """
+        if columns is None:
+            columns = list(self.extract_numeric_features().columns)
+        if chunks is None and not sketch:
+            values = _column_quantiles(_numeric_matrix(self.df, columns), q)
+        else:
+            if chunks is None:
+                chunks = (self.df.iloc[start:start + chunksize] for start in range(0, len(self.df), chunksize))
+            sketches = {col: QuantileSketch(sketch_size, random_state=0) for col in columns}
+            for chunk in chunks:
+                matrix = _numeric_matrix(chunk, columns)
+                for position, col in enumerate(columns):
+                    sketches[col].update(matrix[:, position])
+            values = np.column_stack([sketches[col].quantile(q) for col in columns]) if columns else np.empty((len(q), 0))
+        return pd.DataFrame(values, index=pd.Index(list(q)), columns=columns)
+
+    def IQR_table(self, columns: Optional[List[str]] = None, factor: float = 1.5, **quantile_options) -> pd.DataFrame:
+        """
+        Calculate IQR statistics and outlier fences of several columns in a single quantile pass.
+
+        Parameters:
+        - columns (List[str], optional): Numeric columns. Defaults to all numeric features.
+        - factor (float, optional): IQR multiplier of the outlier fences. Default is 1.5.
+        - **quantile_options: Options passed to the quantiles method, e.g. sketch=True.
+
+        Returns:
+        - pd.DataFrame: One row per column with 'Q1', 'Q3', 'IQR', 'lower_fence' and 'upper_fence'.
+
+        Example:
+        ```
+        fences = stats_tests.IQR_table(['product_related_duration', 'page_values'])
+        ```
+        """
+        quartiles = self.quantiles(columns, [0.25, 0.75], **quantile_options)
+        table = pd.DataFrame({'Q1': quartiles.loc[0.25], 'Q3': quartiles.loc[0.75]})
+        table['IQR'] = table['Q3'] - table['Q1']
+        table['lower_fence'] = table['Q1'] - factor * table['IQR']
+        table['upper_fence'] = table['Q3'] + factor * table['IQR']
+        return table
     
-    
\ No newline at end of file
+    def grouped_IQR(self, group_by, columns=None) -> pd.DataFrame:
+        """
+        Calculate Interquartile Range (IQR) statistics of numeric columns for every segment in one groupby pass.
+
+        Parameters:
+        - group_by (str or List[str]): Column(s) defining the segments.
+        - columns: Columns to include in the subset.
+        See docs for get_slice method for the requirements of the 'columns' parameter > help(get_slice)
+
+        Returns:
+        - pd.DataFrame: Tidy frame with the group keys, 'column', 'Q1', 'Q3' and 'IQR'.
+
+        Example:
+        ```
+        iqr = stats_tests.grouped_IQR('month', ['bounce_rates', 'exit_rates'])
+        ```
+        """
+        keys, grouped = self._group_by(group_by, columns, numeric_only=True)
+        quartiles = grouped.quantile([0.25, 0.75])
+        Q1 = quartiles.xs(0.25, level=-1)
+        Q3 = quartiles.xs(0.75, level=-1)
+        return self._tidy_grouped({'Q1': Q1, 'Q3': Q3, 'IQR': Q3 - Q1}, keys)
@@ -1,9 +1,15 @@
-from scipy import stats
-from typing import List
+from scripts._lazy import lazy_import
+from scripts.instrumentation import instrumented
+from scripts.outlier_detector import OutlierDetector
+from scripts.shared_frame import SharedFrame, working_frame
+from typing import List, Optional, Union
 import numpy as np
 import pandas as pd
 
+stats = lazy_import('scipy.stats')
 
+
+@instrumented
 class DataTransform:
     """
     A class for performing various transformations on a DataFrame.
@@ -17,15 +23,24 @@ class DataTransform:
     ```
 
     """    
-    def __init__(self, dataframe: pd.DataFrame):
+    def __init__(self, dataframe: Union[pd.DataFrame, SharedFrame], copy: bool = True):
         """
         Initialize the DataTransform object with a DataFrame. Used internally when an instance of the call is called.
 
+        Under the 'pyarrow' dtype backend (see dtype_backend.set_dtype_backend) the columns are converted
+        to Arrow, and if a memory budget is set (see memory.set_memory_budget) and the DataFrame exceeds it,
+        its dtypes are optimised. String columns of a SharedFrame come back with the 'category' dtype
+        rather than 'object'.
+
         Parameters:
-        - dataframe (pd.DataFrame): The DataFrame to transform.
+        - dataframe (pd.DataFrame or SharedFrame): The DataFrame to transform.
+        - copy (bool, optional): Whether to work on a copy of the DataFrame. With copy=False the
+          transformations modify the caller's DataFrame, or work on the zero-copy, read-only view of a
+          SharedFrame, where methods that write values in place raise ValueError. Default is True.
 
         """
-        self.df = dataframe.copy()
+        self.df = working_frame(dataframe, copy, memory_budget=True)
+        self.outlier_fences = None
 
     def convert_to_type(self, column_name: str, data_type: str, ignore_errors: bool = True) -> pd.DataFrame:
         """
@@ -62,6 +77,16 @@ class DataTransform:
         # you could reduce the size of the this method but place the conversion part of the code in another method and calling it here.
         # There are other ways to do this with dictionaries as well but it should reduce the overall size of your method doing it this way
 
+    def _as_str(self, column_name: str) -> pd.Series:
+        """
+        Return a column as strings. Arrow string columns are returned as they are, since casting them
+        with astype(str) would materialise one Python object per row.
+        """
+        column = self.df[column_name]
+        if isinstance(column.dtype, pd.ArrowDtype) and pd.api.types.is_string_dtype(column.dtype):
+            return column
+        return column.astype(str)
+
     def convert_month_to_period(self, column_name: str) -> pd.DataFrame:
         """
         Convert a column representing months to a period format.
@@ -74,7 +99,7 @@ class DataTransform:
 
         """
         try:
-            self.df[column_name] = self.df[column_name].astype(str)
+            self.df[column_name] = self._as_str(column_name)
             self.df['month'] = self.df['month'].str.lower()
             # NOTE I would actually move your mappings into a separate file here and import it just to keep it cleaner
             month_map = {'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'june': 6,
@@ -97,7 +122,7 @@ class DataTransform:
 
         """
         try:
-            self.df[column_name] = self.df[column_name].astype(str)
+            self.df[column_name] = self._as_str(column_name)
             self.df['month'] = self.df['month'].str.lower()
             # NOTE I would actually move your mappings into a separate file here and import it just to keep it cleaner
             month_map = {'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'june': 6,
@@ -120,7 +145,7 @@ class DataTransform:
 
         """
         try:
-            self.df[column_name] = self.df[column_name].astype(str)
+            self.df[column_name] = self._as_str(column_name)
             self.df['month'] = self.df['month'].str.lower()
             # NOTE I would actually move your mappings into a separate file here and import it just to keep it cleaner
             month_map = {'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'june': 6,
@@ -356,3 +381,92 @@ class DataTransform:
             self.df[col] = self.df[col].apply(lambda x: stats.yeojohnson([x], lmbda=lambda_value)[0] if x != 0 else 0)
         return self.df
     
+
+    def fit_outlier_fences(self, column_list: Optional[List[str]] = None, method: str = 'iqr',
+                           **thresholds) -> pd.DataFrame:
+        """
+        Compute outlier fences with the OutlierDetector methods and keep them for later batches.
+
+        Parameters:
+        - column_list (List[str], optional): Numeric columns. Defaults to all numeric columns.
+        - method (str, optional): 'zscore', 'modified_zscore' or 'iqr'. Default is 'iqr'.
+        - **thresholds: z_threshold, modified_z_threshold or iqr_factor, see OutlierDetector.outlier_masks.
+
+        Returns:
+        - pd.DataFrame: 'lower_fence' and 'upper_fence' per column, also stored in self.outlier_fences.
+
+        Example:
+        ```
+        fences = transformer.fit_outlier_fences(['product_related_duration', 'page_values'])
+        ```
+
+        """
+        if column_list is None:
+            column_list = list(self.df.select_dtypes(include=np.number).columns)
+        self.outlier_fences = OutlierDetector(self.df, copy=False).outlier_fences(column_list, method, **thresholds)
+        return self.outlier_fences
+
+    def _resolve_fences(self, fences: Optional[pd.DataFrame]) -> pd.DataFrame:
+        """
+        Return the fences to apply: the given ones (which are kept for later calls) or the stored ones.
+
+        Raises:
+        - ValueError: If no fences are given nor stored.
+        """
+        if fences is not None:
+            self.outlier_fences = fences
+        if self.outlier_fences is None:
+            raise ValueError("No outlier fences: provide fences, e.g. OutlierDetector.outlier_fences(), "
+                             "or call fit_outlier_fences first.")
+        return self.outlier_fences
+
+    def remove_outliers(self, fences: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """
+        Remove the rows with a value outside its column's fences, in any of the fenced columns.
+
+        All fenced columns are compared with their fences in one vectorised step, and the DataFrame is
+        filtered once with the combined row index. Missing values are never treated as outliers.
+        Fences fitted on one batch can be reused on later batches.
+
+        Parameters:
+        - fences (pd.DataFrame, optional): 'lower_fence' and 'upper_fence' indexed by column, e.g. from
+          OutlierDetector.outlier_fences, IQR_table, or OutlierMasks.fences.loc['iqr'].
+          Defaults to the fences already stored in self.outlier_fences.
+
+        Returns:
+        - pd.DataFrame: DataFrame without the outlier rows.
+
+        Example:
+        ```
+        fences = OutlierDetector(training_df).outlier_fences(['page_values', 'bounce_rates'])
+        df = DataTransform(new_batch_df).remove_outliers(fences)
+        ```
+
+        """
+        fences = self._resolve_fences(fences)
+        matrix = self.df[list(fences.index)].to_numpy(dtype=np.float64, na_value=np.nan)
+        outside = (matrix < fences['lower_fence'].to_numpy()) | (matrix > fences['upper_fence'].to_numpy())
+        self.df = self.df.iloc[np.flatnonzero(~outside.any(axis=1))]
+        return self.df
+
+    def cap_outliers(self, fences: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """
+        Winsorize the fenced columns: values below (above) the lower (upper) fence are set to the fence.
+
+        Parameters:
+        - fences (pd.DataFrame, optional): 'lower_fence' and 'upper_fence' indexed by column.
+          Defaults to the fences already stored in self.outlier_fences. See remove_outliers.
+
+        Returns:
+        - pd.DataFrame: DataFrame with the outliers capped.
+
+        Example:
+        ```
+        df = transformer.cap_outliers(outlier_detector.outlier_fences(method='modified_zscore'))
+        ```
+
+        """
+        fences = self._resolve_fences(fences)
+        columns = list(fences.index)
+        self.df[columns] = self.df[columns].clip(lower=fences['lower_fence'], upper=fences['upper_fence'], axis=1)
+        return self.df